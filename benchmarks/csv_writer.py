@@ -0,0 +1,91 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from nptdms import TdmsFile
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.generators import float_group
+from src.modules.converter import convert_group
+from src.modules.options import ConversionOptions
+
+
+def legacy_conversion(source_file_path: str, destination_file_path: str) -> None:
+    """The conversion as it was done before the CsvWriter: the whole group as a DataFrame, written with 101 DataFrame.to_csv calls.
+
+    Args:
+        source_file_path (str): Path to the .tdms file.
+        destination_file_path (str): Path to the csv file.
+    """
+    with TdmsFile.open(source_file_path) as tdms_file:
+        group_df = tdms_file["group"].as_dataframe()
+        for count, chunk in enumerate(np.array_split(group_df.index, 101)):
+            group_df.loc[chunk].to_csv(
+                destination_file_path,
+                header=None if count else True,
+                sep=",",
+                mode="a" if count else "w",
+                index=True,
+            )
+
+
+def measure(
+    label: str,
+    function,
+    destination_file_path: str,
+    reference: Optional[float] = None,
+) -> float:
+    """Run a conversion and print its throughput in MB/s of csv written and, given the duration of the legacy conversion, its speedup.
+    Floats written with fewer digits make smaller files, so compare the speedups rather than the MB/s of conversions with different float formats.
+
+    Args:
+        label (str): Name of the conversion.
+        function: Function running the conversion.
+        destination_file_path (str): Path to the csv file written by the conversion.
+        reference (Optional[float], optional): Duration in seconds of the legacy conversion. Defaults to None.
+
+    Returns:
+        float: Duration of the conversion in seconds.
+    """
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    size = Path(destination_file_path).stat().st_size / 1e6
+    speedup = f" {reference / elapsed:5.1f}x" if reference is not None else ""
+    print(f"{label:>14}: {elapsed:7.2f} s {size / elapsed:7.1f} MB/s{speedup}")
+    return elapsed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Compare the csv writer against the legacy DataFrame.to_csv conversion."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--channels", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_file_path = str(Path(directory) / "floats.tdms")
+        float_group(source_file_path, args.rows, args.channels)
+
+        legacy_file_path = str(Path(directory) / "legacy.csv")
+        legacy = measure(
+            "legacy",
+            lambda: legacy_conversion(source_file_path, legacy_file_path),
+            legacy_file_path,
+        )
+        for label, options in [
+            ("CsvWriter", ConversionOptions()),
+            ("CsvWriter %.6g", ConversionOptions(float_precision=6)),
+        ]:
+            measure(
+                label,
+                lambda: convert_group(source_file_path, "group", directory, options),
+                str(Path(directory) / "floats_group.csv"),
+                legacy,
+            )
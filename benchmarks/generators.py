@@ -0,0 +1,132 @@
+from pathlib import Path
+from typing import Callable, Dict
+import numpy as np
+from nptdms import ChannelObject, TdmsWriter
+
+# Rows written per segment, the way LabVIEW appends a segment per acquisition block.
+SEGMENT_ROWS = 100_000
+
+
+def write_segments(
+    file_path: str, groups: Dict[str, Dict[str, Callable]], rows: int
+) -> None:
+    """Write a .tdms file segment by segment so that generating large files does not need much memory.
+
+    Args:
+        file_path (str): Path to the .tdms file.
+        groups (Dict[str, Dict[str, Callable]]): Channel generators keyed by group and channel name. Each generator is called with the row indices of a segment and returns the values.
+        rows (int): Number of rows per group.
+    """
+    with TdmsWriter(file_path) as tdms_writer:
+        for start in range(0, rows, SEGMENT_ROWS):
+            indices = np.arange(start, min(start + SEGMENT_ROWS, rows))
+            tdms_writer.write_segment(
+                [
+                    ChannelObject(group_name, channel_name, generate(indices))
+                    for group_name, channels in groups.items()
+                    for channel_name, generate in channels.items()
+                ]
+            )
+
+
+def random_floats(indices: np.ndarray) -> np.ndarray:
+    """Random double precision values, the typical content of a sensor channel."""
+    return np.random.randn(len(indices))
+
+
+def many_small_groups(file_path: str, scale: float = 1.0) -> None:
+    """Many groups of a few channels and rows each.
+
+    Args:
+        file_path (str): Path to the .tdms file.
+        scale (float, optional): Multiplier of the number of rows. Defaults to 1.0.
+    """
+    groups = {
+        f"group_{group}": {f"channel_{channel}": random_floats for channel in range(4)}
+        for group in range(40)
+    }
+    write_segments(file_path, groups, int(10_000 * scale))
+
+
+def one_huge_group(file_path: str, scale: float = 1.0) -> None:
+    """A single group with a few very long channels.
+
+    Args:
+        file_path (str): Path to the .tdms file.
+        scale (float, optional): Multiplier of the number of rows. Defaults to 1.0.
+    """
+    groups = {"group": {f"channel_{channel}": random_floats for channel in range(4)}}
+    write_segments(file_path, groups, int(1_000_000 * scale))
+
+
+def wide_channels(file_path: str, scale: float = 1.0) -> None:
+    """A single group with a large number of channels.
+
+    Args:
+        file_path (str): Path to the .tdms file.
+        scale (float, optional): Multiplier of the number of rows. Defaults to 1.0.
+    """
+    groups = {"group": {f"channel_{channel}": random_floats for channel in range(200)}}
+    write_segments(file_path, groups, int(20_000 * scale))
+
+
+def mixed_dtypes(file_path: str, scale: float = 1.0) -> None:
+    """A single group mixing integers, single and double precision floats, timestamps and strings.
+
+    Args:
+        file_path (str): Path to the .tdms file.
+        scale (float, optional): Multiplier of the number of rows. Defaults to 1.0.
+    """
+    start_time = np.datetime64("2024-01-01T00:00:00", "us")
+    groups = {
+        "group": {
+            "int32": lambda indices: indices.astype(np.int32),
+            "uint8": lambda indices: (indices % 256).astype(np.uint8),
+            "float32": lambda indices: np.random.randn(len(indices)).astype(np.float32),
+            "float64": random_floats,
+            "timestamp": lambda indices: start_time + indices * np.timedelta64(1, "ms"),
+            "string": lambda indices: np.array(
+                [f"sample {index}" for index in indices]
+            ),
+        }
+    }
+    write_segments(file_path, groups, int(200_000 * scale))
+
+
+def float_group(file_path: str, rows: int, channels: int) -> None:
+    """A single group of random double precision channels with an exact size.
+
+    Args:
+        file_path (str): Path to the .tdms file.
+        rows (int): Number of values per channel.
+        channels (int): Number of channels.
+    """
+    groups = {
+        "group": {f"channel_{channel}": random_floats for channel in range(channels)}
+    }
+    write_segments(file_path, groups, rows)
+
+
+SHAPES = {
+    "many_small_groups": many_small_groups,
+    "one_huge_group": one_huge_group,
+    "wide_channels": wide_channels,
+    "mixed_dtypes": mixed_dtypes,
+}
+
+
+def generate(directory: str, scale: float = 1.0) -> Dict[str, str]:
+    """Generate one synthetic .tdms file per shape.
+
+    Args:
+        directory (str): Directory for the files.
+        scale (float, optional): Multiplier of the number of rows. Defaults to 1.0.
+
+    Returns:
+        Dict[str, str]: Paths to the files keyed by shape.
+    """
+    file_paths = {}
+    for shape, write in SHAPES.items():
+        file_paths[shape] = str(Path(directory) / f"{shape}.tdms")
+        write(file_paths[shape], scale)
+    return file_paths
@@ -0,0 +1,405 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.generators import SHAPES, generate
+
+RESULTS_DIR = Path(__file__).parent / "results"
+FORMATS = ["csv", "parquet", "h5", "arrow"]
+# Number of formatter threads of the cases without a suffix, the default of the conversion.
+DEFAULT_FORMAT_JOBS = 1
+# Metrics where a higher value is better, the others (peak RSS, time to first byte or progress) should stay low.
+HIGHER_IS_BETTER = {"rows_per_second", "megabytes_per_second"}
+# Seconds between two looks at the destination directory for the first bytes written. The watcher stops once they are found, so it only competes with the conversion until then.
+FIRST_BYTE_POLL_INTERVAL = 0.001
+
+
+def peak_rss_megabytes() -> Optional[float]:
+    """Peak resident set size of the current process.
+
+    Returns:
+        Optional[float]: Peak RSS in MB, or None where the resource module is not available (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes on Linux.
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def watch_first_byte(directory: str, found: List[float], stop: threading.Event) -> None:
+    """Poll a directory until a file in it holds bytes, and record when.
+
+    Args:
+        directory (str): Destination directory of the conversion.
+        found (List[float]): Receives the time.perf_counter() at which the first bytes were seen.
+        stop (threading.Event): Set to stop watching, e.g. once the conversion is over.
+    """
+    while not stop.is_set():
+        try:
+            if any(
+                entry.is_file() and entry.stat().st_size
+                for entry in os.scandir(directory)
+            ):
+                found.append(time.perf_counter())
+                return
+        except OSError:
+            # A file was renamed or removed while listing the directory.
+            pass
+        stop.wait(FIRST_BYTE_POLL_INTERVAL)
+
+
+def run_case(
+    source_file_path: str,
+    destination_file_format: str,
+    memory_map: bool = False,
+    format_workers: int = DEFAULT_FORMAT_JOBS,
+) -> Dict[str, Any]:
+    """Convert a file and measure the conversion. Called in a fresh process per case so that peak RSS belongs to that case only. The time to first byte is when a destination file first holds bytes on disk, the time to first progress when the conversion first reports progress, i.e. once the first chunk has been written.
+
+    Args:
+        source_file_path (str): Path to the .tdms file.
+        destination_file_format (str): Destination file format.
+        memory_map (bool, optional): Whether to read the file through a memory map. Defaults to False.
+        format_workers (int, optional): Number of formatter threads. Defaults to DEFAULT_FORMAT_JOBS.
+
+    Returns:
+        Dict[str, Any]: Measurements of the conversion.
+    """
+    from nptdms import TdmsFile
+    from src.modules.converter import convert_file
+    from src.modules.options import ConversionOptions
+    from src.modules.progress import ProgressUpdate
+    from src.modules.reader import group_length
+
+    with TdmsFile.open(source_file_path) as tdms_file:
+        rows = sum(group_length(group) for group in tdms_file.groups())
+
+    first_progress = []
+    first_byte = []
+
+    def track_first_progress(_: ProgressUpdate) -> None:
+        if not first_progress:
+            first_progress.append(time.perf_counter())
+
+    with tempfile.TemporaryDirectory() as destination_dir:
+        stop = threading.Event()
+        watcher = threading.Thread(
+            target=watch_first_byte, args=(destination_dir, first_byte, stop)
+        )
+        start = time.perf_counter()
+        watcher.start()
+        try:
+            destination_files = convert_file(
+                source_file_path,
+                destination_dir,
+                ConversionOptions(
+                    destination_file_format=destination_file_format,
+                    memory_map=memory_map,
+                    format_workers=format_workers,
+                ),
+                on_progress=track_first_progress,
+            )
+        except ImportError as error:
+            return {"skipped": str(error)}
+        finally:
+            stop.set()
+            watcher.join()
+        elapsed = time.perf_counter() - start
+        output_bytes = sum(
+            Path(file_path).stat().st_size for file_path in destination_files
+        )
+
+    source_megabytes = Path(source_file_path).stat().st_size / 1e6
+    return {
+        "seconds": elapsed,
+        "rows": rows,
+        "rows_per_second": rows / elapsed,
+        "megabytes_per_second": source_megabytes / elapsed,
+        "output_megabytes": output_bytes / 1e6,
+        "time_to_first_byte": (first_byte[0] - start) if first_byte else None,
+        "time_to_first_progress": (
+            (first_progress[0] - start) if first_progress else None
+        ),
+        "peak_rss_megabytes": peak_rss_megabytes(),
+    }
+
+
+def run_suite(
+    shapes: List[str],
+    formats: List[str],
+    scale: float,
+    repeat: int,
+    memory_map: bool = False,
+    format_jobs: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """Generate the synthetic files and measure every shape, format and number of formatter threads, each case in its own process. The best of the repeats is kept.
+
+    Args:
+        shapes (List[str]): Shapes of synthetic files.
+        formats (List[str]): Destination file formats.
+        scale (float): Multiplier of the number of rows of the synthetic files.
+        repeat (int): Number of runs per case.
+        memory_map (bool, optional): Whether to read the files through a memory map. Defaults to False.
+        format_jobs (Optional[List[int]], optional): Numbers of formatter threads to measure. Defaults to None, i.e. only DEFAULT_FORMAT_JOBS.
+
+    Returns:
+        Dict[str, Any]: Environment and measurements keyed by case name (see case_name).
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        file_paths = generate(directory, scale)
+        for shape in shapes:
+            for destination_file_format, jobs in [
+                (file_format, jobs)
+                for file_format in formats
+                for jobs in format_jobs or [DEFAULT_FORMAT_JOBS]
+            ]:
+                runs = []
+                for _ in range(repeat):
+                    output = subprocess.run(
+                        [
+                            sys.executable,
+                            __file__,
+                            "--case",
+                            file_paths[shape],
+                            destination_file_format,
+                            "--case-format-jobs",
+                            str(jobs),
+                        ]
+                        + (["--case-mmap"] if memory_map else []),
+                        check=True,
+                        capture_output=True,
+                        text=True,
+                    ).stdout
+                    runs.append(json.loads(output))
+                case = min(runs, key=lambda run: run.get("seconds", 0))
+                name = case_name(shape, destination_file_format, jobs)
+                results[name] = case
+                print(f"{name}: {format_case(case)}")
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "memory_map": memory_map,
+        "format_jobs": format_jobs or [DEFAULT_FORMAT_JOBS],
+        "results": results,
+    }
+
+
+def case_name(shape: str, destination_file_format: str, format_jobs: int) -> str:
+    """Name of a case in the results. Cases with the default number of formatter threads keep the shape/format name of the runs made before it could be set, so they can still be compared.
+
+    Args:
+        shape (str): Shape of the synthetic file.
+        destination_file_format (str): Destination file format.
+        format_jobs (int): Number of formatter threads.
+
+    Returns:
+        str: shape/format, followed by /format-jobs-N for other numbers of formatter threads.
+    """
+    name = f"{shape}/{destination_file_format}"
+    if format_jobs != DEFAULT_FORMAT_JOBS:
+        name += f"/format-jobs-{format_jobs}"
+    return name
+
+
+def format_case(case: Dict[str, Any]) -> str:
+    """One line summary of the measurements of a case.
+
+    Args:
+        case (Dict[str, Any]): Measurements.
+
+    Returns:
+        str: Summary.
+    """
+    if "skipped" in case:
+        return f"skipped ({case['skipped']})"
+    peak_rss = case["peak_rss_megabytes"]
+    peak_rss_text = f"{peak_rss:.0f} MB" if peak_rss is not None else "n/a"
+    return (
+        f"{case['rows_per_second']:,.0f} rows/s, {case['megabytes_per_second']:.1f} MB/s, "
+        f"first byte {case['time_to_first_byte'] or 0:.3f} s, "
+        f"first progress {case.get('time_to_first_progress') or 0:.3f} s, peak RSS {peak_rss_text}"
+    )
+
+
+def git_commit() -> Optional[str]:
+    """Commit of the working tree the benchmarks ran on.
+
+    Returns:
+        Optional[str]: Commit hash, or None outside of a git repository.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Compare two benchmark runs and list the metrics that regressed by more than the threshold.
+
+    Args:
+        baseline (Dict[str, Any]): Results of the reference run.
+        current (Dict[str, Any]): Results of the new run.
+        threshold (float): Allowed relative change, e.g. 0.1 for 10%.
+
+    Returns:
+        List[str]: Description of each regression.
+    """
+    regressions = []
+    for case, measurements in current["results"].items():
+        reference = baseline["results"].get(case)
+        if reference is None or "skipped" in reference or "skipped" in measurements:
+            continue
+        for metric, value in measurements.items():
+            reference_value = reference.get(metric)
+            if not isinstance(value, (int, float)) or not reference_value:
+                continue
+            change = (value - reference_value) / reference_value
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if metric != "rows" and change > threshold:
+                regressions.append(
+                    f"{case} {metric}: {reference_value:.4g} -> {value:.4g} ({change:+.0%} worse)"
+                )
+    return regressions
+
+
+def scaling_regressions(results: Dict[str, Any], threshold: float) -> List[str]:
+    """List the cases that got slower with more formatter threads than with the default number, which more threads should never do.
+
+    Args:
+        results (Dict[str, Any]): Results of a run.
+        threshold (float): Allowed relative slowdown, e.g. 0.1 for 10%.
+
+    Returns:
+        List[str]: Description of each case that does not scale.
+    """
+    regressions = []
+    for name, case in results["results"].items():
+        shape_format, _, jobs = name.partition("/format-jobs-")
+        reference = results["results"].get(shape_format)
+        if (
+            not jobs
+            or int(jobs) <= DEFAULT_FORMAT_JOBS
+            or reference is None
+            or "skipped" in reference
+            or "skipped" in case
+        ):
+            continue
+        change = (case["seconds"] - reference["seconds"]) / reference["seconds"]
+        if change > threshold:
+            regressions.append(
+                f"{name} seconds: {reference['seconds']:.4g} with {DEFAULT_FORMAT_JOBS} formatter -> {case['seconds']:.4g} ({change:+.0%} slower)"
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the conversion of synthetic .tdms files and track regressions."
+    )
+    parser.add_argument(
+        "--shapes", nargs="+", choices=sorted(SHAPES), default=list(SHAPES)
+    )
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiplier of the size of the synthetic files.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per case, the best is kept."
+    )
+    parser.add_argument(
+        "--output",
+        help="JSON file for the results. Defaults to benchmarks/results/<date>.json.",
+    )
+    parser.add_argument(
+        "--compare", help="JSON file of a previous run to compare against."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative change counted as a regression. Defaults to 0.1.",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Read the source files through a memory map.",
+    )
+    parser.add_argument(
+        "--format-jobs",
+        type=int,
+        nargs="+",
+        default=[DEFAULT_FORMAT_JOBS],
+        help="Numbers of formatter threads to measure, e.g. 0 1 4. Cases with more threads than the default are reported as regressions when they are slower than with the default.",
+    )
+    parser.add_argument("--case", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--case-mmap", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--case-format-jobs",
+        type=int,
+        default=DEFAULT_FORMAT_JOBS,
+        help=argparse.SUPPRESS,
+    )
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(*args.case, args.case_mmap, args.case_format_jobs)))
+        sys.exit(0)
+
+    results = run_suite(
+        args.shapes,
+        args.formats,
+        args.scale,
+        args.repeat,
+        args.mmap,
+        args.format_jobs,
+    )
+
+    output = (
+        Path(args.output)
+        if args.output
+        else RESULTS_DIR / (datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    regressions = scaling_regressions(results, args.threshold)
+    if args.compare:
+        regressions += compare(
+            json.loads(Path(args.compare).read_text()), results, args.threshold
+        )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,145 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# Modules the window should show up without, they are only warmed up in the background.
+HEAVY_MODULES = ("numpy", "nptdms", "pandas", "pyarrow", "h5py", "zstandard")
+
+
+def run_case(module: str) -> Dict[str, Any]:
+    """Import the module of the app, then warm up the conversion modules as the app does once its window is shown. Called in a fresh process per run so that nothing is imported yet.
+
+    Args:
+        module (str): Module to import, e.g. main for the GUI or src.cli for the command line.
+
+    Returns:
+        Dict[str, Any]: Seconds of the import and of the warm up, and the heavy modules loaded by the import.
+    """
+    start = time.perf_counter()
+    try:
+        __import__(module)
+    except ImportError as error:
+        return {"skipped": str(error)}
+    import_seconds = time.perf_counter() - start
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    from src.modules.warmup import warm_up
+
+    start = time.perf_counter()
+    warm_up().join()
+    return {
+        "import_seconds": import_seconds,
+        "heavy_modules": loaded,
+        "warm_up_seconds": time.perf_counter() - start,
+    }
+
+
+def import_profile(module: str, top: int) -> List[Dict[str, Any]]:
+    """Profile the import of a module with python -X importtime.
+
+    Args:
+        module (str): Module to import.
+        top (int): Number of imports to keep.
+
+    Returns:
+        List[Dict[str, Any]]: Slowest imports by cumulative time (including the imports they trigger), with their own and cumulative seconds.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    ).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        imports.append(
+            {
+                "module": name.strip(),
+                "self_seconds": int(self_us) / 1e6,
+                "cumulative_seconds": int(cumulative_us) / 1e6,
+            }
+        )
+    return sorted(imports, key=lambda entry: -entry["cumulative_seconds"])[:top]
+
+
+def run_suite(module: str, repeat: int, top: int) -> Dict[str, Any]:
+    """Measure the startup of the app, each run in its own process. The median of the runs is kept.
+
+    Args:
+        module (str): Module to import.
+        repeat (int): Number of runs.
+        top (int): Number of imports kept in the profile.
+
+    Returns:
+        Dict[str, Any]: Measurements and import profile.
+    """
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, __file__, "--case", module],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output))
+    if "skipped" in runs[0]:
+        return {"module": module, "skipped": runs[0]["skipped"]}
+    return {
+        "module": module,
+        "import_seconds": statistics.median(run["import_seconds"] for run in runs),
+        "warm_up_seconds": statistics.median(run["warm_up_seconds"] for run in runs),
+        "heavy_modules": runs[0]["heavy_modules"],
+        "profile": import_profile(module, top),
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Measure the startup time of the app and profile its imports."
+    )
+    parser.add_argument(
+        "--module",
+        default="main",
+        help="Module to import: main for the GUI (requires PyQt5), src.cli for the command line. Defaults to main.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs, the median is kept."
+    )
+    parser.add_argument(
+        "--top", type=int, default=15, help="Number of imports in the profile."
+    )
+    parser.add_argument("--output", help="JSON file for the results.")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case)))
+        sys.exit(0)
+
+    results = run_suite(args.module, args.repeat, args.top)
+    if "skipped" in results:
+        print(f"{args.module}: skipped ({results['skipped']})")
+    else:
+        print(
+            f"import {args.module}: {results['import_seconds']:.3f} s, "
+            f"heavy modules loaded: {', '.join(results['heavy_modules']) or 'none'}"
+        )
+        print(f"warm up in the background: {results['warm_up_seconds']:.3f} s")
+        for entry in results["profile"]:
+            print(
+                f"  {entry['cumulative_seconds']:8.3f} s {entry['self_seconds']:8.3f} s  {entry['module']}"
+            )
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
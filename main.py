@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from pathlib import Path
 from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtGui import QIcon
@@ -10,6 +11,7 @@ from src.components.ConvertButton.convert_button import ConvertButton
 from src.components.MenuBar.menu_bar import MenuBar
 from src.components.StatusBar.status_bar import StatusBar
 from src.components.ProgressBar.progress_bar import ProgressBar
+from src.modules.warmup import warm_up
 
 
 class Ui_MainWindow(object):
@@ -140,7 +142,7 @@ class Ui_MainWindow(object):
             MenuBar(MainWindow)
             .set_name("menu_bar")
             .set_geometry((0, 0, 300, 20))
-            .pass_down_widget(self.tdms_logo, self.message_box)
+            .pass_down_widget(self.tdms_logo, self.message_box, self.convert_button)
         )
 
         MainWindow.setMenuBar(self.menu_bar)
@@ -149,9 +151,13 @@ class Ui_MainWindow(object):
 
 if __name__ == "__main__":
 
+    # Batch conversions run in a pool of processes, which needs this in a frozen exe.
+    multiprocessing.freeze_support()
     app = QtWidgets.QApplication(sys.argv)
     MainWindow = QtWidgets.QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
     MainWindow.show()
+    # The data stack is imported once the event loop runs, so it never delays the window.
+    QtCore.QTimer.singleShot(0, warm_up)
     sys.exit(app.exec_())
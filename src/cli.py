@@ -0,0 +1,551 @@
+import argparse
+import signal
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .modules.options import (
+    DECIMATION_METHODS,
+    DEFAULT_POLL_INTERVAL,
+    DESTINATION_FORMATS,
+    LAYOUTS,
+    TIME_FORMATS,
+    ConversionOptions,
+)
+from .modules.utils import collect_source_files
+
+# The modules of each mode (batch, follow, inspector, merge, watcher) are imported in the function running that mode, so that a run only loads what it uses.
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the tdms-convert command line tool.
+
+    Returns:
+        argparse.ArgumentParser: Argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="tdms-convert",
+        description="Convert LabVIEW .tdms files to csv, parquet or HDF5 files, one file per group.",
+    )
+    parser.add_argument(
+        "sources",
+        nargs="+",
+        help=".tdms files, directories containing .tdms files or glob patterns.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Destination directory. Defaults to the directory of each source file.",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=sorted(DESTINATION_FORMATS),
+        default="csv",
+        help="Destination file format. Defaults to csv.",
+    )
+    parser.add_argument(
+        "--compression",
+        help="Compression codec, e.g. snappy, zstd, gzip or none for parquet files (defaults to snappy), gzip, lzf or none for h5 files (defaults to none), gzip, zstd, xz or none for csv files (defaults to none, gzip writes .csv.gz files like -f csv.gz), lz4, zstd or none for arrow and arrows files (defaults to none, which readers can memory-map).",
+    )
+    parser.add_argument(
+        "--compression-level", type=int, help="Compression level of the codec."
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=ConversionOptions.row_group_size,
+        help="Number of rows per row group of parquet files.",
+    )
+    parser.add_argument(
+        "--dataset-chunk-rows",
+        type=int,
+        default=ConversionOptions.dataset_chunk_rows,
+        help="Number of values per chunk of the datasets of h5 files.",
+    )
+    parser.add_argument(
+        "--float-precision",
+        type=int,
+        help="Number of significant digits of floats in csv files, several times faster to format. Defaults to the shortest exact representation.",
+    )
+    parser.add_argument(
+        "-g",
+        "--group",
+        dest="groups",
+        action="append",
+        help="Name or glob pattern of a group to convert, e.g. 'Run*'. Can be repeated. Defaults to every group.",
+    )
+    parser.add_argument(
+        "-c",
+        "--channel",
+        dest="channels",
+        action="append",
+        help="Name or glob pattern of a channel to convert, in every selected group. Can be repeated. Defaults to every channel.",
+    )
+    parser.add_argument(
+        "--rows",
+        type=parse_row_range,
+        default=(0, None),
+        help="Range of rows to convert as START..STOP (STOP excluded), either can be left out, e.g. 1000..2000 or ..5000.",
+    )
+    parser.add_argument(
+        "--time",
+        type=parse_range,
+        default=(None, None),
+        help="Time range to convert as START..STOP, in seconds since the start of the waveforms or as ISO 8601 timestamps, e.g. 3600..3660 or 2024-05-01T10:00..2024-05-01T10:01. Requires waveform channels.",
+    )
+    parser.add_argument(
+        "--decimate",
+        choices=DECIMATION_METHODS,
+        help="Downsample the rows while converting: nth keeps every Nth row, mean and rms reduce blocks of N rows to their mean or root mean square, minmax to a <channel>_min and a <channel>_max column. N is set with --factor.",
+    )
+    parser.add_argument(
+        "--factor",
+        type=int,
+        default=10,
+        help="Number of rows reduced to one by --decimate. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--time-column",
+        metavar="SOURCE",
+        help="Add a time column before the channels, computed from the waveform properties (waveform) or taken from a timestamp channel (its name).",
+    )
+    parser.add_argument(
+        "--time-format",
+        choices=TIME_FORMATS,
+        default=ConversionOptions.time_format,
+        help="Format of the time column: iso timestamps, seconds since 1970-01-01 (epoch) or seconds since the start of the waveform or the first timestamp (relative). Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default=ConversionOptions.layout,
+        help="Layout of the converted files: wide (one file per group, shorter channels padded), channels (one file per channel) or long (one channel,index,value row per value). channels and long suit groups whose channels have very different lengths. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="Search directories recursively and allow ** in glob patterns.",
+    )
+    chunk_size = parser.add_mutually_exclusive_group()
+    chunk_size.add_argument(
+        "--chunk-rows", type=int, help="Number of rows read per chunk."
+    )
+    chunk_size.add_argument(
+        "--chunk-bytes", type=int, help="Approximate number of bytes read per chunk."
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Read the source files through a memory map instead of file reads. Faster on local disks.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of files converted in parallel by a pool of processes. 0 uses every CPU. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--group-jobs",
+        type=int,
+        default=1,
+        help="Number of groups of a single file converted in parallel by a pool of processes. 0 uses every CPU. Only used when files are not already converted in parallel, for files of at least 64 MiB. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--format-jobs",
+        type=int,
+        default=ConversionOptions.format_workers,
+        help="Number of threads formatting the chunks of a group while the next chunks are read and the previous ones written. 0 reads, formats and writes each chunk in turn. One thread is what gains: it overlaps reading with formatting and writing. More threads do not scale, as formatting mostly holds the GIL: csv always uses a single formatter (more measured slower), and the binary formats spend little time formatting. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Record the progress of each group in a .checkpoint.json sidecar next to its destination file, and resume from it when a conversion that failed or was interrupted is run again. csv and h5 files resume mid-group, parquet files only skip the groups already converted.",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=ConversionOptions.checkpoint_interval,
+        help="Minimum number of seconds between two checkpoints with --resume. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory of a cache of converted files. Files converted before from the same content with the same options are hardlinked or copied from it instead of being converted again.",
+    )
+    parser.add_argument(
+        "--cache-max-bytes",
+        type=int,
+        default=ConversionOptions.cache_max_bytes,
+        help="Maximum size of the cache, the least recently used files are evicted beyond it. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Follow a single .tdms file that is still being written, like tail -f, appending the rows of new segments to the csv or h5 files as they arrive. Stop with Ctrl+C and run again to carry on.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="Seconds between two polls of the followed file or watched directories. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        help="Stop following once the file has not grown for this many seconds. Defaults to following until interrupted.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Run as a service converting every .tdms file dropped into the source directories, until interrupted. Requires -o. Converted files are moved to a done directory and files that failed to a failed directory.",
+    )
+    parser.add_argument(
+        "--stable-seconds",
+        type=float,
+        default=5.0,
+        help="Seconds a dropped file must stay unchanged before it is converted with --watch. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=100,
+        help="Maximum number of files waiting for a worker with --watch. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="List the watched directories every --poll-interval seconds instead of using inotify, e.g. for network shares.",
+    )
+    parser.add_argument("--done-dir", help="Directory for the converted source files.")
+    parser.add_argument(
+        "--failed-dir", help="Directory for the source files that failed."
+    )
+    parser.add_argument(
+        "--inspect",
+        action="store_true",
+        help="Describe the files instead of converting them: groups, channels, data types, row counts, the estimated size of the conversion with the given options and a rough range for its duration. Only the metadata is read and the result is cached in a .inspect.json sidecar.",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Concatenate the files, in the order of their paths, into one file per group instead of converting each file on its own, e.g. the files of an acquisition split every hour. The groups must have the same channels in every file.",
+    )
+    parser.add_argument(
+        "--merge-name",
+        help="Name of the merged files before the group name. Defaults to the name of the first file followed by _merged.",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only report failures."
+    )
+    return parser
+
+
+def parse_range(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """Parse a START..STOP range argument. The separator is not a colon so that ISO 8601 timestamps can be given.
+
+    Args:
+        text (str): Text of the argument.
+
+    Raises:
+        argparse.ArgumentTypeError: If the text has no separator.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: Start and stop, None when left out.
+    """
+    if ".." not in text:
+        raise argparse.ArgumentTypeError(f"Expected START..STOP, got {text}")
+    start, stop = text.split("..", 1)
+    return start or None, stop or None
+
+
+def parse_row_range(text: str) -> Tuple[int, Optional[int]]:
+    """Parse a START..STOP range of rows.
+
+    Args:
+        text (str): Text of the argument.
+
+    Raises:
+        argparse.ArgumentTypeError: If the text is not a range of row indices.
+
+    Returns:
+        Tuple[int, Optional[int]]: Index of the first row and of the row to stop before, None when left out.
+    """
+    start, stop = parse_range(text)
+    try:
+        return int(start or 0), None if stop is None else int(stop)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected row indices, got {text}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the tdms-convert command line tool.
+
+    Args:
+        argv (Optional[List[str]], optional): Command line arguments. Defaults to None, i.e. sys.argv.
+
+    Returns:
+        int: Exit code. 0 if every file was converted, 1 if any conversion failed and 2 if no .tdms file was found.
+    """
+    args = build_parser().parse_args(argv)
+
+    if args.output is not None and not Path(args.output).is_dir():
+        print(f"Destination path is not valid: {args.output}", file=sys.stderr)
+        return 2
+
+    options = ConversionOptions(
+        chunk_rows=args.chunk_rows,
+        chunk_bytes=args.chunk_bytes,
+        group_workers=args.group_jobs or None,
+        destination_file_format=args.format,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        row_group_size=args.row_group_size,
+        dataset_chunk_rows=args.dataset_chunk_rows,
+        float_precision=args.float_precision,
+        checkpoint=args.resume,
+        checkpoint_interval=args.checkpoint_interval,
+        cache_dir=args.cache_dir,
+        cache_max_bytes=args.cache_max_bytes,
+        groups=args.groups,
+        channels=args.channels,
+        row_start=args.rows[0],
+        row_stop=args.rows[1],
+        time_start=args.time[0],
+        time_stop=args.time[1],
+        decimation=args.decimate,
+        decimation_factor=args.factor,
+        time_column=args.time_column,
+        time_format=args.time_format,
+        layout=args.layout,
+        memory_map=args.mmap,
+        format_workers=args.format_jobs,
+    )
+
+    if args.watch:
+        return watch(args, options)
+
+    source_files = collect_source_files(args.sources, args.recursive)
+    if not source_files:
+        print("No .tdms files found.", file=sys.stderr)
+        return 2
+
+    if args.follow:
+        if len(source_files) != 1:
+            print("--follow takes a single .tdms file.", file=sys.stderr)
+            return 2
+        return follow(source_files[0], args, options)
+
+    if args.inspect:
+        return inspect(source_files, options)
+
+    if args.merge:
+        return merge(source_files, args, options)
+
+    from .modules.batch import FileResult, convert_files
+
+    def report(result: FileResult, done: int, total: int) -> None:
+        if not result.succeeded:
+            print(
+                f"[{done}/{total}] Conversion failed: {result.source_file_path}: {result.error}",
+                file=sys.stderr,
+            )
+        elif not args.quiet:
+            print(
+                f"[{done}/{total}] Converted {result.source_file_path} -> {len(result.destination_files)} file(s)"
+            )
+
+    results = convert_files(
+        source_files, args.output, options, args.jobs or None, on_result=report
+    )
+    failures = sum(not result.succeeded for result in results)
+
+    return 1 if failures else 0
+
+
+def inspect(source_files: List[str], options: ConversionOptions) -> int:
+    """Print what converting the files would produce, with totals over all of them.
+
+    Args:
+        source_files (List[str]): Paths to the source files.
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        int: Exit code. 0 if every file could be inspected, 1 otherwise.
+    """
+    from .modules.inspector import (
+        format_estimated_duration,
+        format_report,
+        format_size,
+        inspect_file,
+    )
+    from .modules.writers import destination_format
+
+    failures = 0
+    estimated_bytes = estimated_seconds = 0
+    for source_file_path in source_files:
+        try:
+            report = inspect_file(source_file_path, options)
+        except Exception as error:
+            print(
+                f"Inspection failed: {source_file_path}: {type(error).__name__}: {error}",
+                file=sys.stderr,
+            )
+            failures += 1
+            continue
+        print(format_report(report))
+        estimated_bytes += report["estimated_bytes"]
+        estimated_seconds += report["estimated_seconds"]
+    if len(source_files) > 1:
+        print(
+            f"Total: ~{format_size(estimated_bytes)} as {destination_format(options)}, "
+            f"{format_estimated_duration(estimated_seconds)} to convert."
+        )
+    return 1 if failures else 0
+
+
+def follow(
+    source_file_path: str, args: argparse.Namespace, options: ConversionOptions
+) -> int:
+    """Follow a growing .tdms file until it stops growing or the user interrupts it.
+
+    Args:
+        source_file_path (str): Path to the source file.
+        args (argparse.Namespace): Parsed command line arguments.
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        int: Exit code. 0 if the file was followed until it stopped or was interrupted, 1 if the conversion failed.
+    """
+    from .modules.follow import follow_file
+
+    destination_dir = args.output or str(Path(source_file_path).parent)
+
+    def report(rows: int) -> None:
+        if not args.quiet:
+            print(f"Appended {rows} rows from {source_file_path}")
+
+    try:
+        destination_files = follow_file(
+            source_file_path,
+            destination_dir,
+            options,
+            args.poll_interval,
+            args.idle_timeout,
+            on_append=report,
+        )
+    except KeyboardInterrupt:
+        if not args.quiet:
+            print(f"Stopped following {source_file_path}, run again to carry on.")
+        return 0
+    except Exception as error:
+        print(
+            f"Conversion failed: {source_file_path}: {type(error).__name__}: {error}",
+            file=sys.stderr,
+        )
+        return 1
+
+    if not args.quiet:
+        print(f"Converted {source_file_path} -> {len(destination_files)} file(s)")
+    return 0
+
+
+def merge(
+    source_files: List[str], args: argparse.Namespace, options: ConversionOptions
+) -> int:
+    """Merge the files into one file per group, warning about the files whose waveforms do not carry on from the previous file.
+
+    Args:
+        source_files (List[str]): Paths to the source files, in the order they are merged.
+        args (argparse.Namespace): Parsed command line arguments.
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        int: Exit code. 0 if the files were merged, 1 if the merge failed.
+    """
+    from .modules.merge import merge_files
+
+    destination_dir = args.output or str(Path(source_files[0]).parent)
+
+    def report_gap(group_name: str, source_file_path: str, gap: float) -> None:
+        kind = "gap" if gap > 0 else "overlap"
+        print(
+            f"Warning: {source_file_path}: {kind} of {abs(gap):g} s in group {group_name} since the previous file",
+            file=sys.stderr,
+        )
+
+    try:
+        destination_files = merge_files(
+            source_files,
+            destination_dir,
+            options,
+            args.merge_name,
+            on_gap=report_gap,
+        )
+    except Exception as error:
+        print(f"Merge failed: {type(error).__name__}: {error}", file=sys.stderr)
+        return 1
+
+    if not args.quiet:
+        print(f"Merged {len(source_files)} file(s) -> {len(destination_files)} file(s)")
+    return 0
+
+
+def watch(args: argparse.Namespace, options: ConversionOptions) -> int:
+    """Watch the source directories and convert the files dropped into them until the user interrupts it.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        int: Exit code. 0 once interrupted or terminated, 2 if the directories or destination are not valid.
+    """
+    if args.output is None:
+        print("--watch requires a destination directory (-o).", file=sys.stderr)
+        return 2
+    invalid = [source for source in args.sources if not Path(source).is_dir()]
+    if invalid:
+        print(f"Not a directory: {', '.join(invalid)}", file=sys.stderr)
+        return 2
+
+    from .modules.batch import FileResult
+    from .modules.watcher import WatchFolder
+
+    def report(result: FileResult) -> None:
+        if not result.succeeded:
+            print(
+                f"Conversion failed: {result.source_file_path}: {result.error}",
+                file=sys.stderr,
+            )
+        elif not args.quiet:
+            print(
+                f"Converted {result.source_file_path} -> {len(result.destination_files)} file(s)"
+            )
+
+    watch_folder = WatchFolder(
+        args.sources,
+        args.output,
+        options,
+        args.jobs or None,
+        args.queue_size,
+        args.stable_seconds,
+        args.poll_interval,
+        args.polling,
+        args.done_dir,
+        args.failed_dir,
+        on_result=report,
+    )
+    # Services are stopped with SIGTERM, which then stops the same way as Ctrl+C.
+    signal.signal(signal.SIGTERM, lambda signum, frame: watch_folder.stop())
+    try:
+        watch_folder.run()
+    except KeyboardInterrupt:
+        if not args.quiet:
+            print("Stopped watching.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
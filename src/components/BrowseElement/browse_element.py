@@ -86,15 +86,16 @@ class BrowseElement(QWidget):
         return self
 
     def handle_browse_event(self) -> None:
-        """Methods for handling a button click of the BrowseElement."""
+        """Methods for handling a button click of the BrowseElement. Several source files can be selected, they are separated by semicolons in the text editor."""
         if self.objectName() == "source_browser":
-            self.source_file_path, _ = QFileDialog.getOpenFileName(
+            source_file_paths, _ = QFileDialog.getOpenFileNames(
                 self,
-                "Open TDMS File",
+                "Open TDMS Files",
                 "",
                 "TDMS Files (*.tdms)",
                 options=QFileDialog.DontUseNativeDialog,
             )
+            self.source_file_path = "; ".join(source_file_paths)
             self.text_box.setText(self.source_file_path)
         else:
             self.destination_directory = QFileDialog.getExistingDirectory(
@@ -3,8 +3,12 @@ from PyQt5.QtWidgets import QPushButton
 from PyQt5.QtCore import QRect, QThread
 from typing import Tuple
 from functools import partial
+from pathlib import Path
 
-from ...modules.utils import assess_paths, Worker
+from ...modules.options import ConversionOptions
+from ...modules.progress import ProgressUpdate
+from ...modules.utils import assess_paths, collect_source_files, split_sources
+from ...modules.worker import BatchWorker, InspectWorker, Worker
 
 
 class ConvertButton(QPushButton):
@@ -24,6 +28,8 @@ class ConvertButton(QPushButton):
         self.message_box = None
         self.progress_bar = None
         self.status_bar = None
+        self.control = None
+        self.inspect_thread = None
 
         self.clicked.connect(self.handle_convert_event)
 
@@ -90,35 +96,169 @@ class ConvertButton(QPushButton):
         ) = widgets
         return self
 
-    def track_progress(self, count: int) -> None:
-        """Method for tracking the progress of the conversion and updating the progress bar.
+    def track_progress(self, update: ProgressUpdate) -> None:
+        """Method for tracking the progress of the conversion and updating the progress bar and the status bar.
 
         Args:
-            count (int): Integer value of the progress.
+            update (ProgressUpdate): Progress of the conversion over all groups.
         """
-        self.progress_bar.setValue(count)
-        self.status_bar.showMessage(f"Converting file... {count}%")
-
-    def track_group(self, group_name: str) -> None:
-        """For keeping a track of the group names in the tdms file during conversion.
-
-        Args:
-            group_name (str): The group name in the tdms file.
-        """
-        self.message_box.setText(f"Converting for group {group_name}...")
+        self.progress_bar.setValue(update.percent)
+        self.status_bar.show_progress(update)
 
     def conversion_finished(self) -> None:
         """Method for handling when the conversion is finished."""
         self.message_box.setText("Conversion successful.")
         self.status_bar.showMessage("Conversion successful.")
-        self.setEnabled(True)
 
     def conversion_failed(self) -> None:
         """Method for handling when the conversion has failed."""
         self.message_box.setText("Conversion failed.")
         self.status_bar.showMessage("Conversion failed.")
+
+    def conversion_cancelled(self) -> None:
+        """Method for handling when the conversion has been cancelled. The files of the groups converted before the cancellation are kept, the unfinished ones have been deleted by then unless they were checkpointed to be resumed."""
+        self.message_box.setText(
+            "Conversion cancelled. Completed groups were kept, unfinished files were removed unless they can be resumed."
+        )
+        self.status_bar.showMessage("Conversion cancelled.")
+
+    def job_started(self) -> None:
+        """Method for handling when a conversion job has started. The button turns into a cancel button while the job runs."""
+        self.control = self.worker.control
+        self.progress_bar.setValue(0)
+        self.setText("Cancel")
+
+    def job_finished(self) -> None:
+        """Method for handling when the thread of a conversion job has finished, whatever the outcome."""
+        self.control = None
+        self.setText("Convert")
         self.setEnabled(True)
 
+    def cancel_job(self) -> None:
+        """Cancel the running conversion job. The job stops after the chunk it is converting."""
+        if self.control is not None:
+            self.control.cancel()
+            self.setEnabled(False)
+            self.message_box.setText("Cancelling conversion...")
+
+    def toggle_pause(self) -> None:
+        """Pause the running conversion job, or resume it if it is paused."""
+        if self.control is None:
+            return
+        if self.control.paused:
+            self.control.resume()
+            self.status_bar.showMessage("Conversion resumed.")
+        else:
+            self.control.pause()
+            self.status_bar.showMessage("Conversion paused.")
+
+    def track_batch(self, done: int, total: int, failed: int) -> None:
+        """Method for tracking the progress of a batch conversion and updating the progress bar.
+
+        Args:
+            done (int): Number of files done.
+            total (int): Total number of files.
+            failed (int): Number of files that failed so far.
+        """
+        self.progress_bar.setValue(int(100 * done / total))
+        self.message_box.setText(f"Converted {done} of {total} files...")
+        self.status_bar.showMessage(
+            f"Converting files... {done}/{total} ({failed} failed)"
+        )
+
+    def batch_finished(self, converted: int, failed_files: list) -> None:
+        """Method for handling when a batch conversion is finished.
+
+        Args:
+            converted (int): Number of files converted successfully.
+            failed_files (list): Paths to the files that failed.
+        """
+        if failed_files:
+            failed_names = ", ".join(Path(file_path).name for file_path in failed_files)
+            self.message_box.setText(
+                f"Converted {converted} files. {len(failed_files)} failed: {failed_names}"
+            )
+            self.status_bar.showMessage("Batch conversion finished with failures.")
+        else:
+            self.message_box.setText(f"Converted {converted} files successfully.")
+            self.status_bar.showMessage("Conversion successful.")
+
+    def inspect_sources(self) -> None:
+        """Describe the source files in the message box without converting them: groups, channels, rows and the estimated output size and conversion time. Only the metadata of the files is read
+        (and cached in a sidecar index), on a thread so that the window stays responsive. The full description of each file is shown as the tooltip of the message box.
+        """
+        if self.inspect_thread is not None:
+            return
+        source_files = collect_source_files(
+            split_sources(self.source_browse_element.get_textbox_text())
+        )
+        if not source_files:
+            self.message_box.setText("Source file is not valid.")
+            return
+
+        self.inspect_thread = QThread()
+        self.inspect_worker = InspectWorker()
+        self.inspect_worker.moveToThread(self.inspect_thread)
+        self.inspect_thread.started.connect(
+            partial(
+                self.inspect_worker.inspect_files, source_files, ConversionOptions()
+            )
+        )
+        self.inspect_worker.inspection_finished.connect(self.inspection_finished)
+        self.inspect_worker.inspection_finished.connect(self.inspect_thread.quit)
+        self.inspect_worker.inspection_finished.connect(self.inspect_worker.deleteLater)
+        self.inspect_worker.inspection_failed.connect(self.inspection_failed)
+        self.inspect_worker.inspection_failed.connect(self.inspect_thread.quit)
+        self.inspect_worker.inspection_failed.connect(self.inspect_worker.deleteLater)
+        self.inspect_thread.finished.connect(self.inspection_thread_finished)
+        self.inspect_thread.finished.connect(self.inspect_thread.deleteLater)
+        self.inspect_thread.start()
+
+        self.status_bar.showMessage("Inspecting files...")
+
+    def inspection_finished(self, reports: list) -> None:
+        """Method for showing the reports of an inspection in the message box.
+
+        Args:
+            reports (list): Reports returned by inspect_file, in the order of the files.
+        """
+        # Imported here as it loads nptdms and numpy, which the window does not need to show up. The worker has loaded them by now.
+        from ...modules.inspector import (
+            format_estimated_duration,
+            format_report,
+            format_size,
+            summarize_report,
+        )
+
+        if len(reports) == 1:
+            self.message_box.setText(
+                f"{Path(reports[0]['file']).name}: {summarize_report(reports[0])}"
+            )
+        else:
+            self.message_box.setText(
+                f"{len(reports)} files. "
+                f"~{format_size(sum(report['estimated_bytes'] for report in reports))} as csv, "
+                f"{format_estimated_duration(sum(report['estimated_seconds'] for report in reports))} to convert."
+            )
+        self.message_box.setToolTip(
+            "\n\n".join(format_report(report) for report in reports)
+        )
+        self.status_bar.showMessage("Inspection done.")
+
+    def inspection_failed(self, error: str) -> None:
+        """Method for showing why an inspection failed.
+
+        Args:
+            error (str): File that could not be inspected and the error.
+        """
+        self.message_box.setText(f"Inspection failed: {error}")
+        self.message_box.setToolTip(error)
+        self.status_bar.showMessage("Inspection failed.")
+
+    def inspection_thread_finished(self) -> None:
+        """Method for handling when the thread of an inspection has finished, whatever the outcome, so that another inspection can run."""
+        self.inspect_thread = None
+
     def run_job(
         self, source_browse_element_text: str, destination_browse_element_text: str
     ) -> None:
@@ -136,23 +276,58 @@ class ConvertButton(QPushButton):
                 self.worker.tdms_convertor,
                 source_browse_element_text,
                 destination_browse_element_text,
+                ConversionOptions(group_workers=None),
             )
         )
+        self.worker.conversion_finished.connect(self.conversion_finished)
         self.worker.conversion_finished.connect(self.thread.quit)
         self.worker.conversion_finished.connect(self.worker.deleteLater)
         self.worker.conversion_failed.connect(self.conversion_failed)
         self.worker.conversion_failed.connect(self.thread.quit)
         self.worker.conversion_failed.connect(self.worker.deleteLater)
+        self.worker.cancel_finished.connect(self.conversion_cancelled)
+        self.worker.cancel_finished.connect(self.thread.quit)
+        self.worker.cancel_finished.connect(self.worker.deleteLater)
+        self.thread.finished.connect(self.job_finished)
         self.thread.finished.connect(self.thread.deleteLater)
         self.worker.conversion_progress.connect(self.track_progress)
-        self.worker.conversion_group.connect(self.track_group)
         self.thread.start()
 
-        self.setEnabled(False)
-        self.thread.finished.connect(self.conversion_finished)
+        self.message_box.setText("Converting groups...")
+        self.job_started()
+
+    def run_batch_job(self, source_files: list, destination_dir: str) -> None:
+        """Running a batch conversion job of several files using a thread object, which converts the files in a pool of processes.
+
+        Args:
+            source_files (list): Paths to the source files.
+            destination_dir (str): The destination directory.
+        """
+        self.thread = QThread()
+        self.worker = BatchWorker()
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(
+            partial(self.worker.convert_batch, source_files, destination_dir)
+        )
+        self.worker.file_converted.connect(self.track_batch)
+        self.worker.batch_finished.connect(self.batch_finished)
+        self.worker.batch_finished.connect(self.thread.quit)
+        self.worker.batch_finished.connect(self.worker.deleteLater)
+        self.worker.cancel_finished.connect(self.conversion_cancelled)
+        self.worker.cancel_finished.connect(self.thread.quit)
+        self.worker.cancel_finished.connect(self.worker.deleteLater)
+        self.thread.finished.connect(self.job_finished)
+        self.thread.finished.connect(self.thread.deleteLater)
+        self.thread.start()
+
+        self.job_started()
 
     def handle_convert_event(self) -> None:
-        """Handling the pressing of the convert button. Initialises a thread to do the conversion."""
+        """Handling the pressing of the convert button. Initialises a thread to do the conversion, several source files are converted as a batch. While a job is running the button cancels it instead."""
+        if self.control is not None:
+            self.cancel_job()
+            return
+
         self.message_box.setText("")
         self.status_bar.showMessage("")
 
@@ -169,4 +344,10 @@ class ConvertButton(QPushButton):
             self.message_box.setText(message_box_text)
 
         else:
-            self.run_job(source_browse_element_text, destination_browse_element_text)
+            source_files = collect_source_files(
+                split_sources(source_browse_element_text)
+            )
+            if len(source_files) == 1:
+                self.run_job(source_files[0], destination_browse_element_text)
+            else:
+                self.run_batch_job(source_files, destination_browse_element_text)
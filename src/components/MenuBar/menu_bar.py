@@ -24,6 +24,10 @@ class MenuBar(QMenuBar):
         self.menu_edit.setObjectName("menu_edit")
         self.menu_edit.setTitle("&Edit")
 
+        self.menu_conversion = QMenu(self)
+        self.menu_conversion.setObjectName("menu_conversion")
+        self.menu_conversion.setTitle("&Conversion")
+
         self.action_close = QAction(*args, **kwargs)
         self.action_close.setObjectName("action_close")
         self.action_close.setText("&Close")
@@ -34,11 +38,30 @@ class MenuBar(QMenuBar):
         self.toggle_theme.setText("&Toggle Theme")
         self.toggle_theme.triggered.connect(self.toggle_theme_event)
 
+        self.action_pause = QAction(*args, **kwargs)
+        self.action_pause.setObjectName("action_pause")
+        self.action_pause.setText("&Pause/Resume")
+        self.action_pause.triggered.connect(self.pause_event)
+
+        self.action_inspect = QAction(*args, **kwargs)
+        self.action_inspect.setObjectName("action_inspect")
+        self.action_inspect.setText("&Inspect")
+        self.action_inspect.triggered.connect(self.inspect_event)
+
+        self.action_cancel = QAction(*args, **kwargs)
+        self.action_cancel.setObjectName("action_cancel")
+        self.action_cancel.setText("C&ancel")
+        self.action_cancel.triggered.connect(self.cancel_event)
+
         self.menu_file.addAction(self.action_close)
         self.menu_edit.addAction(self.toggle_theme)
+        self.menu_conversion.addAction(self.action_inspect)
+        self.menu_conversion.addAction(self.action_pause)
+        self.menu_conversion.addAction(self.action_cancel)
 
         self.addAction(self.menu_file.menuAction())
         self.addAction(self.menu_edit.menuAction())
+        self.addAction(self.menu_conversion.menuAction())
 
     def set_name(self, text: str) -> MenuBar:
         """Method for setting object name.
@@ -83,6 +106,7 @@ class MenuBar(QMenuBar):
         (
             tdms_logo,
             message_box,
+            _,
         ) = self.passed_down_widgets
 
         if self.theme == "classic":
@@ -91,3 +115,18 @@ class MenuBar(QMenuBar):
             self.theme = "classic"
 
         change_theme(self.theme, self.main_window, (tdms_logo, message_box))
+
+    def inspect_event(self) -> None:
+        """Method for handling inspecting of the source files before converting them."""
+        _, _, convert_button = self.passed_down_widgets
+        convert_button.inspect_sources()
+
+    def pause_event(self) -> None:
+        """Method for handling pausing or resuming of the running conversion."""
+        _, _, convert_button = self.passed_down_widgets
+        convert_button.toggle_pause()
+
+    def cancel_event(self) -> None:
+        """Method for handling cancelling of the running conversion."""
+        _, _, convert_button = self.passed_down_widgets
+        convert_button.cancel_job()
@@ -3,6 +3,8 @@ from PyQt5.QtWidgets import QStatusBar
 from PyQt5.QtCore import QRect
 from typing import Tuple
 
+from ...modules.progress import ProgressUpdate, format_duration
+
 
 class StatusBar(QStatusBar):
     def __init__(self, *args, **kwargs):
@@ -36,3 +38,14 @@ class StatusBar(QStatusBar):
         """
         self.setGeometry(QRect(*geometry))
         return self
+
+    def show_progress(self, update: ProgressUpdate) -> None:
+        """Method for showing the progress of a conversion with its throughput and estimated time remaining.
+
+        Args:
+            update (ProgressUpdate): Progress of the conversion.
+        """
+        self.showMessage(
+            f"Converting file... {update.percent}% | "
+            f"{update.bytes_per_second / 1e6:.1f} MB/s | ETA {format_duration(update.eta)}"
+        )
@@ -0,0 +1,128 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from .control import ConversionCancelled, ConversionControl
+from .converter import convert_file, init_worker_process
+from .options import ConversionOptions
+
+
+@dataclass
+class FileResult:
+    """Outcome of the conversion of a single .tdms file in a batch.
+
+    Attributes:
+        source_file_path (str): Path to the source file.
+        destination_files (List[str]): Paths to the converted files.
+        error (Optional[str]): Error message if the conversion failed.
+    """
+
+    source_file_path: str
+    destination_files: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the conversion of the file succeeded."""
+        return self.error is None
+
+
+def convert_file_safely(
+    source_file_path: str,
+    destination_dir: Optional[str],
+    options: Optional[ConversionOptions] = None,
+    control: Optional[ConversionControl] = None,
+) -> FileResult:
+    """Convert a single file and capture any failure in the result instead of raising, so that one bad file does not abort a batch.
+
+    Args:
+        source_file_path (str): Path to the source file.
+        destination_dir (Optional[str]): Destination directory. None writes next to the source file.
+        options (Optional[ConversionOptions], optional): Conversion options. Defaults to None.
+        control (Optional[ConversionControl], optional): Control for cancelling or pausing the conversion. Defaults to None.
+
+    Raises:
+        ConversionCancelled: If the conversion has been cancelled, which does abort the batch.
+
+    Returns:
+        FileResult: Result of the conversion.
+    """
+    destination_dir = destination_dir or str(Path(source_file_path).parent)
+    try:
+        destination_files = convert_file(
+            source_file_path, destination_dir, options, control=control
+        )
+    except ConversionCancelled:
+        raise
+    except Exception as error:
+        return FileResult(source_file_path, error=f"{type(error).__name__}: {error}")
+    return FileResult(source_file_path, destination_files)
+
+
+def convert_files(
+    source_files: List[str],
+    destination_dir: Optional[str],
+    options: Optional[ConversionOptions] = None,
+    max_workers: Optional[int] = None,
+    on_result: Optional[Callable[[FileResult, int, int], None]] = None,
+    control: Optional[ConversionControl] = None,
+) -> List[FileResult]:
+    """Convert many .tdms files in parallel using a pool of processes, one file per process at a time.
+
+    Args:
+        source_files (List[str]): Paths to the source files.
+        destination_dir (Optional[str]): Destination directory. None writes each output next to its source file.
+        options (Optional[ConversionOptions], optional): Conversion options. Defaults to None.
+        max_workers (Optional[int], optional): Number of worker processes. Defaults to None, i.e. the number of CPUs. With one worker the files are converted in the calling process.
+        on_result (Optional[Callable[[FileResult, int, int], None]], optional): Called with each result, the number of files done and the total number of files as soon as a file is done. Defaults to None.
+        control (Optional[ConversionControl], optional): Control for cancelling or pausing the batch, shared with the worker processes. Defaults to None.
+
+    Raises:
+        ConversionCancelled: If the batch has been cancelled. Files not started yet are skipped.
+
+    Returns:
+        List[FileResult]: Results in the order of completion.
+    """
+    results = []
+
+    if max_workers == 1 or len(source_files) <= 1:
+        for source_file in source_files:
+            results.append(
+                convert_file_safely(source_file, destination_dir, options, control)
+            )
+            if on_result is not None:
+                on_result(results[-1], len(results), len(source_files))
+        return results
+
+    # The files are already spread over the processes, so each file's groups are converted one after another.
+    options = replace(options or ConversionOptions(), group_workers=1)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=init_worker_process,
+        initargs=(None, control),
+    ) as executor:
+        futures = {
+            executor.submit(
+                convert_file_safely, source_file, destination_dir, options
+            ): source_file
+            for source_file in source_files
+        }
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except ConversionCancelled:
+                for pending_future in futures:
+                    pending_future.cancel()
+                raise
+            except Exception as error:
+                # The worker process itself died, e.g. it ran out of memory.
+                results.append(
+                    FileResult(
+                        futures[future], error=f"{type(error).__name__}: {error}"
+                    )
+                )
+            if on_result is not None:
+                on_result(results[-1], len(results), len(source_files))
+
+    return results
@@ -0,0 +1,234 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+from .checkpoint import save_json
+from .options import ConversionOptions, output_options
+from .utils import construct_destination_file_path
+from .writers import destination_format
+
+# Bumped whenever the converted files change for the same options, which invalidates every cache entry.
+CACHE_VERSION = 1
+# Bytes hashed at the start of the file (the lead-in and metadata of the first segments), at the end and at each sample in between.
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 64 * 1024
+SAMPLE_BYTES = 4 * 1024
+SAMPLE_COUNT = 16
+
+ENTRY_FILE = "entry.json"
+# Entries are staged in hidden .<key>.<uuid>.tmp directories, left behind by processes that died while storing them.
+STAGING_PREFIX = "."
+STAGING_SUFFIX = ".tmp"
+# Age in seconds after which a staging directory is considered abandoned and deleted.
+STALE_STAGING_SECONDS = 24 * 60 * 60
+
+
+def fingerprint(source_file_path: str, options: ConversionOptions) -> str:
+    """Fingerprint the content of a .tdms file and the options it is converted with. The size and modification time are combined with a hash of the start of the file, where the lead-in and metadata are,
+    of its end and of evenly spaced samples, so the fingerprint takes a few small reads whatever the size of the file.
+
+    Args:
+        source_file_path (str): Path to the source file.
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        str: Hexadecimal fingerprint.
+    """
+    stat = os.stat(source_file_path)
+    digest = hashlib.sha256(
+        json.dumps(
+            [CACHE_VERSION, stat.st_size, stat.st_mtime_ns, output_options(options)],
+            sort_keys=True,
+        ).encode()
+    )
+    offsets = [0, max(0, stat.st_size - TAIL_BYTES)] + [
+        stat.st_size * sample // (SAMPLE_COUNT + 1)
+        for sample in range(1, SAMPLE_COUNT + 1)
+    ]
+    sizes = [HEAD_BYTES, TAIL_BYTES] + [SAMPLE_BYTES] * SAMPLE_COUNT
+    with open(source_file_path, "rb") as source_file:
+        for offset, size in zip(offsets, sizes):
+            source_file.seek(offset)
+            digest.update(source_file.read(size))
+    return digest.hexdigest()
+
+
+def link_or_copy(source_path: str, destination_path: str) -> None:
+    """Hardlink a file, or copy it where hardlinks are not possible (e.g. across file systems). The destination is replaced atomically if it exists.
+
+    Args:
+        source_path (str): Path to the file.
+        destination_path (str): Path to the link or copy.
+    """
+    temporary_path = f"{destination_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(source_path, temporary_path)
+    except OSError:
+        shutil.copy2(source_path, temporary_path)
+    os.replace(temporary_path, destination_path)
+
+
+class ConversionCache:
+    """ConversionCache object for reusing the files converted from the same content with the same options.
+    Each entry is a directory named after the fingerprint, holding the converted files and an entry.json index record (groups, files, sizes and last use).
+    Entries are written to a temporary directory and renamed into place, so that several processes can share the cache without locks. The least recently used entries are evicted once the cache outgrows max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """Constructor for the ConversionCache.
+
+        Args:
+            cache_dir (str): Directory of the cache, created if needed.
+            max_bytes (int): Maximum size of the cached files.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def fetch(
+        self,
+        key: str,
+        source_file_path: str,
+        destination_dir: str,
+        options: ConversionOptions,
+    ) -> Optional[List[str]]:
+        """Put the cached files of an entry in the destination directory, under the names the conversion of the source file would give them. Destination files that already are the cached files are left alone.
+
+        Args:
+            key (str): Fingerprint of the source file and options.
+            source_file_path (str): Path to the source file.
+            destination_dir (str): Destination directory.
+            options (ConversionOptions): Conversion options.
+
+        Returns:
+            Optional[List[str]]: Paths to the converted files, or None if the entry is missing or its files have been modified.
+        """
+        entry = self.load_entry(key)
+        if entry is None:
+            return None
+
+        destination_files = []
+        try:
+            for group_name, file_name, size, mtime_ns in entry["files"]:
+                cached_path = self.cache_dir / key / file_name
+                stat = cached_path.stat()
+                if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                    # Modified in place, e.g. through a hardlink.
+                    self.remove_entry(key)
+                    return None
+                destination_file_path = construct_destination_file_path(
+                    destination_dir,
+                    source_file_path,
+                    destination_format(options),
+                    group_name,
+                )
+                if not (
+                    Path(destination_file_path).exists()
+                    and os.path.samefile(destination_file_path, cached_path)
+                ):
+                    link_or_copy(str(cached_path), destination_file_path)
+                destination_files.append(destination_file_path)
+        except OSError:
+            # Evicted in the meantime.
+            return None
+
+        entry["last_used"] = time.time()
+        save_json(str(self.cache_dir / key / ENTRY_FILE), entry)
+        return destination_files
+
+    def store(
+        self, key: str, group_names: List[str], destination_files: List[str]
+    ) -> None:
+        """Add the converted files of a source file to the cache, then evict the least recently used entries if the cache has grown too big.
+
+        Args:
+            key (str): Fingerprint of the source file and options.
+            group_names (List[str]): Names of the groups, in the order of the files.
+            destination_files (List[str]): Paths to the converted files.
+        """
+        temporary_dir = (
+            self.cache_dir / f"{STAGING_PREFIX}{key}.{uuid.uuid4().hex}{STAGING_SUFFIX}"
+        )
+        temporary_dir.mkdir()
+        files = []
+        for group_name, destination_file_path in zip(group_names, destination_files):
+            file_name = Path(destination_file_path).name
+            link_or_copy(destination_file_path, str(temporary_dir / file_name))
+            stat = (temporary_dir / file_name).stat()
+            files.append([group_name, file_name, stat.st_size, stat.st_mtime_ns])
+        save_json(
+            str(temporary_dir / ENTRY_FILE),
+            {"files": files, "last_used": time.time()},
+        )
+
+        try:
+            os.rename(temporary_dir, self.cache_dir / key)
+        except OSError:
+            # Stored by another process in the meantime.
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+        self.evict()
+
+    def load_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read the index record of an entry.
+
+        Args:
+            key (str): Fingerprint of the entry.
+
+        Returns:
+            Optional[Dict[str, Any]]: Index record, or None if there is no such entry.
+        """
+        try:
+            with open(self.cache_dir / key / ENTRY_FILE) as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+    def remove_entry(self, key: str) -> None:
+        """Delete an entry.
+
+        Args:
+            key (str): Fingerprint of the entry.
+        """
+        shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cached files fit in max_bytes. Staging directories are not entries and are left alone, unless they are older than STALE_STAGING_SECONDS
+        and so were abandoned by a process that died while storing an entry.
+        """
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.name.startswith(STAGING_PREFIX):
+                self.remove_stale_staging(entry_dir)
+                continue
+            entry = self.load_entry(entry_dir.name)
+            if entry is not None:
+                size = sum(file[2] for file in entry["files"])
+                entries.append((entry["last_used"], size, entry_dir.name))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            self.remove_entry(key)
+            total_bytes -= size
+
+    def remove_stale_staging(self, staging_dir: Path) -> None:
+        """Delete a staging directory that has not been modified for STALE_STAGING_SECONDS. Younger ones may be in use by another process storing an entry.
+
+        Args:
+            staging_dir (Path): Hidden directory of the cache.
+        """
+        if not staging_dir.name.endswith(STAGING_SUFFIX):
+            return
+        try:
+            age = time.time() - staging_dir.stat().st_mtime
+        except OSError:
+            # Renamed into place or removed in the meantime.
+            return
+        if age > STALE_STAGING_SECONDS:
+            shutil.rmtree(staging_dir, ignore_errors=True)
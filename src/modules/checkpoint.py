@@ -0,0 +1,100 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+import json
+import os
+
+from .options import ConversionOptions, output_options
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+
+def save_json(file_path: str, data: Dict[str, Any]) -> None:
+    """Write a JSON file atomically, through a temporary file that replaces it, so that a crash never leaves it half written.
+
+    Args:
+        file_path (str): Path to the JSON file.
+        data (Dict[str, Any]): Content of the file.
+    """
+    temporary_path = file_path + ".tmp"
+    with open(temporary_path, "w") as json_file:
+        json.dump(data, json_file)
+    os.replace(temporary_path, file_path)
+
+
+def source_signature(source_file_path: str) -> Dict[str, Any]:
+    """Identify the version of a source file by its path, size and modification time, so that a checkpoint is not resumed against a different file.
+
+    Args:
+        source_file_path (str): Path to the source file.
+
+    Returns:
+        Dict[str, Any]: Signature of the source file.
+    """
+    stat = Path(source_file_path).stat()
+    return {
+        "path": str(Path(source_file_path).resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+class Checkpoint:
+    """Checkpoint object for the sidecar file recording how far the conversion of a group has been committed to its destination file.
+    The sidecar sits next to the destination file and holds the number of rows committed and the byte offset of the destination file at that point.
+    """
+
+    def __init__(
+        self,
+        destination_file_path: str,
+        source_file_path: str,
+        options: ConversionOptions,
+    ):
+        """Constructor for the Checkpoint.
+
+        Args:
+            destination_file_path (str): Path to the destination file of the group.
+            source_file_path (str): Path to the source file.
+            options (ConversionOptions): Conversion options. A checkpoint is only resumed with the same options affecting the output.
+        """
+        self.destination_file_path = destination_file_path
+        self.path = destination_file_path + CHECKPOINT_SUFFIX
+        self.identity = {
+            "source": source_signature(source_file_path),
+            "options": output_options(options),
+        }
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Load the committed state if it can be resumed, i.e. the sidecar belongs to the same source file and options and the destination file still holds the committed bytes.
+
+        Returns:
+            Optional[Dict[str, Any]]: The state with the keys rows, offset and complete, or None to start from scratch.
+        """
+        try:
+            with open(self.path) as checkpoint_file:
+                state = json.load(checkpoint_file)
+            destination_size = Path(self.destination_file_path).stat().st_size
+        except (OSError, ValueError):
+            return None
+
+        if {key: state.get(key) for key in self.identity} != self.identity:
+            return None
+        if destination_size < state["offset"]:
+            return None
+        return {key: state[key] for key in ("rows", "offset", "complete")}
+
+    def save(self, rows: int, offset: int, complete: bool = False) -> None:
+        """Record the committed state. The sidecar is replaced atomically.
+
+        Args:
+            rows (int): Number of rows of the group committed to the destination file.
+            offset (int): Size in bytes of the destination file holding those rows.
+            complete (bool, optional): Whether the whole group has been converted. Defaults to False.
+        """
+        save_json(
+            self.path,
+            {**self.identity, "rows": rows, "offset": offset, "complete": complete},
+        )
+
+    def remove(self) -> None:
+        """Delete the sidecar, once the whole file has been converted."""
+        Path(self.path).unlink(missing_ok=True)
@@ -0,0 +1,50 @@
+import multiprocessing
+
+
+class ConversionCancelled(Exception):
+    """Raised inside a conversion when it has been cancelled."""
+
+
+class ConversionControl:
+    """ConversionControl object for cancelling, pausing and resuming a running conversion. It is checked between chunks, also by worker processes, since it is made of multiprocessing events.
+    To reach worker processes it must be passed when they are created (e.g. through a pool initializer), not as a task argument.
+    """
+
+    def __init__(self):
+        """Constructor for the ConversionControl. A new control is running, i.e. neither paused nor cancelled."""
+        self.cancel_event = multiprocessing.Event()
+        self.run_event = multiprocessing.Event()
+        self.run_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the conversion has been cancelled."""
+        return self.cancel_event.is_set()
+
+    @property
+    def paused(self) -> bool:
+        """Whether the conversion is paused."""
+        return not self.run_event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the conversion. A paused conversion is woken up so that it can stop."""
+        self.cancel_event.set()
+        self.run_event.set()
+
+    def pause(self) -> None:
+        """Pause the conversion at the next check."""
+        self.run_event.clear()
+
+    def resume(self) -> None:
+        """Resume a paused conversion."""
+        self.run_event.set()
+
+    def check(self) -> None:
+        """Block while the conversion is paused and stop it if it has been cancelled.
+
+        Raises:
+            ConversionCancelled: If the conversion has been cancelled.
+        """
+        self.run_event.wait()
+        if self.cancel_event.is_set():
+            raise ConversionCancelled()
@@ -0,0 +1,367 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import multiprocessing
+import queue
+import time
+import numpy as np
+
+from .cache import ConversionCache, fingerprint
+from .checkpoint import Checkpoint
+from .control import ConversionCancelled, ConversionControl
+from .options import ConversionOptions
+from .pipeline import ChunkPipeline
+from .progress import ProgressTracker, ProgressUpdate
+from .reader import (
+    chunk_byte_count,
+    chunk_row_count,
+    group_byte_count,
+    group_length,
+    group_metadata,
+    iter_group_chunks,
+    open_tdms,
+)
+from .selection import output_name, select_group, select_groups
+from .transforms import (
+    check_long_layout,
+    open_decimator,
+    open_long_layout,
+    open_time_column,
+)
+from .utils import construct_destination_file_path
+from .writers import destination_format, format_worker_count, open_writer, writer_class
+
+# Files holding fewer bytes of channel data have their groups converted in turn by the calling process: starting a pool of processes and importing nptdms and numpy in each takes longer than converting that much data.
+PARALLEL_GROUPS_MIN_BYTES = 64 * 1024**2
+
+# Set in worker processes by init_worker_process: the queue for reporting the rows and bytes converted to the parent process and the control of the conversion.
+_progress_queue = None
+_control = None
+
+
+def init_worker_process(
+    progress_queue: Optional[multiprocessing.Queue],
+    control: Optional[ConversionControl],
+) -> None:
+    """Initialiser of the worker processes. Keeps a reference to the queue and control shared with the parent process, which can only be passed when the process is created.
+
+    Args:
+        progress_queue (Optional[multiprocessing.Queue]): Queue for reporting progress.
+        control (Optional[ConversionControl]): Control for cancelling or pausing the conversion.
+    """
+    global _progress_queue, _control
+    _progress_queue = progress_queue
+    _control = control
+
+
+def convert_group(
+    source_file_path: str,
+    group_name: str,
+    destination_dir: str,
+    options: ConversionOptions,
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+    control: Optional[ConversionControl] = None,
+    channel_name: Optional[str] = None,
+) -> str:
+    """Convert a single group of a .tdms file to a file in the destination format, restricted to the channels and rows selected in the options. The file is opened with its own handle so that groups can be converted concurrently.
+    The chunks are read, formatted and written by a ChunkPipeline, so reading the next chunks overlaps formatting and writing the current ones. The control is checked between chunks. If the conversion is cancelled the partially written file is deleted, unless options.checkpoint is set and the writer is resumable.
+    With options.checkpoint the rows committed to the destination file are recorded in a sidecar every options.checkpoint_interval seconds, and a conversion
+    finding a valid sidecar resumes after those rows (or skips the group if it was completed). Writers that are not resumable only record completed groups.
+
+    Args:
+        source_file_path (str): Path to the source file.
+        group_name (str): Name of the group to convert.
+        destination_dir (str): Destination directory.
+        options (ConversionOptions): Conversion options.
+        on_chunk (Optional[Callable[[int, int], None]], optional): Called with the number of rows and bytes written after each chunk. Defaults to None, which reports to the parent process when running in a worker process.
+        control (Optional[ConversionControl], optional): Control for cancelling or pausing the conversion. Defaults to None, which uses the control of the parent process when running in a worker process.
+        channel_name (Optional[str], optional): Only convert this channel of the group, to a file of its own (channels layout). Defaults to None.
+
+    Raises:
+        ConversionCancelled: If the conversion has been cancelled.
+
+    Returns:
+        str: Path to the converted file.
+    """
+    control = control or _control
+    if on_chunk is None and _progress_queue is not None:
+
+        def on_chunk(rows: int, nbytes: int) -> None:
+            _progress_queue.put((rows, nbytes))
+
+    destination_file_path = construct_destination_file_path(
+        destination_dir,
+        source_file_path,
+        destination_format(options),
+        output_name(group_name, channel_name),
+    )
+
+    resumable = writer_class(options).resumable
+    decimator = open_decimator(options)
+    checkpoint = (
+        Checkpoint(destination_file_path, source_file_path, options)
+        if options.checkpoint
+        else None
+    )
+    resume = checkpoint.load() if checkpoint is not None else None
+    if resume is not None and not (resume["complete"] or resumable):
+        resume = None
+
+    with open_tdms(source_file_path, options.memory_map) as tdms_file:
+        group = select_group(tdms_file[group_name], options, channel_name)
+        rows_per_chunk = chunk_row_count(group, options.chunk_rows, options.chunk_bytes)
+        columns = {channel.name: channel.dtype for channel in group.channels()}
+        metadata = group_metadata(tdms_file, group)
+        writer_resume = resume
+        if decimator is not None:
+            rows_per_chunk = decimator.aligned_chunk_rows(rows_per_chunk)
+            columns = decimator.columns(columns)
+            metadata = decimator.metadata(metadata)
+            if resume is not None:
+                writer_resume = {**resume, "rows": resume["rows"] // decimator.factor}
+        time_column = open_time_column(group, options, decimator)
+        if time_column is not None:
+            columns = time_column.columns(columns)
+        layout = open_long_layout(group, columns, options, decimator)
+        if layout is not None:
+            columns = layout.columns()
+            if writer_resume is not None:
+                writer_resume = {
+                    **writer_resume,
+                    "rows": layout.offset(writer_resume["rows"]),
+                }
+        first_row = resume["rows"] if resume is not None else 0
+        if first_row and on_chunk is not None:
+            on_chunk(first_row, group_byte_count(group, first_row))
+        if resume is not None and resume["complete"]:
+            return destination_file_path
+
+        try:
+            with open_writer(
+                destination_file_path, columns, metadata, options, writer_resume
+            ) as writer:
+
+                def format_chunk(start: int, data: Dict[str, np.ndarray]) -> Any:
+                    if decimator is not None:
+                        start, data = decimator.decimate(start, data)
+                    if time_column is not None:
+                        start, data = time_column.add(start, data)
+                    if layout is not None:
+                        start, data = layout.reshape(start, data)
+                    return writer.format_chunk(start, data)
+
+                last_checkpoint = time.monotonic()
+                with ChunkPipeline(
+                    iter_group_chunks(group, rows_per_chunk, first_row),
+                    format_chunk,
+                    format_worker_count(options),
+                ) as pipeline:
+                    for start, data, formatted in pipeline:
+                        if control is not None:
+                            try:
+                                control.check()
+                            except ConversionCancelled:
+                                if checkpoint is not None and resumable:
+                                    checkpoint.save(start, writer.commit())
+                                raise
+                        if (
+                            checkpoint is not None
+                            and resumable
+                            and time.monotonic() - last_checkpoint
+                            >= options.checkpoint_interval
+                        ):
+                            checkpoint.save(start, writer.commit())
+                            last_checkpoint = time.monotonic()
+                        writer.write_formatted(formatted)
+                        if on_chunk is not None:
+                            on_chunk(
+                                max(
+                                    (len(values) for values in data.values()),
+                                    default=0,
+                                ),
+                                chunk_byte_count(data),
+                            )
+        except ConversionCancelled:
+            if checkpoint is None or not resumable:
+                Path(destination_file_path).unlink()
+            raise
+
+        if checkpoint is not None:
+            checkpoint.save(
+                group_length(group),
+                Path(destination_file_path).stat().st_size,
+                complete=True,
+            )
+
+    return destination_file_path
+
+
+def convert_file(
+    source_file_path: str,
+    destination_dir: str,
+    options: Optional[ConversionOptions] = None,
+    on_progress: Optional[Callable[[ProgressUpdate], None]] = None,
+    control: Optional[ConversionControl] = None,
+) -> List[str]:
+    """Convert a .tdms file to one file per group (or per channel with the channels layout), for the groups selected in the options. This is the Qt-free conversion core, the groups are converted concurrently by a pool of processes when options.group_workers allows it,
+    the file has several groups and holds at least PARALLEL_GROUPS_MIN_BYTES of data. The pool has no more processes than groups.
+    With options.checkpoint the sidecars of the groups are deleted once the whole file has been converted. With options.cache_dir the converted files are taken from the cache when the same content was converted with the same options before, and added to it otherwise.
+
+    Args:
+        source_file_path (str): Path to the source file.
+        destination_dir (str): Destination directory.
+        options (Optional[ConversionOptions], optional): Conversion options. Defaults to None.
+        on_progress (Optional[Callable[[ProgressUpdate], None]], optional): Called with the progress over all groups, at a limited rate. The totals are computed up front from the metadata. Defaults to None.
+        control (Optional[ConversionControl], optional): Control for cancelling or pausing the conversion. Defaults to None, which uses the control of the parent process when running in a worker process.
+
+    Raises:
+        ConversionCancelled: If the conversion has been cancelled. Groups already converted are kept, the partially written ones are deleted unless they can be resumed.
+
+    Returns:
+        List[str]: Paths to the converted files.
+    """
+    options = options or ConversionOptions()
+    control = control or _control
+
+    cache = None
+    if options.cache_dir is not None:
+        cache = ConversionCache(options.cache_dir, options.cache_max_bytes)
+        cache_key = fingerprint(source_file_path, options)
+        destination_files = cache.fetch(
+            cache_key, source_file_path, destination_dir, options
+        )
+        if destination_files is not None:
+            if on_progress is not None:
+                ProgressTracker(0, 0, on_progress).finish()
+            return destination_files
+
+    with open_tdms(source_file_path, options.memory_map) as tdms_file:
+        groups = select_groups(tdms_file, options)
+        check_long_layout(groups, options)
+        # The part of the file converted to each destination file: a group, or a channel of a group with the channels layout.
+        parts = [
+            (
+                group.name,
+                group.channels()[0].name if options.layout == "channels" else None,
+            )
+            for group in groups
+        ]
+        output_names = [group.output_name for group in groups]
+        total_bytes = sum(group_byte_count(group) for group in groups)
+        progress = ProgressTracker(
+            sum(group_length(group) for group in groups), total_bytes, on_progress
+        )
+
+    if (
+        options.group_workers == 1
+        or len(parts) <= 1
+        or total_bytes < PARALLEL_GROUPS_MIN_BYTES
+    ):
+        destination_files = [
+            convert_group(
+                source_file_path,
+                group_name,
+                destination_dir,
+                options,
+                progress.advance,
+                control,
+                channel_name,
+            )
+            for group_name, channel_name in parts
+        ]
+    else:
+        destination_files = _convert_groups_in_parallel(
+            source_file_path,
+            parts,
+            destination_dir,
+            options,
+            progress.advance,
+            control,
+        )
+
+    if options.checkpoint:
+        for destination_file_path in destination_files:
+            Checkpoint(destination_file_path, source_file_path, options).remove()
+    if cache is not None:
+        cache.store(cache_key, output_names, destination_files)
+
+    progress.finish()
+    return destination_files
+
+
+def _convert_groups_in_parallel(
+    source_file_path: str,
+    parts: List[Tuple[str, Optional[str]]],
+    destination_dir: str,
+    options: ConversionOptions,
+    track_chunk: Callable[[int, int], None],
+    control: Optional[ConversionControl],
+) -> List[str]:
+    """Convert the groups of a file in a pool of processes, relaying the progress reported by the workers to track_chunk.
+
+    Args:
+        source_file_path (str): Path to the source file.
+        parts (List[Tuple[str, Optional[str]]]): Names of the groups to convert, with the name of the channel to convert alone or None for the whole group.
+        destination_dir (str): Destination directory.
+        options (ConversionOptions): Conversion options.
+        track_chunk (Callable[[int, int], None]): Called with the number of rows and bytes written by any of the workers.
+        control (Optional[ConversionControl]): Control for cancelling or pausing the conversion, shared with the workers.
+
+    Raises:
+        ConversionCancelled: If the conversion has been cancelled.
+
+    Returns:
+        List[str]: Paths to the converted files, in the order of the groups.
+    """
+    progress_queue = multiprocessing.Queue()
+    max_workers = min(options.group_workers or multiprocessing.cpu_count(), len(parts))
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=init_worker_process,
+        initargs=(progress_queue, control),
+    ) as executor:
+        futures = {
+            executor.submit(
+                convert_group,
+                source_file_path,
+                group_name,
+                destination_dir,
+                options,
+                channel_name=channel_name,
+            ): (group_name, channel_name)
+            for group_name, channel_name in parts
+        }
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            _drain_progress(progress_queue, track_chunk)
+            if control is not None and control.cancelled:
+                # Groups not started yet are dropped, the running ones stop at their next chunk.
+                for future in pending:
+                    future.cancel()
+        _drain_progress(progress_queue, track_chunk)
+
+        if control is not None and control.cancelled:
+            raise ConversionCancelled()
+
+        # Raises the first failure, if any.
+        destination_files = {futures[future]: future.result() for future in futures}
+
+    return [destination_files[part] for part in parts]
+
+
+def _drain_progress(
+    progress_queue: multiprocessing.Queue, track_chunk: Callable[[int, int], None]
+) -> None:
+    """Pass on all the progress currently waiting in the queue.
+
+    Args:
+        progress_queue (multiprocessing.Queue): Queue the workers report to.
+        track_chunk (Callable[[int, int], None]): Called with the number of rows and bytes of each report.
+    """
+    while True:
+        try:
+            track_chunk(*progress_queue.get_nowait())
+        except queue.Empty:
+            return
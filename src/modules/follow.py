@@ -0,0 +1,412 @@
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import os
+import struct
+import time
+
+from .checkpoint import save_json
+from .control import ConversionControl
+from .incremental_reader import IncrementalTdmsFile
+from .mmap_reader import UnsupportedLayout
+from .options import DEFAULT_POLL_INTERVAL, ConversionOptions, output_options
+from .reader import (
+    chunk_row_count,
+    group_length,
+    group_metadata,
+    iter_group_chunks,
+    open_tdms,
+)
+from .selection import GroupSelection, select_groups
+from .transforms import (
+    check_long_layout,
+    open_decimator,
+    open_long_layout,
+    open_time_column,
+)
+from .utils import construct_destination_file_path
+from .writers import destination_format, open_writer, writer_class
+
+# Layout of the lead-in that starts every TDMS segment.
+LEAD_IN_SIZE = 28
+SEGMENT_TAG = b"TDSm"
+TOC_BIG_ENDIAN = 1 << 6
+# Next segment offset of a segment that is still being written.
+INCOMPLETE_SEGMENT = 0xFFFFFFFFFFFFFFFF
+
+FOLLOW_SUFFIX = ".follow.json"
+
+
+def complete_segments_end(file_path: str, offset: int = 0) -> int:
+    """Find where the complete segments of a .tdms file end by hopping from lead-in to lead-in, so that only 28 bytes per segment are read.
+    A segment is complete once its lead-in points to the next segment and the file is long enough to hold it.
+
+    Args:
+        file_path (str): Path to the .tdms file.
+        offset (int, optional): Offset of a segment to start scanning from, e.g. the end returned by a previous scan. Defaults to 0.
+
+    Raises:
+        ValueError: If there is no TDMS segment at a segment offset.
+
+    Returns:
+        int: Offset of the end of the last complete segment, i.e. of the first segment that is incomplete or not written yet.
+    """
+    with open(file_path, "rb") as tdms_file:
+        size = os.fstat(tdms_file.fileno()).st_size
+        while offset + LEAD_IN_SIZE <= size:
+            tdms_file.seek(offset)
+            lead_in = tdms_file.read(LEAD_IN_SIZE)
+            if lead_in[:4] != SEGMENT_TAG:
+                raise ValueError(f"No TDMS segment at offset {offset} of {file_path}")
+            (toc_mask,) = struct.unpack("<I", lead_in[4:8])
+            byte_order = ">" if toc_mask & TOC_BIG_ENDIAN else "<"
+            (next_segment_offset,) = struct.unpack(byte_order + "Q", lead_in[12:20])
+            end = offset + LEAD_IN_SIZE + next_segment_offset
+            if next_segment_offset == INCOMPLETE_SEGMENT or end > size:
+                break
+            offset = end
+    return offset
+
+
+def follow_file(
+    source_file_path: str,
+    destination_dir: str,
+    options: Optional[ConversionOptions] = None,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    idle_timeout: Optional[float] = None,
+    on_append: Optional[Callable[[int], None]] = None,
+    control: Optional[ConversionControl] = None,
+) -> List[str]:
+    """Convert a .tdms file that is still being written, like tail -f. The file is polled for new complete segments and only the rows they add are appended to the destination files, which are committed to disk after every poll.
+    Rows are appended once every channel of their group holds them, so that rows are never written with cells missing. The offset of the segments processed and the rows and bytes committed per group are recorded in a
+    <source file>.follow.json sidecar in the destination directory, so that following the same file again (e.g. after a crash or a cancellation) carries on from there.
+    The file is read with an IncrementalTdmsFile kept open across polls, so each poll only parses the metadata of the new segments and reads the new rows. Its state is kept in the sidecar too. Files it cannot read
+    (DAQmx data, scaled channels) are opened again with open_tdms on every poll instead.
+
+    Args:
+        source_file_path (str): Path to the source file.
+        destination_dir (str): Destination directory.
+        options (Optional[ConversionOptions], optional): Conversion options. The destination file format must be resumable. Defaults to None.
+        poll_interval (float, optional): Seconds between two polls of the source file. Defaults to DEFAULT_POLL_INTERVAL.
+        idle_timeout (Optional[float], optional): Seconds without new segments after which the acquisition is considered finished: the remaining rows are written, the files closed and the sidecar deleted. Defaults to None, i.e. follow until cancelled.
+        on_append (Optional[Callable[[int], None]], optional): Called with the number of rows appended, over all groups, after each poll that found new data. Defaults to None.
+        control (Optional[ConversionControl], optional): Control for cancelling or pausing the conversion. Defaults to None.
+
+    Raises:
+        ValueError: If the destination file format cannot be appended to.
+        ConversionCancelled: If the conversion has been cancelled. The files hold the rows committed so far.
+
+    Returns:
+        List[str]: Paths to the converted files.
+    """
+    options = options or ConversionOptions()
+    if not writer_class(options).resumable:
+        raise ValueError(
+            f"Files cannot be followed when converting to {destination_format(options)}"
+        )
+
+    state_path = str(
+        Path(destination_dir) / (Path(source_file_path).name + FOLLOW_SUFFIX)
+    )
+    state = _load_state(state_path, source_file_path, destination_dir, options)
+    writers = {}
+    reader = None
+    last_growth = time.monotonic()
+
+    try:
+        if state["segments_end"] == 0 or state.get("reader") is not None:
+            reader = IncrementalTdmsFile(source_file_path, state.get("reader"))
+        while True:
+            if control is not None:
+                control.check()
+            segments_end = complete_segments_end(
+                source_file_path, state["segments_end"]
+            )
+            if segments_end > state["segments_end"]:
+                reader = _read_new_segments(reader, segments_end)
+                appended = _append_new_rows(
+                    source_file_path, reader, destination_dir, options, state, writers
+                )
+                state["segments_end"] = segments_end
+                state["reader"] = reader.state() if reader is not None else None
+                save_json(state_path, state)
+                last_growth = time.monotonic()
+                if appended and on_append is not None:
+                    on_append(appended)
+            elif (
+                idle_timeout is not None
+                and time.monotonic() - last_growth >= idle_timeout
+            ):
+                break
+            time.sleep(poll_interval)
+
+        reader = _read_new_segments(
+            reader, Path(source_file_path).stat().st_size, final=True
+        )
+        appended = _append_new_rows(
+            source_file_path,
+            reader,
+            destination_dir,
+            options,
+            state,
+            writers,
+            final=True,
+        )
+        if appended and on_append is not None:
+            on_append(appended)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        if reader is not None:
+            reader.close()
+
+    Path(state_path).unlink(missing_ok=True)
+    return [
+        construct_destination_file_path(
+            destination_dir,
+            source_file_path,
+            destination_format(options),
+            group_name,
+        )
+        for group_name in state["groups"]
+    ]
+
+
+def _load_state(
+    state_path: str,
+    source_file_path: str,
+    destination_dir: str,
+    options: ConversionOptions,
+) -> Dict[str, Any]:
+    """Load the sidecar of a file that was followed before, if it belongs to the same file and options and the source and destination files still hold what it recorded.
+
+    Args:
+        state_path (str): Path to the sidecar.
+        source_file_path (str): Path to the source file.
+        destination_dir (str): Destination directory.
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        Dict[str, Any]: State of the sidecar, or the state of a file not followed yet.
+    """
+    identity = {
+        "source": str(Path(source_file_path).resolve()),
+        "options": output_options(options),
+    }
+    new_state = {**identity, "segments_end": 0, "groups": {}, "reader": None}
+    try:
+        with open(state_path) as state_file:
+            state = json.load(state_file)
+        source_size = Path(source_file_path).stat().st_size
+        destination_sizes = {
+            group_name: Path(
+                construct_destination_file_path(
+                    destination_dir,
+                    source_file_path,
+                    destination_format(options),
+                    group_name,
+                )
+            )
+            .stat()
+            .st_size
+            for group_name in state.get("groups", {})
+        }
+    except (OSError, ValueError):
+        return new_state
+
+    if {key: state.get(key) for key in identity} != identity:
+        return new_state
+    if source_size < state["segments_end"] or any(
+        destination_sizes[group_name] < group_state["offset"]
+        for group_name, group_state in state["groups"].items()
+    ):
+        return new_state
+    return state
+
+
+def _read_new_segments(
+    reader: Optional[IncrementalTdmsFile], end: int, final: bool = False
+) -> Optional[IncrementalTdmsFile]:
+    """Parse the new segments of the followed file with its incremental reader. A file the reader cannot read is left to open_tdms from then on.
+
+    Args:
+        reader (Optional[IncrementalTdmsFile]): Incremental reader of the file, None once it has been given up on.
+        end (int): Offset the new segments end before.
+        final (bool, optional): Whether to also read the values of a last segment cut short, once the file is complete. Defaults to False.
+
+    Returns:
+        Optional[IncrementalTdmsFile]: The reader, or None if it has been given up on.
+    """
+    if reader is None:
+        return None
+    try:
+        reader.advance(end, incomplete=final)
+    except UnsupportedLayout:
+        reader.close()
+        return None
+    return reader
+
+
+def _append_new_rows(
+    source_file_path: str,
+    reader: Optional[IncrementalTdmsFile],
+    destination_dir: str,
+    options: ConversionOptions,
+    state: Dict[str, Any],
+    writers: Dict[str, Any],
+    final: bool = False,
+) -> int:
+    """Append the rows added to each group since the last poll and commit them, updating the state of the groups. Writers are opened for new groups, or resumed from the state, and kept open in writers.
+    Only the channels a destination file was opened with are converted, as channels that appear later have no column in it.
+
+    Args:
+        source_file_path (str): Path to the source file.
+        reader (Optional[IncrementalTdmsFile]): Incremental reader of the file, up to date with its segments. Defaults to opening the file with open_tdms if None.
+        destination_dir (str): Destination directory.
+        options (ConversionOptions): Conversion options.
+        state (Dict[str, Any]): State of the followed file.
+        writers (Dict[str, Any]): Open writers keyed by group name.
+        final (bool, optional): Whether to also append the rows not held by every channel, once the file is complete. Defaults to False.
+
+    Returns:
+        int: Number of rows appended over all groups.
+    """
+    appended = 0
+    decimator = open_decimator(options)
+    with (
+        nullcontext(reader)
+        if reader is not None
+        else open_tdms(source_file_path, options.memory_map)
+    ) as tdms_file:
+        groups = [
+            _written_channels(group, state["groups"].get(group.output_name))
+            for group in select_groups(tdms_file, options)
+        ]
+        check_long_layout(groups, options)
+        for group in groups:
+            group_state = state["groups"].get(group.output_name)
+            first_row = group_state["rows"] if group_state is not None else 0
+            stop_row = (
+                group_length(group)
+                if final
+                else min((len(channel) for channel in group.channels()), default=0)
+            )
+            if decimator is not None and not final:
+                # Blocks are only decimated once complete.
+                stop_row = stop_row // decimator.factor * decimator.factor
+            if stop_row <= first_row:
+                continue
+
+            time_column = open_time_column(group, options, decimator)
+            columns = {channel.name: channel.dtype for channel in group.channels()}
+            if decimator is not None:
+                columns = decimator.columns(columns)
+            if time_column is not None:
+                columns = time_column.columns(columns)
+            # Rebuilt on every poll, as the offsets of its rows follow the lengths of the channels.
+            layout = open_long_layout(group, columns, options, decimator)
+            if group.output_name not in writers:
+                metadata = group_metadata(tdms_file, group)
+                writer_resume = group_state
+                if decimator is not None:
+                    metadata = decimator.metadata(metadata)
+                    if group_state is not None:
+                        writer_resume = {
+                            **group_state,
+                            "rows": group_state["rows"] // decimator.factor,
+                        }
+                if layout is not None:
+                    if writer_resume is not None:
+                        writer_resume = {
+                            **writer_resume,
+                            "rows": layout.offset(writer_resume["rows"]),
+                        }
+                    columns = layout.columns()
+                writers[group.output_name] = open_writer(
+                    construct_destination_file_path(
+                        destination_dir,
+                        source_file_path,
+                        destination_format(options),
+                        group.output_name,
+                    ),
+                    columns,
+                    metadata,
+                    options,
+                    writer_resume,
+                )
+            writer = writers[group.output_name]
+
+            rows_per_chunk = chunk_row_count(
+                group, options.chunk_rows, options.chunk_bytes
+            )
+            if decimator is not None:
+                rows_per_chunk = decimator.aligned_chunk_rows(rows_per_chunk)
+            for start, data in iter_group_chunks(
+                group, rows_per_chunk, first_row, stop_row
+            ):
+                if decimator is not None:
+                    start, data = decimator.decimate(start, data)
+                if time_column is not None:
+                    start, data = time_column.add(start, data)
+                if layout is not None:
+                    start, data = layout.reshape(start, data)
+                writer.write(start, data)
+            state["groups"][group.output_name] = {
+                "rows": stop_row,
+                "offset": writer.commit(),
+                "channels": [channel.name for channel in group.channels()],
+            }
+            appended += stop_row - first_row
+
+        if reader is not None:
+            reader.release(_unread_rows(groups, state))
+
+    return appended
+
+
+def _written_channels(
+    group: GroupSelection, group_state: Optional[Dict[str, Any]]
+) -> GroupSelection:
+    """Restrict a selected group to the channels its destination file was opened with.
+
+    Args:
+        group (GroupSelection): Selected group.
+        group_state (Optional[Dict[str, Any]]): State of the group, None if no row has been written yet.
+
+    Returns:
+        GroupSelection: The selection, without the channels that appeared after the destination file was opened.
+    """
+    if group_state is None or "channels" not in group_state:
+        return group
+    channel_names = set(group_state["channels"])
+    return GroupSelection(
+        group.group,
+        [channel for channel in group.channels() if channel.name in channel_names],
+        group.output_name,
+    )
+
+
+def _unread_rows(
+    groups: List[GroupSelection], state: Dict[str, Any]
+) -> Dict[str, Tuple[int, int, Optional[int]]]:
+    """Rows of the selected channels that later polls still read, for the incremental reader to forget the others.
+
+    Args:
+        groups (List[GroupSelection]): Selected groups.
+        state (Dict[str, Any]): State of the followed file.
+
+    Returns:
+        Dict[str, Tuple[int, int, Optional[int]]]: Row read for the first value, first row still to be read and row the reads stop before, keyed by channel path.
+    """
+    unread = {}
+    for group in groups:
+        group_state = state["groups"].get(group.output_name)
+        rows = group_state["rows"] if group_state is not None else 0
+        for window in group.channels():
+            unread[window.channel.path] = (
+                window.start,
+                window.start + rows,
+                window.stop,
+            )
+    return unread
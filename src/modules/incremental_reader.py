@@ -0,0 +1,523 @@
+from __future__ import annotations
+from bisect import bisect_right
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+import re
+import struct
+import numpy as np
+
+from .mmap_reader import (
+    ARRAY_TYPES,
+    INCOMPLETE_SEGMENT,
+    LEAD_IN_SIZE,
+    SEGMENT_TAG,
+    STRING_TYPE,
+    TIMESTAMP_TYPE,
+    TOC_BIG_ENDIAN,
+    TOC_DAQMX,
+    TOC_INTERLEAVED,
+    TOC_METADATA,
+    TOC_NEW_OBJECT_LIST,
+    TOC_RAW_DATA,
+    SegmentObject,
+    UnsupportedLayout,
+    decode_property,
+    decode_values,
+    raw_dtype,
+    read_segment_objects,
+    segment_placements,
+)
+
+# Object paths are / followed by the quoted names of the group and the channel, quotes within names being doubled.
+PATH_COMPONENT = re.compile(r"'((?:[^']|'')*)'")
+# Properties of scaled channels, which nptdms scales when they are read.
+SCALING_PREFIX = "NI_Scal"
+
+
+class Piece(NamedTuple):
+    """Run of values of a channel in the file."""
+
+    start: int
+    position: int
+    values: int
+    stride: Optional[int]
+    byte_order: str
+    type_code: int
+    data_size: int
+
+
+class IncrementalChannel:
+    """IncrementalChannel object for a channel of a .tdms file read by an IncrementalTdmsFile. It can be used wherever the nptdms channel is (len, slicing, name, dtype, properties).
+    Slicing reads the runs of values holding the rows from the file, so only the data of the rows asked for is read.
+    """
+
+    def __init__(self, reader: IncrementalTdmsFile, path: str, name: str):
+        """Constructor for the IncrementalChannel.
+
+        Args:
+            reader (IncrementalTdmsFile): Reader of the file.
+            path (str): Path of the channel object.
+            name (str): Name of the channel.
+        """
+        self.reader = reader
+        self.path = path
+        self.name = name
+        self.length = 0
+        self.type_code: Optional[int] = None
+        self.pieces: List[Piece] = []
+        self.starts: List[int] = []
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the values, as nptdms gives it."""
+        if self.type_code == STRING_TYPE:
+            return np.dtype("O")
+        if self.type_code == TIMESTAMP_TYPE:
+            return np.dtype("<M8[us]")
+        if self.type_code in ARRAY_TYPES:
+            return np.dtype(ARRAY_TYPES[self.type_code])
+        return np.dtype("V8")
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """Properties of the channel."""
+        return self.reader.object_properties(self.path)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, rows: slice) -> np.ndarray:
+        start, stop, step = rows.indices(len(self))
+        if step != 1:
+            raise ValueError("Channels of a followed file are read in steps of one row")
+        if start >= stop:
+            return np.empty(0, dtype=self.dtype)
+
+        parts = []
+        row = start
+        index = bisect_right(self.starts, row) - 1
+        while row < stop and 0 <= index < len(self.pieces):
+            piece = self.pieces[index]
+            if piece.start > row:
+                break
+            first = row - piece.start
+            count = min(piece.values - first, stop - row)
+            if count > 0:
+                parts.append(self.reader.read_piece(piece, first, count))
+                row += count
+            index += 1
+        if row < stop:
+            raise ValueError(
+                f"Rows {row} to {stop} of {self.path} were released, they were converted already"
+            )
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def append(self, piece: Piece) -> None:
+        """Append a run of values read from a new segment.
+
+        Args:
+            piece (Piece): Run of values, starting at the current length of the channel.
+        """
+        self.pieces.append(piece)
+        self.starts.append(piece.start)
+        self.length += piece.values
+        self.type_code = piece.type_code
+
+    def release(self, start: int, stop: Optional[int] = None, origin: int = 0) -> None:
+        """Forget the runs of values that will not be read again, so that following a long acquisition does not accumulate the index of every segment. The first run is kept, and the one holding row origin.
+
+        Args:
+            start (int): First row still to be read.
+            stop (Optional[int], optional): Row the reads stop before. Defaults to None, i.e. the end of the channel.
+            origin (int, optional): Row read again for the first value of the channel, e.g. the first timestamp of relative times. Defaults to 0.
+        """
+        self.pieces = [
+            piece
+            for index, piece in enumerate(self.pieces)
+            if index == 0
+            or piece.start <= origin < piece.start + piece.values
+            or (
+                piece.start + piece.values > start
+                and (stop is None or piece.start < stop)
+            )
+        ]
+        self.starts = [piece.start for piece in self.pieces]
+
+
+class IncrementalGroup:
+    """IncrementalGroup object for a group of a .tdms file read by an IncrementalTdmsFile. It can be used wherever the nptdms group is (name, properties, channels, indexing by channel name)."""
+
+    def __init__(
+        self, reader: IncrementalTdmsFile, name: str, channels: List[IncrementalChannel]
+    ):
+        """Constructor for the IncrementalGroup.
+
+        Args:
+            reader (IncrementalTdmsFile): Reader of the file.
+            name (str): Name of the group.
+            channels (List[IncrementalChannel]): Channels of the group.
+        """
+        self.reader = reader
+        self.name = name
+        self.path = object_path(name)
+        self._channels = channels
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """Properties of the group."""
+        return self.reader.object_properties(self.path)
+
+    def channels(self) -> List[IncrementalChannel]:
+        """Channels of the group, in the order of the file."""
+        return self._channels
+
+    def __getitem__(self, channel_name: str) -> IncrementalChannel:
+        for channel in self._channels:
+            if channel.name == channel_name:
+                return channel
+        raise KeyError(
+            f"There is no channel named '{channel_name}' in group '{self.name}'"
+        )
+
+
+class IncrementalTdmsFile:
+    """IncrementalTdmsFile object for reading a .tdms file that is still being written, one batch of new segments at a time. It can be used wherever a file opened with TdmsFile.open is (properties, groups, indexing by group name).
+    Each call to advance parses the metadata of the segments appended since the last call only, and extends the channels with the runs of values of those segments, so the cost of a poll does not grow with the file.
+    Its state (the offset reached, the object list the next segment may carry over, the properties and the runs of values not read yet) can be saved and given back to carry on in another process without parsing the file again.
+    Like the memory-mapped reader it leaves DAQmx data and scaled channels to nptdms, raising UnsupportedLayout.
+    """
+
+    def __init__(self, file_path: str, state: Optional[Dict[str, Any]] = None):
+        """Constructor for the IncrementalTdmsFile. Opens the file, without reading any segment yet.
+
+        Args:
+            file_path (str): Path to the .tdms file.
+            state (Optional[Dict[str, Any]], optional): State returned by the state method, to carry on from. Defaults to None, i.e. from the start of the file.
+        """
+        self.file_path = file_path
+        self.file: BinaryIO = open(file_path, "rb")
+        self.offset = 0
+        self.objects: Optional[List[SegmentObject]] = None
+        self.latest: Dict[str, SegmentObject] = {}
+        self.raw_properties: Dict[str, Dict[str, Tuple[int, str, bytes]]] = {}
+        self.channels: Dict[str, IncrementalChannel] = {}
+        self.decoded: Dict[str, Dict[str, Any]] = {}
+        if state is not None:
+            self.restore(state)
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """Properties of the file."""
+        return self.object_properties("/")
+
+    def object_properties(self, path: str) -> Dict[str, Any]:
+        """Properties of an object of the file.
+
+        Args:
+            path (str): Path of the object.
+
+        Returns:
+            Dict[str, Any]: Properties keyed by name, decoded as nptdms decodes them.
+        """
+        if path not in self.decoded:
+            self.decoded[path] = {
+                name: decode_property(*raw)
+                for name, raw in self.raw_properties.get(path, {}).items()
+            }
+        return self.decoded[path]
+
+    def groups(self) -> List[IncrementalGroup]:
+        """Groups of the file, in the order they first appear in the file."""
+        groups: Dict[str, List[IncrementalChannel]] = {}
+        for path in self.latest:
+            names = split_path(path)
+            if names:
+                channels = groups.setdefault(names[0], [])
+                if len(names) == 2:
+                    channels.append(self.channels[path])
+        return [
+            IncrementalGroup(self, name, channels) for name, channels in groups.items()
+        ]
+
+    def __getitem__(self, group_name: str) -> IncrementalGroup:
+        for group in self.groups():
+            if group.name == group_name:
+                return group
+        raise KeyError(f"There is no group named '{group_name}' in the TDMS file")
+
+    def advance(self, end: int, incomplete: bool = False) -> None:
+        """Parse the segments that start after the segments parsed so far and end before an offset, typically found with complete_segments_end.
+
+        Args:
+            end (int): Offset the segments must end before, e.g. the end of the last complete segment.
+            incomplete (bool, optional): Whether to also read the values of a last segment cut short at end, once the file is complete. Defaults to False.
+
+        Raises:
+            UnsupportedLayout: If a segment holds DAQmx data, scaled channels or values that cannot be placed. The reader cannot be used any further.
+        """
+        while self.offset + LEAD_IN_SIZE <= end:
+            self.file.seek(self.offset)
+            lead_in = self.file.read(LEAD_IN_SIZE)
+            if lead_in[:4] != SEGMENT_TAG:
+                raise UnsupportedLayout(f"No TDMS segment at offset {self.offset}")
+            (toc_mask,) = struct.unpack("<I", lead_in[4:8])
+            if toc_mask & TOC_DAQMX:
+                raise UnsupportedLayout("DAQmx raw data")
+            byte_order = ">" if toc_mask & TOC_BIG_ENDIAN else "<"
+            next_segment_offset, raw_data_offset = struct.unpack(
+                byte_order + "QQ", lead_in[12:28]
+            )
+            segment_end = self.offset + LEAD_IN_SIZE + next_segment_offset
+            cut_short = next_segment_offset == INCOMPLETE_SEGMENT or segment_end > end
+            if cut_short and not incomplete:
+                return
+            if cut_short:
+                segment_end = end
+
+            if toc_mask & TOC_METADATA:
+                metadata = np.frombuffer(
+                    self.file.read(raw_data_offset), dtype=np.uint8
+                )
+                self.objects = read_segment_objects(
+                    metadata,
+                    0,
+                    byte_order,
+                    (
+                        []
+                        if toc_mask & TOC_NEW_OBJECT_LIST or self.objects is None
+                        else self.objects
+                    ),
+                    self.latest,
+                    self.raw_properties,
+                )
+                self.decoded = {}
+                self.add_objects()
+            elif self.objects is None:
+                raise UnsupportedLayout("First segment without metadata")
+
+            if toc_mask & TOC_RAW_DATA:
+                unplaced = set()
+                for obj, position, values, stride in segment_placements(
+                    [obj for obj in self.objects if obj.has_data],
+                    self.offset + LEAD_IN_SIZE + raw_data_offset,
+                    segment_end,
+                    bool(toc_mask & TOC_INTERLEAVED),
+                    cut_short,
+                    unplaced,
+                ):
+                    self.add_values(obj, position, values, stride, byte_order)
+                if unplaced:
+                    raise UnsupportedLayout(
+                        f"Values of {', '.join(sorted(unplaced))} cannot be placed"
+                    )
+            self.offset = segment_end
+            if cut_short:
+                return
+
+    def add_objects(self) -> None:
+        """Create the channels of the objects that appeared in the segment just parsed.
+
+        Raises:
+            UnsupportedLayout: If a channel is scaled.
+        """
+        for path in self.latest:
+            names = split_path(path)
+            if len(names) == 2 and path not in self.channels:
+                self.channels[path] = IncrementalChannel(self, path, names[1])
+            if len(names) == 2 and any(
+                name.startswith(SCALING_PREFIX)
+                for name in self.raw_properties.get(path, {})
+            ):
+                raise UnsupportedLayout(f"Scaled channel {path}")
+
+    def add_values(
+        self,
+        obj: SegmentObject,
+        position: int,
+        values: int,
+        stride: Optional[int],
+        byte_order: str,
+    ) -> None:
+        """Extend a channel with a run of values of a segment. String values are stored per chunk of the segment, each chunk starting with the offsets of its strings.
+
+        Args:
+            obj (SegmentObject): Object the values belong to.
+            position (int): Offset of the first value.
+            values (int): Number of values.
+            stride (Optional[int]): Number of bytes from one value to the next. None for values packed one after the other.
+            byte_order (str): Byte order of the segment, < or >.
+
+        Raises:
+            UnsupportedLayout: If the values have an unsupported data type.
+        """
+        channel = self.channels.get(obj.path)
+        if channel is None or not values:
+            return
+        if (
+            obj.type_code != STRING_TYPE
+            and raw_dtype(obj.type_code, byte_order) is None
+        ):
+            raise UnsupportedLayout(f"Unsupported data type {obj.type_code:#x}")
+        if obj.type_code == STRING_TYPE:
+            for chunk in range(0, values, obj.number_values):
+                channel.append(
+                    Piece(
+                        channel.length,
+                        position,
+                        min(obj.number_values, values - chunk),
+                        None,
+                        byte_order,
+                        obj.type_code,
+                        obj.data_size,
+                    )
+                )
+                position += obj.data_size
+            return
+        channel.append(
+            Piece(
+                channel.length,
+                position,
+                values,
+                stride,
+                byte_order,
+                obj.type_code,
+                obj.data_size,
+            )
+        )
+
+    def read_piece(self, piece: Piece, first: int, count: int) -> np.ndarray:
+        """Read values of a run from the file.
+
+        Args:
+            piece (Piece): Run of values.
+            first (int): Index of the first value within the run.
+            count (int): Number of values.
+
+        Returns:
+            np.ndarray: Values, as nptdms gives them.
+        """
+        self.file.seek(piece.position)
+        if piece.type_code == STRING_TYPE:
+            raw = self.file.read(piece.data_size)
+            ends = np.frombuffer(
+                raw, dtype=piece.byte_order + "u4", count=piece.values
+            ).tolist()
+            starts = [0] + ends[:-1]
+            text = raw[4 * piece.values :]
+            return np.array(
+                [
+                    text[start:stop].decode("utf-8")
+                    for start, stop in zip(
+                        starts[first : first + count], ends[first : first + count]
+                    )
+                ],
+                dtype=object,
+            )
+        dtype = raw_dtype(piece.type_code, piece.byte_order)
+        stride = piece.stride or dtype.itemsize
+        self.file.seek(piece.position + first * stride)
+        raw = self.file.read((count - 1) * stride + dtype.itemsize)
+        values = np.ndarray((count,), dtype=dtype, buffer=raw, strides=(stride,))
+        return decode_values(np.ascontiguousarray(values))
+
+    def release(self, kept: Dict[str, Tuple[int, int, Optional[int]]]) -> None:
+        """Forget the runs of values that will not be read again (see IncrementalChannel.release).
+
+        Args:
+            kept (Dict[str, Tuple[int, int, Optional[int]]]): Row read for the first value, first row still to be read and row the reads stop before of the channels still read, keyed by path. The other channels keep their first run only.
+        """
+        for path, channel in self.channels.items():
+            origin, start, stop = kept.get(path, (0, len(channel), None))
+            channel.release(start, stop, origin)
+
+    def state(self) -> Dict[str, Any]:
+        """State of the reader, to carry on from in another process. It only holds metadata, and the runs of values not released.
+
+        Returns:
+            Dict[str, Any]: JSON serialisable state.
+        """
+        return {
+            "offset": self.offset,
+            "objects": (
+                [list(obj) for obj in self.objects]
+                if self.objects is not None
+                else None
+            ),
+            "latest": [list(obj) for obj in self.latest.values()],
+            "properties": {
+                path: {
+                    name: [type_code, byte_order, raw.hex()]
+                    for name, (type_code, byte_order, raw) in properties.items()
+                }
+                for path, properties in self.raw_properties.items()
+            },
+            "channels": {
+                path: {
+                    "length": channel.length,
+                    "pieces": [list(piece) for piece in channel.pieces],
+                }
+                for path, channel in self.channels.items()
+            },
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Carry on from a saved state.
+
+        Args:
+            state (Dict[str, Any]): State returned by the state method.
+        """
+        self.offset = state["offset"]
+        self.objects = (
+            [SegmentObject(*obj) for obj in state["objects"]]
+            if state["objects"] is not None
+            else None
+        )
+        self.latest = {obj[0]: SegmentObject(*obj) for obj in state["latest"]}
+        self.raw_properties = {
+            path: {
+                name: (type_code, byte_order, bytes.fromhex(raw))
+                for name, (type_code, byte_order, raw) in properties.items()
+            }
+            for path, properties in state["properties"].items()
+        }
+        self.add_objects()
+        for path, channel_state in state["channels"].items():
+            channel = self.channels[path]
+            channel.pieces = [Piece(*piece) for piece in channel_state["pieces"]]
+            channel.starts = [piece.start for piece in channel.pieces]
+            channel.length = channel_state["length"]
+            if channel.pieces:
+                channel.type_code = channel.pieces[-1].type_code
+
+    def close(self) -> None:
+        """Close the file."""
+        self.file.close()
+
+    def __enter__(self) -> IncrementalTdmsFile:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def split_path(path: str) -> List[str]:
+    """Names of the group and channel of an object path.
+
+    Args:
+        path (str): Path of an object, e.g. /'group'/'channel'.
+
+    Returns:
+        List[str]: No name for the file, the name of the group for a group, and the names of the group and the channel for a channel.
+    """
+    return [name.replace("''", "'") for name in PATH_COMPONENT.findall(path)]
+
+
+def object_path(*names: str) -> str:
+    """Path of an object from the names of its group and channel.
+
+    Args:
+        names (str): Name of the group, and of the channel for a channel.
+
+    Returns:
+        str: Path of the object.
+    """
+    return "/" + "/".join("'" + name.replace("'", "''") + "'" for name in names)
@@ -0,0 +1,383 @@
+from nptdms import TdmsFile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import math
+import os
+import numpy as np
+
+from .checkpoint import save_json, source_signature
+from .options import ConversionOptions
+from .progress import format_duration
+from .reader import group_byte_count, group_length
+from .selection import select_groups
+from .transforms import TIME_COLUMN, TimeColumn, long_value_dtype, open_decimator
+from .writers import destination_format
+
+# Bumped whenever the layout of the index changes, which invalidates every sidecar.
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".inspect.json"
+# Properties kept in the index, those needed to select time ranges.
+INDEXED_PROPERTIES = ("wf_increment", "wf_start_time")
+# Rough conversion rates in bytes of channel data per second. They are orders of magnitude only: the rates measured with benchmarks/run.py vary
+# about tenfold with the shape of the file (e.g. from 6 to 110 MB/s for h5, many small groups being the slowest) and with the machine.
+CONVERSION_RATES = {
+    "csv": 8e6,
+    "parquet": 8e6,
+    "h5": 20e6,
+    "arrow": 10e6,
+    "arrows": 10e6,
+}
+# The conversion time is given as a range, from the estimate divided by this factor to the estimate multiplied by it.
+ESTIMATE_MARGIN = 4
+# Approximate number of characters of an integer csv cell by size of the integer, and of the other kinds of cells.
+CSV_INTEGER_WIDTHS = {1: 3, 2: 5, 4: 8, 8: 12}
+CSV_KIND_WIDTHS = {"b": 5, "M": 26, "c": 40, "O": 12}
+# Assumed size of a string value, which the metadata does not tell.
+STRING_BYTES = 12
+
+
+class IndexedChannel:
+    """IndexedChannel object for a channel of a .tdms index. It can be used wherever the nptdms channel is for its metadata (len, name, dtype, properties), e.g. by select_groups, but holds no data."""
+
+    def __init__(self, record: Dict[str, Any]):
+        """Constructor for the IndexedChannel.
+
+        Args:
+            record (Dict[str, Any]): Record of the channel in the index.
+        """
+        self.name = record["name"]
+        self.dtype = np.dtype(record["dtype"])
+        self.rows = record["rows"]
+        self.properties = {
+            name: np.datetime64(value) if name == "wf_start_time" else value
+            for name, value in record["properties"].items()
+        }
+
+    def __len__(self) -> int:
+        return self.rows
+
+
+class IndexedGroup:
+    """IndexedGroup object for a group of a .tdms index. It can be used wherever the nptdms group is for its metadata (name, properties, channels)."""
+
+    def __init__(self, record: Dict[str, Any]):
+        """Constructor for the IndexedGroup.
+
+        Args:
+            record (Dict[str, Any]): Record of the group in the index.
+        """
+        self.name = record["name"]
+        self.properties = {}
+        self._channels = [IndexedChannel(channel) for channel in record["channels"]]
+
+    def channels(self) -> List[IndexedChannel]:
+        """Channels of the group, in the order of the file."""
+        return self._channels
+
+
+class IndexedFile:
+    """IndexedFile object for a .tdms index. It can be used wherever the nptdms file is for its metadata (groups)."""
+
+    def __init__(self, index: Dict[str, Any]):
+        """Constructor for the IndexedFile.
+
+        Args:
+            index (Dict[str, Any]): Index of the file, as returned by load_index.
+        """
+        self.properties = {}
+        self._groups = [IndexedGroup(group) for group in index["groups"]]
+
+    def groups(self) -> List[IndexedGroup]:
+        """Groups of the file, in the order of the file."""
+        return self._groups
+
+
+def index_path(source_file_path: str, index_dir: Optional[str] = None) -> str:
+    """Path to the sidecar index of a .tdms file.
+
+    Args:
+        source_file_path (str): Path to the .tdms file.
+        index_dir (Optional[str], optional): Directory of the sidecar. Defaults to None, i.e. next to the .tdms file.
+
+    Returns:
+        str: Path to the sidecar.
+    """
+    directory = (
+        Path(index_dir) if index_dir is not None else Path(source_file_path).parent
+    )
+    return str(directory / (Path(source_file_path).name + INDEX_SUFFIX))
+
+
+def build_index(source_file_path: str) -> Dict[str, Any]:
+    """Index the groups and channels of a .tdms file from its metadata only (nptdms reads the .tdms_index file instead when there is one), so no data is read whatever the size of the file.
+
+    Args:
+        source_file_path (str): Path to the .tdms file.
+
+    Returns:
+        Dict[str, Any]: Index of the file: version, signature of the source file and groups with their channels (name, dtype, rows and waveform properties).
+    """
+    tdms_file = TdmsFile.read_metadata(source_file_path)
+    return {
+        "version": INDEX_VERSION,
+        "source": source_signature(source_file_path),
+        "groups": [
+            {
+                "name": group.name,
+                "channels": [
+                    {
+                        "name": channel.name,
+                        "dtype": np.dtype(channel.dtype).str,
+                        "rows": len(channel),
+                        "properties": {
+                            name: (
+                                str(value)
+                                if isinstance(value, np.datetime64)
+                                else float(value)
+                            )
+                            for name, value in channel.properties.items()
+                            if name in INDEXED_PROPERTIES
+                        },
+                    }
+                    for channel in group.channels()
+                ],
+            }
+            for group in tdms_file.groups()
+        ],
+    }
+
+
+def load_index(
+    source_file_path: str, index_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """Load the sidecar index of a .tdms file, or build it and save it as a sidecar if there is none or the file has changed since. A sidecar that cannot be written (e.g. read-only share) is skipped.
+
+    Args:
+        source_file_path (str): Path to the .tdms file.
+        index_dir (Optional[str], optional): Directory of the sidecar. Defaults to None, i.e. next to the .tdms file.
+
+    Returns:
+        Dict[str, Any]: Index of the file, as returned by build_index.
+    """
+    sidecar_path = index_path(source_file_path, index_dir)
+    try:
+        with open(sidecar_path) as sidecar_file:
+            index = json.load(sidecar_file)
+        if index.get("version") == INDEX_VERSION and index.get(
+            "source"
+        ) == source_signature(source_file_path):
+            return index
+    except (OSError, ValueError):
+        pass
+
+    index = build_index(source_file_path)
+    try:
+        save_json(sidecar_path, index)
+    except OSError:
+        pass
+    return index
+
+
+def csv_cell_width(dtype: np.dtype, float_precision: Optional[int]) -> int:
+    """Approximate number of characters of a csv cell, including its separator.
+
+    Args:
+        dtype (np.dtype): Data type of the column.
+        float_precision (Optional[int]): Number of significant digits of floats, None for the shortest exact representation.
+
+    Returns:
+        int: Number of characters.
+    """
+    if dtype.kind in "iu":
+        width = CSV_INTEGER_WIDTHS.get(dtype.itemsize, 12)
+    elif dtype.kind == "f":
+        if float_precision is not None:
+            width = float_precision + 6
+        else:
+            width = 18 if dtype.itemsize == 8 else 10
+    else:
+        width = CSV_KIND_WIDTHS.get(dtype.kind, 12)
+    return width + 1
+
+
+def estimate_output_bytes(
+    columns: List[Tuple[np.dtype, int]], rows: int, options: ConversionOptions
+) -> int:
+    """Estimate the size of the file a group converts to, before compression (compressed csv files are estimated as plain csv). Columns shorter than the group only count their own rows, plus empty csv cells.
+
+    Args:
+        columns (List[Tuple[np.dtype, int]]): Data type and number of rows of each column of the converted group.
+        rows (int): Number of rows of the converted group.
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        int: Approximate number of bytes.
+    """
+    if destination_format(options).startswith("csv"):
+        return rows * (len(str(max(rows - 1, 0))) + len(os.linesep)) + sum(
+            column_rows * csv_cell_width(dtype, options.float_precision)
+            + (rows - column_rows)
+            for dtype, column_rows in columns
+        )
+    return sum(
+        column_rows * (STRING_BYTES if dtype.kind == "O" else dtype.itemsize)
+        for dtype, column_rows in columns
+    )
+
+
+def inspect_file(
+    source_file_path: str,
+    options: Optional[ConversionOptions] = None,
+    index_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Describe what converting a .tdms file would produce, from its sidecar index only: the groups and channels selected in the options, their data types and row counts, the estimated size of the converted files and the estimated conversion time.
+
+    Args:
+        source_file_path (str): Path to the .tdms file.
+        options (Optional[ConversionOptions], optional): Conversion options the estimates are made for. Defaults to None.
+        index_dir (Optional[str], optional): Directory of the sidecar index. Defaults to None, i.e. next to the .tdms file.
+
+    Raises:
+        ValueError: If a time range is selected in a group without waveform channels.
+
+    Returns:
+        Dict[str, Any]: Report with the file path, its size, the groups (name, rows, channels with name, dtype and rows, estimated bytes) and the estimated bytes and seconds of the whole conversion.
+            The seconds are a rough estimate from CONVERSION_RATES, see format_estimated_duration.
+    """
+    options = options or ConversionOptions()
+    index = load_index(source_file_path, index_dir)
+    decimator = open_decimator(options)
+
+    groups = []
+    data_bytes = 0
+    for group in select_groups(IndexedFile(index), options):
+        rows = group_length(group)
+        factor = decimator.factor if decimator is not None else 1
+        columns = []
+        for channel in group.channels():
+            dtypes = [channel.dtype]
+            if decimator is not None:
+                dtypes = list(decimator.columns({channel.name: channel.dtype}).values())
+            columns.extend(
+                (dtype, math.ceil(len(channel) / factor)) for dtype in dtypes
+            )
+        time_columns = 0
+        if options.time_column is not None:
+            time_columns = 1
+            columns.insert(
+                0,
+                (
+                    TimeColumn(options.time_format).columns({})[TIME_COLUMN],
+                    math.ceil(rows / factor),
+                ),
+            )
+        output_rows = math.ceil(rows / factor)
+        if options.layout == "long":
+            # One row per value: the channel name, the index, the time and the value.
+            output_rows = sum(column_rows for _, column_rows in columns[time_columns:])
+            long_columns = [np.dtype("O"), np.dtype("int64")]
+            long_columns += [dtype for dtype, _ in columns[:time_columns]]
+            long_columns.append(
+                long_value_dtype([dtype for dtype, _ in columns[time_columns:]])
+            )
+            columns = [(dtype, output_rows) for dtype in long_columns]
+        data_bytes += group_byte_count(group)
+        groups.append(
+            {
+                "name": group.output_name,
+                "rows": rows,
+                "channels": [
+                    {
+                        "name": channel.name,
+                        "dtype": str(channel.dtype),
+                        "rows": len(channel),
+                    }
+                    for channel in group.channels()
+                ],
+                "estimated_bytes": estimate_output_bytes(columns, output_rows, options),
+            }
+        )
+
+    return {
+        "file": source_file_path,
+        "size": index["source"]["size"],
+        "format": destination_format(options),
+        "groups": groups,
+        "estimated_bytes": sum(group["estimated_bytes"] for group in groups),
+        "estimated_seconds": data_bytes
+        / CONVERSION_RATES.get(
+            options.destination_file_format, CONVERSION_RATES["csv"]
+        ),
+    }
+
+
+def format_size(nbytes: float) -> str:
+    """Format a number of bytes with a binary prefix.
+
+    Args:
+        nbytes (float): Number of bytes.
+
+    Returns:
+        str: Formatted size, e.g. 1.5 GB.
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if nbytes < 1024:
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} TB"
+
+
+def format_estimated_duration(seconds: float) -> str:
+    """Format an estimated conversion time as the range it is likely within, as the conversion rates it comes from are rough.
+
+    Args:
+        seconds (float): Estimated number of seconds, e.g. the estimated_seconds of a report.
+
+    Returns:
+        str: Range of durations, e.g. 0:00:05 to 0:01:20.
+    """
+    return f"{format_duration(seconds / ESTIMATE_MARGIN)} to {format_duration(seconds * ESTIMATE_MARGIN)}"
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format an inspection report as text, one line per group and channel.
+
+    Args:
+        report (Dict[str, Any]): Report returned by inspect_file.
+
+    Returns:
+        str: Multi-line description of the file.
+    """
+    lines = [f"{report['file']} ({format_size(report['size'])})"]
+    for group in report["groups"]:
+        lines.append(
+            f"  {group['name']}: {group['rows']:,} rows, {len(group['channels'])} channels, "
+            f"~{format_size(group['estimated_bytes'])} as {report['format']}"
+        )
+        for channel in group["channels"]:
+            lines.append(
+                f"    {channel['name']}: {channel['dtype']}, {channel['rows']:,} rows"
+            )
+    if not report["groups"]:
+        lines.append("  No data to convert.")
+    lines.append(f"  {summarize_report(report)}")
+    return "\n".join(lines)
+
+
+def summarize_report(report: Dict[str, Any]) -> str:
+    """Summarize an inspection report in a single line.
+
+    Args:
+        report (Dict[str, Any]): Report returned by inspect_file.
+
+    Returns:
+        str: Number of groups, channels and rows, estimated output size and range of conversion time.
+    """
+    channels = sum(len(group["channels"]) for group in report["groups"])
+    rows = sum(group["rows"] for group in report["groups"])
+    return (
+        f"{len(report['groups'])} groups, {channels} channels, {rows:,} rows. "
+        f"~{format_size(report['estimated_bytes'])} as {report['format']}, "
+        f"{format_estimated_duration(report['estimated_seconds'])} to convert."
+    )
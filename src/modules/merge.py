@@ -0,0 +1,378 @@
+from nptdms import TdmsFile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import math
+import numpy as np
+
+from .control import ConversionCancelled, ConversionControl
+from .options import ConversionOptions
+from .pipeline import ChunkPipeline
+from .progress import ProgressTracker, ProgressUpdate
+from .reader import (
+    chunk_byte_count,
+    chunk_row_count,
+    group_byte_count,
+    group_length,
+    group_metadata,
+    iter_group_chunks,
+    open_tdms,
+)
+from .selection import GroupSelection, select_groups
+from .transforms import (
+    Decimator,
+    TimeColumn,
+    check_long_layout,
+    is_numeric,
+    open_decimator,
+    open_long_layout,
+    open_time_column,
+)
+from .utils import construct_destination_file_path
+from .writers import destination_format, format_worker_count, open_writer
+
+# Appended to the name of the first source file to name the merged files, unless a name is given.
+MERGED_SUFFIX = "_merged"
+# Gaps and overlaps between consecutive files up to this fraction of the increment are rounding of the start times, not discontinuities.
+CONTINUITY_TOLERANCE = 0.5
+
+
+class MergedGroup:
+    """MergedGroup object for a group (or a channel with the channels layout) merged from several files into one destination file. It holds the schema shared by the files,
+    checked file by file, the end of the waveform of the last file, for checking that the next file carries on from there, and the rows written so far, which offset the rows of the next file.
+    """
+
+    def __init__(self, output_name: str, columns: Dict[str, np.dtype]):
+        """Constructor for the MergedGroup.
+
+        Args:
+            output_name (str): Name of the group in the names of the merged files.
+            columns (Dict[str, np.dtype]): Channel names and data types of the group in the first file holding it.
+        """
+        self.output_name = output_name
+        self.columns = columns
+        self.rows = 0
+        self.nbytes = 0
+        self.increment: Optional[float] = None
+        self.end_time: Optional[np.datetime64] = None
+        self.written_rows = 0
+        self.written_long_rows = 0
+        self.time_origin: Optional[TimeColumn] = None
+        self.next_seconds = 0.0
+
+    def merge_columns(
+        self, columns: Dict[str, np.dtype], source_file_path: str
+    ) -> None:
+        """Check that the group of another file has the same channels, in the same order, and widen the data types of numeric channels to hold the values of both files.
+
+        Args:
+            columns (Dict[str, np.dtype]): Channel names and data types of the group in the file.
+            source_file_path (str): Path to the file.
+
+        Raises:
+            ValueError: If the channels differ, or a channel has a data type that cannot be converted to the one of the other files (e.g. strings and numbers).
+        """
+        if list(columns) != list(self.columns):
+            raise ValueError(
+                f"Cannot merge {source_file_path}: group {self.output_name} has the channels {', '.join(columns)} instead of {', '.join(self.columns)}"
+            )
+        merged = {}
+        for name, dtype in columns.items():
+            dtype, merged_dtype = np.dtype(dtype), np.dtype(self.columns[name])
+            if dtype != merged_dtype and not (
+                is_numeric(dtype) and is_numeric(merged_dtype)
+            ):
+                raise ValueError(
+                    f"Cannot merge {source_file_path}: channel {name} of group {self.output_name} is {dtype} instead of {merged_dtype}"
+                )
+            merged[name] = np.result_type(dtype, merged_dtype)
+        self.columns = merged
+
+    def check_continuity(
+        self,
+        group: GroupSelection,
+        source_file_path: str,
+        on_gap: Optional[Callable[[str, str, float], None]] = None,
+    ) -> None:
+        """Check that the waveform of the group in a file carries on from the waveform of the previous file: same increment, and a start time one increment after the last row of the previous file.
+
+        Args:
+            group (GroupSelection): Selection of the group in the file.
+            source_file_path (str): Path to the file.
+            on_gap (Optional[Callable[[str, str, float], None]], optional): Called with the output name of the group, the path to the file and the seconds between the expected and the actual start time of the file (negative for an overlap) when they differ. Defaults to None.
+
+        Raises:
+            ValueError: If the increment of the waveform differs from the one of the previous files.
+        """
+        increment, start_time = waveform_timing(group)
+        if increment is None:
+            return
+        if self.increment is not None and not math.isclose(
+            increment, self.increment, rel_tol=1e-9
+        ):
+            raise ValueError(
+                f"Cannot merge {source_file_path}: the waveforms of group {self.output_name} have an increment of {increment} s instead of {self.increment} s"
+            )
+        if start_time is not None and self.end_time is not None:
+            gap = (start_time - self.end_time) / np.timedelta64(1, "s")
+            if abs(gap) > CONTINUITY_TOLERANCE * increment and on_gap is not None:
+                on_gap(self.output_name, source_file_path, gap)
+        self.increment = increment
+        self.end_time = (
+            start_time
+            + np.timedelta64(round(group_length(group) * increment * 1e9), "ns")
+            if start_time is not None
+            else None
+        )
+
+    def continue_times(self, time_column: TimeColumn, rows: int, factor: int) -> None:
+        """Carry the relative times of the first file on to the time column of the next file, so that relative times count from the start of the first file.
+        Waveforms with a start time are placed by their start time, gaps included, the others carry on from the end of the previous file. Iso and epoch times need no change.
+
+        Args:
+            time_column (TimeColumn): Time column of the group in the file, changed in place.
+            rows (int): Number of rows of the group in the file, before decimation.
+            factor (int): Decimation factor of the rows, 1 without decimation.
+        """
+        origin = self.time_origin
+        if origin is None:
+            self.time_origin = time_column
+        elif time_column.channel_name is not None:
+            time_column.first_time = origin.first_time
+        elif isinstance(time_column.start_time, np.datetime64) and isinstance(
+            origin.start_time, np.datetime64
+        ):
+            time_column.start_seconds = origin.start_seconds + (
+                time_column.start_time - origin.start_time
+            ) / np.timedelta64(1, "s")
+        else:
+            time_column.start_seconds = self.next_seconds
+        if time_column.channel_name is None:
+            self.next_seconds = (
+                time_column.start_seconds + rows * time_column.increment / factor
+            )
+
+
+def waveform_timing(
+    group: GroupSelection,
+) -> Tuple[Optional[float], Optional[np.datetime64]]:
+    """Increment and start time of the first waveform channel of a group, as used for its time column.
+
+    Args:
+        group (GroupSelection): Selection of a group.
+
+    Returns:
+        Tuple[Optional[float], Optional[np.datetime64]]: Seconds between two rows and time of the first selected row, None when the group has no waveform channel or the waveform no start time.
+    """
+    for channel in group.channels():
+        increment = channel.properties.get("wf_increment")
+        if increment:
+            start_time = channel.properties.get("wf_start_time")
+            return float(increment), (
+                start_time if isinstance(start_time, np.datetime64) else None
+            )
+    return None, None
+
+
+def scan_sources(
+    source_files: List[str],
+    options: ConversionOptions,
+    on_gap: Optional[Callable[[str, str, float], None]] = None,
+) -> Dict[str, MergedGroup]:
+    """Check that the files can be merged from their metadata only, before anything is written: every group must have the same channels in every file holding it, with compatible data types and the same waveform increment, and fit the layout.
+
+    Args:
+        source_files (List[str]): Paths to the source files, in the order they are merged.
+        options (ConversionOptions): Conversion options.
+        on_gap (Optional[Callable[[str, str, float], None]], optional): Called for each file whose waveform does not carry on from the previous file, see MergedGroup.check_continuity. Defaults to None.
+
+    Raises:
+        ValueError: If the files cannot be merged.
+
+    Returns:
+        Dict[str, MergedGroup]: Merged groups keyed by output name, in the order they first appear.
+    """
+    groups: Dict[str, MergedGroup] = {}
+    for source_file_path in source_files:
+        with open_tdms(source_file_path) as tdms_file:
+            selections = select_groups(tdms_file, options)
+            check_long_layout(selections, options)
+            for group in selections:
+                if not group_length(group):
+                    continue
+                columns = {channel.name: channel.dtype for channel in group.channels()}
+                merged = groups.get(group.output_name)
+                if merged is None:
+                    merged = groups[group.output_name] = MergedGroup(
+                        group.output_name, columns
+                    )
+                else:
+                    merged.merge_columns(columns, source_file_path)
+                merged.check_continuity(group, source_file_path, on_gap)
+                merged.rows += group_length(group)
+                merged.nbytes += group_byte_count(group)
+    return groups
+
+
+def merge_files(
+    source_files: List[str],
+    destination_dir: str,
+    options: Optional[ConversionOptions] = None,
+    name: Optional[str] = None,
+    on_progress: Optional[Callable[[ProgressUpdate], None]] = None,
+    on_gap: Optional[Callable[[str, str, float], None]] = None,
+    control: Optional[ConversionControl] = None,
+) -> List[str]:
+    """Concatenate the groups of several .tdms files, e.g. the files of an acquisition split every hour, into one file per group (or per channel with the channels layout) holding the rows of every file in turn.
+    The files are first checked from their metadata (see scan_sources), then streamed one after the other, chunk by chunk, into writers kept open across files. The rows of each file follow the rows of the previous ones,
+    and relative times count from the start of the first file while iso and epoch times keep the actual start time of each file. Selections apply to each file, and decimation blocks do not span two files.
+
+    Args:
+        source_files (List[str]): Paths to the source files, in the order they are merged.
+        destination_dir (str): Destination directory.
+        options (Optional[ConversionOptions], optional): Conversion options. Defaults to None.
+        name (Optional[str], optional): Name of the merged files before the group name. Defaults to None, i.e. the name of the first file followed by MERGED_SUFFIX.
+        on_progress (Optional[Callable[[ProgressUpdate], None]], optional): Called with the progress over all files, at a limited rate. Defaults to None.
+        on_gap (Optional[Callable[[str, str, float], None]], optional): Called for each file whose waveform does not carry on from the previous file, see MergedGroup.check_continuity. Defaults to None.
+        control (Optional[ConversionControl], optional): Control for cancelling or pausing the merge. Defaults to None.
+
+    Raises:
+        ValueError: If there are no files or they cannot be merged.
+        ConversionCancelled: If the merge has been cancelled. The partially written files are deleted.
+
+    Returns:
+        List[str]: Paths to the merged files.
+    """
+    if not source_files:
+        raise ValueError("No files to merge.")
+    options = options or ConversionOptions()
+    groups = scan_sources(source_files, options, on_gap)
+    name = name or Path(source_files[0]).stem + MERGED_SUFFIX
+    destination_files = {
+        output_name: construct_destination_file_path(
+            destination_dir, f"{name}.tdms", destination_format(options), output_name
+        )
+        for output_name in groups
+    }
+    progress = ProgressTracker(
+        sum(merged.rows for merged in groups.values()),
+        sum(merged.nbytes for merged in groups.values()),
+        on_progress,
+    )
+    decimator = open_decimator(options)
+    writers: Dict[str, Any] = {}
+
+    try:
+        try:
+            for source_file_path in source_files:
+                with open_tdms(source_file_path, options.memory_map) as tdms_file:
+                    for group in select_groups(tdms_file, options):
+                        if not group_length(group):
+                            continue
+                        _append_group(
+                            tdms_file,
+                            group,
+                            groups[group.output_name],
+                            destination_files[group.output_name],
+                            writers,
+                            options,
+                            decimator,
+                            progress,
+                            control,
+                        )
+        finally:
+            for writer in writers.values():
+                writer.close()
+    except ConversionCancelled:
+        for destination_file_path in destination_files.values():
+            Path(destination_file_path).unlink(missing_ok=True)
+        raise
+
+    progress.finish()
+    return list(destination_files.values())
+
+
+def _append_group(
+    tdms_file: TdmsFile,
+    group: GroupSelection,
+    merged: MergedGroup,
+    destination_file_path: str,
+    writers: Dict[str, Any],
+    options: ConversionOptions,
+    decimator: Optional[Decimator],
+    progress: ProgressTracker,
+    control: Optional[ConversionControl],
+) -> None:
+    """Append the rows of a group of one file to its merged file, after the rows of the previous files. The writer is opened with the first file holding the group, and kept in writers.
+
+    Args:
+        tdms_file (TdmsFile): The .tdms file, opened with open_tdms.
+        group (GroupSelection): Selection of the group in the file.
+        merged (MergedGroup): Merged group, whose written rows are updated.
+        destination_file_path (str): Path to the merged file.
+        writers (Dict[str, Any]): Open writers keyed by output name.
+        options (ConversionOptions): Conversion options.
+        decimator (Optional[Decimator]): Decimator of the chunks.
+        progress (ProgressTracker): Progress over all files.
+        control (Optional[ConversionControl]): Control for cancelling or pausing the merge.
+
+    Raises:
+        ConversionCancelled: If the merge has been cancelled.
+    """
+    rows = group_length(group)
+    factor = decimator.factor if decimator is not None else 1
+    rows_per_chunk = chunk_row_count(group, options.chunk_rows, options.chunk_bytes)
+    columns = merged.columns
+    if decimator is not None:
+        rows_per_chunk = decimator.aligned_chunk_rows(rows_per_chunk)
+        columns = decimator.columns(columns)
+    time_column = open_time_column(group, options, decimator)
+    if time_column is not None:
+        merged.continue_times(time_column, rows, factor)
+        columns = time_column.columns(columns)
+    layout = open_long_layout(group, columns, options, decimator)
+
+    if merged.output_name not in writers:
+        metadata = group_metadata(tdms_file, group)
+        if decimator is not None:
+            metadata = decimator.metadata(metadata)
+        writers[merged.output_name] = open_writer(
+            destination_file_path,
+            layout.columns() if layout is not None else columns,
+            metadata,
+            options,
+        )
+    writer = writers[merged.output_name]
+    row_offset, long_offset = merged.written_rows, merged.written_long_rows
+
+    def format_chunk(start: int, data: Dict[str, np.ndarray]) -> Any:
+        data = {
+            name: values.astype(merged.columns[name], copy=False)
+            for name, values in data.items()
+        }
+        if decimator is not None:
+            start, data = decimator.decimate(start, data)
+        if time_column is not None:
+            start, data = time_column.add(start, data)
+        if layout is not None:
+            start, data = layout.reshape(start, data)
+            data["index"] += row_offset
+            return writer.format_chunk(start + long_offset, data)
+        return writer.format_chunk(start + row_offset, data)
+
+    with ChunkPipeline(
+        iter_group_chunks(group, rows_per_chunk),
+        format_chunk,
+        format_worker_count(options),
+    ) as pipeline:
+        for _, data, formatted in pipeline:
+            if control is not None:
+                control.check()
+            writer.write_formatted(formatted)
+            progress.advance(
+                max((len(values) for values in data.values()), default=0),
+                chunk_byte_count(data),
+            )
+
+    merged.written_rows += math.ceil(rows / factor)
+    if layout is not None:
+        merged.written_long_rows += layout.offset(math.ceil(rows / factor))
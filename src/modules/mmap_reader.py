@@ -0,0 +1,712 @@
+from __future__ import annotations
+from bisect import bisect_right
+from nptdms import TdmsFile, TdmsGroup, TdmsChannel
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+import mmap
+import os
+import struct
+import numpy as np
+
+# Layout of the lead-in that starts every TDMS segment and flags of its table of contents.
+LEAD_IN_SIZE = 28
+SEGMENT_TAG = b"TDSm"
+TOC_METADATA = 1 << 1
+TOC_NEW_OBJECT_LIST = 1 << 2
+TOC_RAW_DATA = 1 << 3
+TOC_INTERLEAVED = 1 << 5
+TOC_BIG_ENDIAN = 1 << 6
+TOC_DAQMX = 1 << 7
+# Next segment offset of a segment that is still being written.
+INCOMPLETE_SEGMENT = 0xFFFFFFFFFFFFFFFF
+# Raw data index headers of objects without data in a segment and of objects laid out as in the previous segment.
+NO_DATA = 0xFFFFFFFF
+SAME_AS_PREVIOUS = 0x00000000
+DAQMX_INDEX_HEADERS = (0x00001269, 0x0000126A)
+
+STRING_TYPE = 0x20
+TIMESTAMP_TYPE = 0x44
+# TDMS data types stored as plain arrays, mapped to numpy dtypes (without byte order).
+ARRAY_TYPES = {
+    0x01: "i1",
+    0x02: "i2",
+    0x03: "i4",
+    0x04: "i8",
+    0x05: "u1",
+    0x06: "u2",
+    0x07: "u4",
+    0x08: "u8",
+    0x09: "f4",
+    0x0A: "f8",
+    0x19: "f4",
+    0x1A: "f8",
+    0x21: "?",
+    0x08000C: "c8",
+    0x10000D: "c16",
+}
+# Sizes of the fixed size data types that are not mapped (extended floats), only needed to skip them.
+OTHER_TYPE_SIZES = {TIMESTAMP_TYPE: 16, 0x0B: 16, 0x1B: 16, 0x00: 0}
+# Timestamps are seconds since 1904-01-01 and fractions of 2**-64 seconds.
+TIMESTAMP_EPOCH = np.datetime64("1904-01-01 00:00:00", "s")
+FRACTIONS_PER_MICROSECOND = 1e-6 / 2**-64
+
+
+class UnsupportedLayout(Exception):
+    """Raised while scanning a .tdms file whose layout cannot be mapped (e.g. DAQmx raw data). The file is then read through nptdms."""
+
+
+class SegmentObject(NamedTuple):
+    """Raw data index of an object in a segment."""
+
+    path: str
+    type_code: Optional[int]
+    number_values: int
+    data_size: int
+    has_data: bool
+
+
+class MappedChannel:
+    """MappedChannel object for reading a channel straight from a memory-mapped .tdms file. It can be used wherever the nptdms channel is (len, slicing, name, dtype, properties).
+    The channel is a list of numpy views over the raw data of the segments holding it, so a slice within a segment is a view of the file and a slice spanning segments is a single copy.
+    Channels that cannot be mapped (strings, scaled or DAQmx data, truncated interleaved segments) are read through nptdms.
+    """
+
+    def __init__(self, channel: TdmsChannel, pieces: Optional[List[np.ndarray]]):
+        """Constructor for the MappedChannel.
+
+        Args:
+            channel (TdmsChannel): Channel of the .tdms file opened with TdmsFile.open, for the properties and the channels that are not mapped.
+            pieces (Optional[List[np.ndarray]]): Views over the raw data of the channel, in the order of the segments. None reads the channel through nptdms.
+        """
+        self.channel = channel
+        self.name = channel.name
+        self.path = channel.path
+        self.dtype = channel.dtype
+        self.properties = channel.properties
+        self._pieces = pieces
+        self._starts = []
+        if pieces is not None:
+            start = 0
+            for piece in pieces:
+                self._starts.append(start)
+                start += len(piece)
+
+    @property
+    def mapped(self) -> bool:
+        """Whether the channel is read from the memory map."""
+        return self._pieces is not None
+
+    def __len__(self) -> int:
+        return len(self.channel)
+
+    def __getitem__(self, rows: slice) -> np.ndarray:
+        start, stop, step = rows.indices(len(self))
+        if self._pieces is None or step != 1:
+            return self.channel[rows]
+        if start >= stop:
+            return np.empty(0, dtype=self.dtype)
+
+        parts = []
+        index = bisect_right(self._starts, start) - 1
+        while start < stop:
+            offset = start - self._starts[index]
+            part = self._pieces[index][offset : offset + stop - start]
+            parts.append(part)
+            start += len(part)
+            index += 1
+        return decode_values(parts[0] if len(parts) == 1 else np.concatenate(parts))
+
+
+class MappedGroup:
+    """MappedGroup object for a group of a memory-mapped .tdms file. It can be used wherever the nptdms group is (name, properties, channels, indexing by channel name)."""
+
+    def __init__(self, group: TdmsGroup, channels: List[MappedChannel]):
+        """Constructor for the MappedGroup.
+
+        Args:
+            group (TdmsGroup): Group of the .tdms file opened with TdmsFile.open.
+            channels (List[MappedChannel]): Channels of the group.
+        """
+        self.group = group
+        self.name = group.name
+        self.path = group.path
+        self.properties = group.properties
+        self._channels = channels
+
+    def channels(self) -> List[MappedChannel]:
+        """Channels of the group, in the order of the file."""
+        return self._channels
+
+    def __getitem__(self, channel_name: str) -> MappedChannel:
+        for channel in self._channels:
+            if channel.name == channel_name:
+                return channel
+        raise KeyError(
+            f"There is no channel named '{channel_name}' in group '{self.name}'"
+        )
+
+
+class MappedTdmsFile:
+    """MappedTdmsFile object for reading a local .tdms file through a memory map instead of file reads. It can be used wherever a file opened with TdmsFile.open is (properties, groups, indexing by group name, context manager).
+    The metadata (properties, data types, lengths) comes from nptdms, the raw data index of every segment is scanned once to build numpy views over the data of each channel, so reading a chunk costs no decoding
+    and no copy within a segment. Pages are loaded by the operating system as the views are read, which suits local SSDs rather than network shares.
+    """
+
+    def __init__(self, file_path: str):
+        """Constructor for the MappedTdmsFile. Opens the file with nptdms for the metadata and maps it. A file whose layout cannot be mapped is read entirely through nptdms.
+
+        Args:
+            file_path (str): Path to the .tdms file.
+        """
+        self.file_path = file_path
+        self.tdms_file = TdmsFile.open(file_path)
+        self.map = None
+        self.buffer = None
+        try:
+            with open(file_path, "rb") as source_file:
+                size = os.fstat(source_file.fileno()).st_size
+                if size:
+                    self.map = mmap.mmap(
+                        source_file.fileno(), size, access=mmap.ACCESS_READ
+                    )
+                    # Views are made over this array rather than the map itself, so that they hold an export of the map and it cannot be closed under them.
+                    self.buffer = np.frombuffer(self.map, dtype=np.uint8)
+            try:
+                pieces, unmapped = (
+                    scan_segments(self.buffer)
+                    if self.buffer is not None
+                    else ({}, set())
+                )
+            except (UnsupportedLayout, struct.error):
+                pieces, unmapped = {}, None
+        except Exception:
+            self.close()
+            raise
+
+        self.properties = self.tdms_file.properties
+        self._groups = [
+            MappedGroup(
+                group,
+                [
+                    MappedChannel(
+                        channel,
+                        channel_pieces(channel, pieces, unmapped),
+                    )
+                    for channel in group.channels()
+                ],
+            )
+            for group in self.tdms_file.groups()
+        ]
+
+    def groups(self) -> List[MappedGroup]:
+        """Groups of the file, in the order of the file."""
+        return self._groups
+
+    def __getitem__(self, group_name: str) -> MappedGroup:
+        for group in self._groups:
+            if group.name == group_name:
+                return group
+        raise KeyError(f"There is no group named '{group_name}' in the TDMS file")
+
+    def close(self) -> None:
+        """Close the file. The memory map stays alive as long as arrays returned by the channels still point into it."""
+        self.tdms_file.close()
+        self.buffer = None
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                pass
+            self.map = None
+
+    def __enter__(self) -> MappedTdmsFile:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def decode_values(values: np.ndarray) -> np.ndarray:
+    """Convert raw values to the values nptdms returns: TDMS timestamps to datetime64 and values of the other byte order to the native one. Native values are returned as they are.
+
+    Args:
+        values (np.ndarray): Raw values, as laid out in the file.
+
+    Returns:
+        np.ndarray: Values.
+    """
+    if values.dtype.names is not None:
+        return (
+            TIMESTAMP_EPOCH
+            + values["seconds"] * np.timedelta64(1, "s")
+            + (values["second_fractions"] / FRACTIONS_PER_MICROSECOND)
+            * np.timedelta64(1, "us")
+        )
+    if not values.dtype.isnative:
+        return values.astype(values.dtype.newbyteorder("="))
+    return values
+
+
+def raw_dtype(type_code: int, byte_order: str) -> Optional[np.dtype]:
+    """Numpy dtype of the raw values of a TDMS data type, as laid out in the file.
+
+    Args:
+        type_code (int): TDMS data type.
+        byte_order (str): Byte order of the segment, < or >.
+
+    Returns:
+        Optional[np.dtype]: Data type of the raw values, a structured type for timestamps, or None for data types without a numpy view (strings, extended floats).
+    """
+    if type_code == TIMESTAMP_TYPE:
+        fields = [("second_fractions", "u8"), ("seconds", "i8")]
+        if byte_order == ">":
+            fields.reverse()
+        return np.dtype([(name, byte_order + code) for name, code in fields])
+    if type_code in ARRAY_TYPES:
+        return np.dtype(byte_order + ARRAY_TYPES[type_code])
+    return None
+
+
+def channel_pieces(
+    channel: TdmsChannel,
+    pieces: Dict[str, List[np.ndarray]],
+    unmapped: Optional[Set[str]],
+) -> Optional[List[np.ndarray]]:
+    """Views over the raw data of a channel, if it can be read from them as nptdms would read it.
+
+    Args:
+        channel (TdmsChannel): Channel of the file opened with TdmsFile.open.
+        pieces (Dict[str, List[np.ndarray]]): Views over the raw data keyed by object path, as returned by scan_segments.
+        unmapped (Optional[Set[str]]): Paths of the objects that cannot be mapped, or None if the file cannot be mapped at all.
+
+    Returns:
+        Optional[List[np.ndarray]]: Views over the raw data of the channel, or None if it must be read through nptdms.
+    """
+    if unmapped is None or channel.path in unmapped:
+        return None
+    # Scaled channels are converted by nptdms when they are read.
+    if any(name.startswith("NI_Scal") for name in channel.properties):
+        return None
+    channel_pieces = pieces.get(channel.path, [])
+    if sum(len(piece) for piece in channel_pieces) != len(channel):
+        return None
+    if channel_pieces:
+        dtype = channel_pieces[0].dtype
+        dtype = (
+            np.dtype("<M8[us]") if dtype.names is not None else dtype.newbyteorder("=")
+        )
+        if dtype != channel.dtype:
+            return None
+    return channel_pieces
+
+
+def scan_segments(
+    data: np.ndarray,
+) -> Tuple[Dict[str, List[np.ndarray]], Set[str]]:
+    """Scan the lead-in and metadata of every segment of a memory-mapped .tdms file and build numpy views over the raw data of each object, following the same rules as nptdms for
+    object lists carried over from the previous segment, reused raw data indexes and truncated last segments. Only the metadata is read, the raw data is left to the views.
+
+    Args:
+        data (np.ndarray): Bytes of the memory-mapped .tdms file.
+
+    Raises:
+        UnsupportedLayout: If the file holds DAQmx raw data or its metadata cannot be parsed.
+
+    Returns:
+        Tuple[Dict[str, List[np.ndarray]], Set[str]]: Views over the raw data of each segment keyed by object path, and the paths of the objects with data that cannot be mapped.
+    """
+    size = len(data)
+    pieces = {}
+    unmapped = set()
+    objects = None
+    latest = {}
+    offset = 0
+
+    while offset + LEAD_IN_SIZE <= size:
+        if data[offset : offset + 4].tobytes() != SEGMENT_TAG:
+            raise UnsupportedLayout(f"No TDMS segment at offset {offset}")
+        (toc_mask,) = struct.unpack_from("<I", data, offset + 4)
+        if toc_mask & TOC_DAQMX:
+            raise UnsupportedLayout("DAQmx raw data")
+        byte_order = ">" if toc_mask & TOC_BIG_ENDIAN else "<"
+        next_segment_offset, raw_data_offset = struct.unpack_from(
+            byte_order + "QQ", data, offset + 12
+        )
+        incomplete = (
+            next_segment_offset == INCOMPLETE_SEGMENT
+            or offset + LEAD_IN_SIZE + next_segment_offset > size
+        )
+        end = size if incomplete else offset + LEAD_IN_SIZE + next_segment_offset
+        data_position = offset + LEAD_IN_SIZE + raw_data_offset
+
+        if toc_mask & TOC_METADATA:
+            objects = read_segment_objects(
+                data,
+                offset + LEAD_IN_SIZE,
+                byte_order,
+                [] if toc_mask & TOC_NEW_OBJECT_LIST or objects is None else objects,
+                latest,
+            )
+        elif objects is None:
+            raise UnsupportedLayout("First segment without metadata")
+
+        if toc_mask & TOC_RAW_DATA:
+            map_segment_data(
+                data,
+                [obj for obj in objects if obj.has_data],
+                data_position,
+                end,
+                byte_order,
+                bool(toc_mask & TOC_INTERLEAVED),
+                incomplete,
+                pieces,
+                unmapped,
+            )
+        if incomplete:
+            break
+        offset = end
+
+    return pieces, unmapped
+
+
+def read_segment_objects(
+    data: np.ndarray,
+    position: int,
+    byte_order: str,
+    previous_objects: List[SegmentObject],
+    latest: Dict[str, SegmentObject],
+    properties: Optional[Dict[str, Dict[str, Tuple[int, str, bytes]]]] = None,
+) -> List[SegmentObject]:
+    """Read the object list of a segment, i.e. the raw data index of each object. The properties are skipped, or collected raw when a dict is given for them.
+
+    Args:
+        data (np.ndarray): Bytes of the memory-mapped .tdms file.
+        position (int): Offset of the metadata of the segment.
+        byte_order (str): Byte order of the segment, < or >.
+        previous_objects (List[SegmentObject]): Objects carried over from the previous segment, empty if the segment starts a new object list.
+        latest (Dict[str, SegmentObject]): Most recent raw data index of every object, updated with the objects of the segment.
+        properties (Optional[Dict[str, Dict[str, Tuple[int, str, bytes]]]], optional): Raw properties keyed by object path, updated with those of the segment (see read_properties). Defaults to None, i.e. skipped.
+
+    Raises:
+        UnsupportedLayout: If an object has a DAQmx or unknown raw data index.
+
+    Returns:
+        List[SegmentObject]: Objects of the segment, in the order of their raw data.
+    """
+    objects = list(previous_objects)
+    indexes = {obj.path: index for index, obj in enumerate(objects)}
+    (count,) = struct.unpack_from(byte_order + "I", data, position)
+    position += 4
+
+    for _ in range(count):
+        path, position = read_string(data, position, byte_order)
+        (header,) = struct.unpack_from(byte_order + "I", data, position)
+        position += 4
+        index = indexes.get(path)
+        previous = objects[index] if index is not None else latest.get(path)
+
+        if header == NO_DATA:
+            obj = (
+                previous._replace(has_data=False)
+                if previous is not None
+                else SegmentObject(path, None, 0, 0, False)
+            )
+        elif header == SAME_AS_PREVIOUS:
+            if previous is None:
+                raise UnsupportedLayout(f"No previous raw data index for {path}")
+            obj = previous._replace(has_data=True)
+        elif header in DAQMX_INDEX_HEADERS:
+            raise UnsupportedLayout("DAQmx raw data index")
+        else:
+            type_code, _, number_values = struct.unpack_from(
+                byte_order + "IIQ", data, position
+            )
+            position += 16
+            if type_code == STRING_TYPE:
+                (data_size,) = struct.unpack_from(byte_order + "Q", data, position)
+                position += 8
+            else:
+                data_size = number_values * type_size(type_code)
+            obj = SegmentObject(path, type_code, number_values, data_size, True)
+
+        if index is None:
+            indexes[path] = len(objects)
+            objects.append(obj)
+        else:
+            objects[index] = obj
+        latest[path] = obj
+        if properties is None:
+            position = skip_properties(data, position, byte_order)
+        else:
+            position = read_properties(
+                data, position, byte_order, properties.setdefault(path, {})
+            )
+
+    return objects
+
+
+def map_segment_data(
+    data: np.ndarray,
+    objects: List[SegmentObject],
+    data_position: int,
+    end: int,
+    byte_order: str,
+    interleaved: bool,
+    incomplete: bool,
+    pieces: Dict[str, List[np.ndarray]],
+    unmapped: Set[str],
+) -> None:
+    """Build the views over the raw data of a segment, where segment_placements places the values of its objects.
+
+    Args:
+        data (np.ndarray): Bytes of the memory-mapped .tdms file.
+        objects (List[SegmentObject]): Objects with data in the segment.
+        data_position (int): Offset of the raw data of the segment.
+        end (int): Offset of the end of the segment.
+        byte_order (str): Byte order of the segment, < or >.
+        interleaved (bool): Whether the raw data is interleaved.
+        incomplete (bool): Whether the segment is still being written.
+        pieces (Dict[str, List[np.ndarray]]): Views keyed by object path, the views of the segment are appended.
+        unmapped (Set[str]): Paths of the objects that cannot be mapped, updated with those of the segment.
+    """
+    for obj, position, values, stride in segment_placements(
+        objects, data_position, end, interleaved, incomplete, unmapped
+    ):
+        add_piece(data, obj, position, values, stride, byte_order, pieces, unmapped)
+
+
+def segment_placements(
+    objects: List[SegmentObject],
+    data_position: int,
+    end: int,
+    interleaved: bool,
+    incomplete: bool,
+    unmapped: Set[str],
+) -> List[Tuple[SegmentObject, int, int, Optional[int]]]:
+    """Place the values of the objects in the raw data of a segment. Contiguous data is a run of chunks, each holding the values of every object one after the other, interleaved data alternates the values of the objects.
+    A last chunk cut short (e.g. a segment still being written) holds fewer values, computed the same way as nptdms.
+
+    Args:
+        objects (List[SegmentObject]): Objects with data in the segment.
+        data_position (int): Offset of the raw data of the segment.
+        end (int): Offset of the end of the segment.
+        interleaved (bool): Whether the raw data is interleaved.
+        incomplete (bool): Whether the segment is still being written.
+        unmapped (Set[str]): Paths of the objects whose values cannot be placed (variable size values in interleaved or truncated data), updated with those of the segment.
+
+    Returns:
+        List[Tuple[SegmentObject, int, int, Optional[int]]]: Runs of values: object, offset of the first value, number of values and number of bytes from one value to the next (None for values packed one after the other), in the order of the file.
+    """
+    placements = []
+    chunk_size = sum(obj.data_size for obj in objects)
+    if chunk_size == 0:
+        return placements
+    chunks, remainder = divmod(end - data_position, chunk_size)
+    variable_size = any(obj.type_code == STRING_TYPE for obj in objects)
+
+    if interleaved:
+        if (
+            remainder
+            or variable_size
+            or len({obj.number_values for obj in objects}) > 1
+        ):
+            unmapped.update(obj.path for obj in objects)
+            return placements
+        row_size = chunk_size // objects[0].number_values
+        position = data_position
+        for obj in objects:
+            placements.append((obj, position, chunks * obj.number_values, row_size))
+            position += type_size(obj.type_code)
+        return placements
+
+    if len(objects) == 1 and not remainder:
+        # A single object is contiguous across chunks.
+        return [(objects[0], data_position, chunks * objects[0].number_values, None)]
+
+    for chunk in range(chunks):
+        position = data_position + chunk * chunk_size
+        for obj in objects:
+            placements.append((obj, position, obj.number_values, None))
+            position += obj.data_size
+    if remainder:
+        if variable_size:
+            unmapped.update(obj.path for obj in objects)
+            return placements
+        position = data_position + chunks * chunk_size
+        left = remainder
+        for obj in objects:
+            if incomplete:
+                # Values are written object after object, so the first objects are complete.
+                values = min(obj.number_values, left // type_size(obj.type_code))
+                left -= values * type_size(obj.type_code)
+            else:
+                values = obj.number_values * remainder // chunk_size
+            placements.append((obj, position, values, None))
+            position += values * type_size(obj.type_code)
+    return placements
+
+
+def add_piece(
+    data: np.ndarray,
+    obj: SegmentObject,
+    position: int,
+    values: int,
+    stride: Optional[int],
+    byte_order: str,
+    pieces: Dict[str, List[np.ndarray]],
+    unmapped: Set[str],
+) -> None:
+    """Append a view over values of an object to its pieces, or mark it unmapped if its data type has no numpy view.
+
+    Args:
+        data (np.ndarray): Bytes of the memory-mapped .tdms file.
+        obj (SegmentObject): Object the values belong to.
+        position (int): Offset of the first value.
+        values (int): Number of values.
+        stride (Optional[int]): Number of bytes from one value to the next. None for values packed one after the other.
+        byte_order (str): Byte order of the segment, < or >.
+        pieces (Dict[str, List[np.ndarray]]): Views keyed by object path.
+        unmapped (Set[str]): Paths of the objects that cannot be mapped.
+    """
+    dtype = raw_dtype(obj.type_code, byte_order)
+    if dtype is None:
+        unmapped.add(obj.path)
+        return
+    if values:
+        pieces.setdefault(obj.path, []).append(
+            np.ndarray(
+                (values,),
+                dtype=dtype,
+                buffer=data,
+                offset=position,
+                strides=None if stride is None else (stride,),
+            )
+        )
+
+
+def type_size(type_code: int) -> int:
+    """Size in bytes of a value of a fixed size TDMS data type.
+
+    Args:
+        type_code (int): TDMS data type.
+
+    Raises:
+        UnsupportedLayout: If the data type is unknown or has no fixed size.
+
+    Returns:
+        int: Number of bytes per value.
+    """
+    if type_code in ARRAY_TYPES:
+        return np.dtype(ARRAY_TYPES[type_code]).itemsize
+    if type_code in OTHER_TYPE_SIZES:
+        return OTHER_TYPE_SIZES[type_code]
+    raise UnsupportedLayout(f"Unsupported data type {type_code:#x}")
+
+
+def read_string(data: np.ndarray, position: int, byte_order: str) -> Tuple[str, int]:
+    """Read a length-prefixed TDMS string.
+
+    Args:
+        data (np.ndarray): Bytes of the memory-mapped .tdms file.
+        position (int): Offset of the string.
+        byte_order (str): Byte order of the segment, < or >.
+
+    Returns:
+        Tuple[str, int]: The string and the offset after it.
+    """
+    (length,) = struct.unpack_from(byte_order + "I", data, position)
+    position += 4
+    return (
+        data[position : position + length].tobytes().decode("utf-8"),
+        position + length,
+    )
+
+
+def skip_properties(data: np.ndarray, position: int, byte_order: str) -> int:
+    """Skip the properties of an object, which are read by nptdms.
+
+    Args:
+        data (np.ndarray): Bytes of the memory-mapped .tdms file.
+        position (int): Offset of the number of properties.
+        byte_order (str): Byte order of the segment, < or >.
+
+    Raises:
+        UnsupportedLayout: If a property has an unknown data type.
+
+    Returns:
+        int: Offset after the properties.
+    """
+    (count,) = struct.unpack_from(byte_order + "I", data, position)
+    position += 4
+    for _ in range(count):
+        _, position = read_string(data, position, byte_order)
+        (type_code,) = struct.unpack_from(byte_order + "I", data, position)
+        position += 4
+        if type_code == STRING_TYPE:
+            (length,) = struct.unpack_from(byte_order + "I", data, position)
+            position += 4 + length
+        else:
+            position += type_size(type_code)
+    return position
+
+
+def read_properties(
+    data: np.ndarray,
+    position: int,
+    byte_order: str,
+    properties: Dict[str, Tuple[int, str, bytes]],
+) -> int:
+    """Read the properties of an object raw, to be decoded by decode_property. Properties already set, e.g. by an earlier segment, are replaced.
+
+    Args:
+        data (np.ndarray): Bytes of the .tdms file, or of the metadata of a segment.
+        position (int): Offset of the number of properties.
+        byte_order (str): Byte order of the segment, < or >.
+        properties (Dict[str, Tuple[int, str, bytes]]): Raw properties of the object keyed by name: data type, byte order and bytes of the value.
+
+    Raises:
+        UnsupportedLayout: If a property has an unknown data type.
+
+    Returns:
+        int: Offset after the properties.
+    """
+    (count,) = struct.unpack_from(byte_order + "I", data, position)
+    position += 4
+    for _ in range(count):
+        name, position = read_string(data, position, byte_order)
+        (type_code,) = struct.unpack_from(byte_order + "I", data, position)
+        position += 4
+        if type_code == STRING_TYPE:
+            (length,) = struct.unpack_from(byte_order + "I", data, position)
+            position += 4
+        else:
+            length = type_size(type_code)
+        properties[name] = (
+            type_code,
+            byte_order,
+            data[position : position + length].tobytes(),
+        )
+        position += length
+    return position
+
+
+def decode_property(type_code: int, byte_order: str, raw: bytes) -> Any:
+    """Decode a raw property to the value nptdms gives it: a string, a Python number or bool, or a datetime64 for timestamps.
+
+    Args:
+        type_code (int): TDMS data type.
+        byte_order (str): Byte order of the segment the property was read from, < or >.
+        raw (bytes): Bytes of the value.
+
+    Raises:
+        UnsupportedLayout: If the data type has no numpy equivalent (extended floats).
+
+    Returns:
+        Any: Value of the property.
+    """
+    if type_code == STRING_TYPE:
+        return raw.decode("utf-8")
+    dtype = raw_dtype(type_code, byte_order)
+    if dtype is None:
+        raise UnsupportedLayout(f"Unsupported property data type {type_code:#x}")
+    value = decode_values(np.frombuffer(raw, dtype=dtype))[0]
+    return value if type_code == TIMESTAMP_TYPE else value.item()
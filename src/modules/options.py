@@ -0,0 +1,112 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+# Options that only affect how a conversion runs, not the files it produces.
+RUNTIME_OPTIONS = (
+    "chunk_rows",
+    "chunk_bytes",
+    "group_workers",
+    "checkpoint",
+    "checkpoint_interval",
+    "cache_dir",
+    "cache_max_bytes",
+    "memory_map",
+    "format_workers",
+)
+# Seconds between two polls of a followed file or a watched directory. Kept here, away from the modules that use it, so the command line parser can show it without loading them.
+DEFAULT_POLL_INTERVAL = 1.0
+# The choices of the options below are kept here for the same reason, as transforms and writers load numpy and nptdms.
+DECIMATION_METHODS = ("nth", "mean", "minmax", "rms")
+TIME_FORMATS = ("iso", "epoch", "relative")
+# Layouts of the converted files: one row per row of the group (wide), one file per channel (channels) or one row per value (long).
+LAYOUTS = ("wide", "channels", "long")
+# Extensions of the compressed csv files by codec.
+CSV_COMPRESSION_EXTENSIONS = {"gzip": "gz", "zstd": "zst", "xz": "xz"}
+# Destination file formats, which are also the extensions of the converted files, each with a writer in writers.WRITERS.
+DESTINATION_FORMATS = (
+    "csv",
+    "parquet",
+    "h5",
+    "arrow",
+    "arrows",
+    *(f"csv.{extension}" for extension in CSV_COMPRESSION_EXTENSIONS.values()),
+)
+
+
+@dataclass
+class ConversionOptions:
+    """Options shared by every front end (GUI, command line) that runs a conversion.
+
+    Attributes:
+        chunk_rows (Optional[int]): Number of rows read per chunk.
+        chunk_bytes (Optional[int]): Approximate number of bytes read per chunk, used instead of chunk_rows.
+        group_workers (Optional[int]): Maximum number of processes converting the groups of a file concurrently, at most one per group. None uses every CPU. Small files are converted by the calling process.
+        destination_file_format (str): Format of the converted files, i.e. csv, parquet or h5.
+        compression (Optional[str]): Compression codec of the converted files. None uses the default of the format.
+        compression_level (Optional[int]): Compression level. None uses the default of the codec.
+        row_group_size (int): Number of rows per row group for parquet files.
+        write_statistics (bool): Whether to write the column statistics (min, max, null count) to parquet files.
+        dataset_chunk_rows (int): Number of values per chunk of the chunked HDF5 datasets.
+        float_precision (Optional[int]): Number of significant digits of floats in csv files. None writes the shortest exact representation.
+        checkpoint (bool): Whether to record the progress of each group in a sidecar file next to its destination file, so that a conversion that failed or was cancelled resumes where it stopped when it is run again.
+        checkpoint_interval (float): Minimum number of seconds between two checkpoints of a group.
+        cache_dir (Optional[str]): Directory of the cache of converted files. Files converted before from the same content with the same options are then hardlinked or copied from the cache instead of being converted again. None disables the cache.
+        cache_max_bytes (int): Maximum size of the cache, the least recently used files are evicted beyond it.
+        groups (Optional[List[str]]): Names or glob patterns of the groups to convert. None converts every group.
+        channels (Optional[List[str]]): Names or glob patterns of the channels to convert, in every selected group. None converts every channel.
+        row_start (int): Index of the first row to convert.
+        row_stop (Optional[int]): Index of the row to stop before. None converts up to the last row.
+        time_start (Optional[str]): Start of the time range to convert, in seconds since the start of the waveforms or as an ISO 8601 timestamp. Requires waveform channels.
+        time_stop (Optional[str]): End of the time range to convert (excluded), in the same forms.
+        decimation (Optional[str]): Downsampling of the rows while converting: nth (every Nth row), mean (block mean), minmax (min/max envelope) or rms (block root mean square). None keeps every row.
+        decimation_factor (int): Number of rows reduced to one by the decimation.
+        memory_map (bool): Whether to read the source files through a memory map, which hands the writers views of the raw data instead of decoded copies. Meant for local disks.
+        format_workers (int): Number of threads formatting the chunks of a group for its writer, while a reader thread reads the next chunks and the writer writes the previous ones. 0 reads, formats and writes each chunk in turn on a single thread. Capped at 1 for csv, whose formatting holds the GIL.
+        time_column (Optional[str]): Source of a time column added before the channels: waveform (computed from wf_start_time and wf_increment) or the name of a timestamp channel. None adds no time column.
+        time_format (str): Format of the time column: iso (timestamps), epoch (seconds since 1970-01-01) or relative (seconds since the start of the waveform or the first timestamp).
+        layout (str): Layout of the converted files: wide (one file per group, one column per channel, shorter channels padded), channels (one file per channel) or long (one file per group with a channel, index, value row per value).
+    """
+
+    chunk_rows: Optional[int] = None
+    chunk_bytes: Optional[int] = None
+    group_workers: Optional[int] = 1
+    destination_file_format: str = "csv"
+    compression: Optional[str] = None
+    compression_level: Optional[int] = None
+    row_group_size: int = 1_000_000
+    write_statistics: bool = True
+    dataset_chunk_rows: int = 65_536
+    float_precision: Optional[int] = None
+    checkpoint: bool = False
+    checkpoint_interval: float = 10.0
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = 10 * 1024**3
+    groups: Optional[List[str]] = None
+    channels: Optional[List[str]] = None
+    row_start: int = 0
+    row_stop: Optional[int] = None
+    time_start: Optional[str] = None
+    time_stop: Optional[str] = None
+    decimation: Optional[str] = None
+    decimation_factor: int = 1
+    memory_map: bool = False
+    format_workers: int = 1
+    time_column: Optional[str] = None
+    time_format: str = "iso"
+    layout: str = "wide"
+
+
+def output_options(options: ConversionOptions) -> Dict[str, Any]:
+    """The options that affect the content of the converted files, leaving out those that only affect how the conversion runs.
+
+    Args:
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        Dict[str, Any]: Options keyed by name.
+    """
+    return {
+        name: value
+        for name, value in asdict(options).items()
+        if name not in RUNTIME_OPTIONS
+    }
@@ -0,0 +1,129 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, Optional, Tuple
+import queue
+import threading
+import numpy as np
+
+# Chunks read ahead of the formatters, and chunks being formatted ahead of the writer. The pipeline holds at most about twice this many chunks in memory.
+PIPELINE_QUEUE_SIZE = 4
+# Seconds between two checks of the stop flag by the reader while the queue is full.
+STOP_POLL_INTERVAL = 0.1
+
+
+class ChunkPipeline:
+    """ChunkPipeline object for reading, formatting and writing the chunks of a group in overlapping stages. A reader thread reads the chunks ahead into a bounded queue, a pool of formatter threads formats them
+    and iterating the pipeline yields them formatted, in order, to the writer. The bounded queue and the bounded number of chunks being formatted hold the reader back when the writer is the slower side,
+    so memory stays bounded while reading from disk (which releases the GIL) overlaps formatting and writing.
+    With no formatter workers every stage runs in turn on the iterating thread, as a plain loop would.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[Tuple[int, Dict[str, np.ndarray]]],
+        format_chunk: Callable[[int, Dict[str, np.ndarray]], Any],
+        workers: int = 1,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+    ):
+        """Constructor for the ChunkPipeline. The threads are started by iterating the pipeline.
+
+        Args:
+            chunks (Iterable[Tuple[int, Dict[str, np.ndarray]]]): Chunks of the group, index of the first row and channel data keyed by channel name, e.g. from iter_group_chunks.
+            format_chunk (Callable[[int, Dict[str, np.ndarray]], Any]): Formats a chunk for the writer. Called from several threads at once, so it must not change any shared state.
+            workers (int, optional): Number of formatter threads. Defaults to 1, 0 runs every stage on the iterating thread.
+            queue_size (int, optional): Maximum number of chunks read ahead, and of chunks being formatted. Defaults to PIPELINE_QUEUE_SIZE.
+        """
+        self.chunks = chunks
+        self.format_chunk = format_chunk
+        self.workers = workers
+        self.queue_size = queue_size
+        self.read_queue = queue.Queue(maxsize=queue_size)
+        self.formatting: Deque[Tuple[int, Dict[str, np.ndarray], Future]] = deque()
+        self.stopped = threading.Event()
+        self.reader: Optional[threading.Thread] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict[str, np.ndarray], Any]]:
+        """Run the pipeline.
+
+        Raises:
+            Exception: Any error raised while reading or formatting a chunk.
+
+        Yields:
+            Tuple[int, Dict[str, np.ndarray], Any]: Index of the first row of each chunk, its channel data and the chunk formatted by format_chunk, in the order of the chunks.
+        """
+        if self.workers < 1:
+            for start, data in self.chunks:
+                yield start, data, self.format_chunk(start, data)
+            return
+
+        self.reader = threading.Thread(target=self.read, daemon=True)
+        self.reader.start()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        read_all = False
+        while True:
+            # Hand the formatters every chunk read so far, only waiting for the reader when there is nothing left to write.
+            while not read_all and len(self.formatting) < self.queue_size:
+                try:
+                    item = self.read_queue.get(block=not self.formatting)
+                except queue.Empty:
+                    break
+                if item is None:
+                    read_all = True
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    start, data = item
+                    self.formatting.append(
+                        (start, data, self.executor.submit(self.format_chunk, *item))
+                    )
+            if not self.formatting:
+                return
+            start, data, future = self.formatting.popleft()
+            yield start, data, future.result()
+
+    def read(self) -> None:
+        """Body of the reader thread. Queues the chunks, then None once they have all been read, or the error that stopped the reading."""
+        try:
+            for chunk in self.chunks:
+                if not self.put(chunk):
+                    return
+        except Exception as error:
+            self.put(error)
+            return
+        self.put(None)
+
+    def put(self, item: Any) -> bool:
+        """Queue an item for the formatters, waiting while the queue is full.
+
+        Args:
+            item (Any): Chunk, None or error.
+
+        Returns:
+            bool: Whether the item was queued, False if the pipeline was closed meanwhile.
+        """
+        while not self.stopped.is_set():
+            try:
+                self.read_queue.put(item, timeout=STOP_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def close(self) -> None:
+        """Stop the threads, e.g. when the writer stops early because the conversion was cancelled. Chunks not formatted yet are dropped."""
+        self.stopped.set()
+        for _, _, future in self.formatting:
+            future.cancel()
+        self.formatting.clear()
+        if self.reader is not None:
+            self.reader.join()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def __enter__(self) -> ChunkPipeline:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+import time
+
+# Progress is reported at most this many times per second, so fast conversions do not flood the GUI with signals.
+MAX_UPDATES_PER_SECOND = 20
+
+
+@dataclass
+class ProgressUpdate:
+    """Snapshot of the progress of a conversion.
+
+    Attributes:
+        rows_done (int): Rows converted so far, over all groups.
+        total_rows (int): Rows of all groups.
+        bytes_done (int): Bytes of channel data converted so far.
+        total_bytes (int): Bytes of channel data of all groups.
+        elapsed (float): Seconds since the conversion started.
+    """
+
+    rows_done: int
+    total_rows: int
+    bytes_done: int
+    total_bytes: int
+    elapsed: float
+
+    @property
+    def percent(self) -> int:
+        """Percentage of the data converted, based on bytes so that wide and narrow groups weigh correctly."""
+        if self.total_bytes:
+            return min(100, int(100 * self.bytes_done / self.total_bytes))
+        if self.total_rows:
+            return min(100, int(100 * self.rows_done / self.total_rows))
+        return 100
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Throughput in bytes of channel data per second."""
+        return self.bytes_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput in rows per second."""
+        return self.rows_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the conversion is done, or None before the throughput is known."""
+        if self.bytes_per_second <= 0:
+            return None
+        return max(0.0, (self.total_bytes - self.bytes_done) / self.bytes_per_second)
+
+
+class ProgressTracker:
+    """ProgressTracker object for accumulating the progress of a conversion and reporting it at a limited rate."""
+
+    def __init__(
+        self,
+        total_rows: int,
+        total_bytes: int,
+        callback: Optional[Callable[[ProgressUpdate], None]],
+        max_updates_per_second: float = MAX_UPDATES_PER_SECOND,
+    ):
+        """Constructor for the ProgressTracker. The totals are computed up front from the metadata of the file.
+
+        Args:
+            total_rows (int): Rows of all groups.
+            total_bytes (int): Bytes of channel data of all groups.
+            callback (Optional[Callable[[ProgressUpdate], None]]): Called with the progress, at most max_updates_per_second times per second.
+            max_updates_per_second (float, optional): Maximum reporting rate. Defaults to MAX_UPDATES_PER_SECOND.
+        """
+        self.total_rows = total_rows
+        self.total_bytes = total_bytes
+        self.callback = callback
+        self.min_interval = 1 / max_updates_per_second
+        self.rows_done = 0
+        self.bytes_done = 0
+        self.start_time = time.monotonic()
+        self.last_report = None
+
+    def advance(self, rows: int, nbytes: int) -> None:
+        """Add the rows and bytes of a converted chunk and report the progress if enough time has passed since the last report.
+
+        Args:
+            rows (int): Rows of the chunk.
+            nbytes (int): Bytes of channel data of the chunk.
+        """
+        self.rows_done += rows
+        self.bytes_done += nbytes
+        now = time.monotonic()
+        if self.last_report is None or now - self.last_report >= self.min_interval:
+            self.report(now)
+
+    def finish(self) -> None:
+        """Report the conversion as complete regardless of the reporting rate. Reports still in flight from worker processes are not waited for."""
+        self.rows_done = self.total_rows
+        self.bytes_done = self.total_bytes
+        self.report(time.monotonic())
+
+    def report(self, now: float) -> None:
+        """Pass the current progress to the callback.
+
+        Args:
+            now (float): Current time of the monotonic clock.
+        """
+        self.last_report = now
+        if self.callback is not None:
+            self.callback(
+                ProgressUpdate(
+                    self.rows_done,
+                    self.total_rows,
+                    self.bytes_done,
+                    self.total_bytes,
+                    now - self.start_time,
+                )
+            )
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Format a number of seconds as h:mm:ss.
+
+    Args:
+        seconds (Optional[float]): Number of seconds, None when unknown.
+
+    Returns:
+        str: Formatted duration, or "--:--" when unknown.
+    """
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
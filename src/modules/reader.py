@@ -0,0 +1,177 @@
+from nptdms import TdmsFile, TdmsGroup, TdmsChannel
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+import numpy as np
+
+from .mmap_reader import MappedTdmsFile
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def open_tdms(
+    file_path: str, memory_map: bool = False
+) -> Union[TdmsFile, MappedTdmsFile]:
+    """Open a .tdms file for streaming its data, without reading the data up front. Both kinds of files are context managers and their groups and channels are used the same way.
+
+    Args:
+        file_path (str): Path to the .tdms file.
+        memory_map (bool, optional): Whether to read the data through a memory map of the file (see MappedTdmsFile) rather than through file reads. Defaults to False.
+
+    Returns:
+        Union[TdmsFile, MappedTdmsFile]: The opened file.
+    """
+    if memory_map:
+        return MappedTdmsFile(file_path)
+    return TdmsFile.open(file_path)
+
+
+def group_length(group: TdmsGroup) -> int:
+    """Number of rows in a group, i.e. the length of its longest channel. Only the metadata is used so no data is read.
+
+    Args:
+        group (TdmsGroup): Group inside a .tdms file.
+
+    Returns:
+        int: Number of rows.
+    """
+    return max((len(channel) for channel in group.channels()), default=0)
+
+
+def channel_itemsize(channel: TdmsChannel) -> int:
+    """Size in bytes of a single value of a channel once it has been read into memory.
+
+    Args:
+        channel (TdmsChannel): Channel inside a .tdms file.
+
+    Returns:
+        int: Number of bytes per value.
+    """
+    try:
+        return np.dtype(channel.dtype).itemsize
+    except TypeError:
+        return 8
+
+
+def group_byte_count(group: TdmsGroup, rows: Optional[int] = None) -> int:
+    """Number of bytes of the data of a group once read into memory. Only the metadata is used so no data is read.
+
+    Args:
+        group (TdmsGroup): Group inside a .tdms file.
+        rows (Optional[int], optional): Only count the first rows of the group. Defaults to None, which counts all of them.
+
+    Returns:
+        int: Number of bytes.
+    """
+    return sum(
+        (len(channel) if rows is None else min(len(channel), rows))
+        * channel_itemsize(channel)
+        for channel in group.channels()
+    )
+
+
+def chunk_byte_count(data: Dict[str, np.ndarray]) -> int:
+    """Number of bytes of a chunk of channel data, counted the same way as group_byte_count.
+
+    Args:
+        data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+
+    Returns:
+        int: Number of bytes.
+    """
+    return sum(len(values) * values.dtype.itemsize for values in data.values())
+
+
+def json_safe_properties(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert TDMS property values (numpy scalars, timestamps) into plain values that can be stored as JSON.
+
+    Args:
+        properties (Dict[str, Any]): Properties of a TDMS object.
+
+    Returns:
+        Dict[str, Any]: Properties with plain Python values.
+    """
+    safe_properties = {}
+    for name, value in properties.items():
+        if isinstance(value, np.generic) and not isinstance(value, np.datetime64):
+            value = value.item()
+        if not isinstance(value, (str, int, float, bool, type(None))):
+            value = str(value)
+        safe_properties[name] = value
+    return safe_properties
+
+
+def group_metadata(tdms_file: TdmsFile, group: TdmsGroup) -> Dict[str, Any]:
+    """Collect the properties of the file, the group and its channels, for writers that can keep them as metadata.
+
+    Args:
+        tdms_file (TdmsFile): The .tdms file.
+        group (TdmsGroup): Group inside the .tdms file.
+
+    Returns:
+        Dict[str, Any]: Properties under the keys file, group and channels (keyed by channel name), and the name of the group.
+    """
+    return {
+        "group_name": group.name,
+        "file": json_safe_properties(tdms_file.properties),
+        "group": json_safe_properties(group.properties),
+        "channels": {
+            channel.name: json_safe_properties(channel.properties)
+            for channel in group.channels()
+        },
+    }
+
+
+def chunk_row_count(
+    group: TdmsGroup,
+    chunk_rows: Optional[int] = None,
+    chunk_bytes: Optional[int] = None,
+) -> int:
+    """Number of rows to read per chunk. The chunk size can be given either in rows or in bytes, in which case it is divided by the in-memory size of a whole row of the group.
+
+    Args:
+        group (TdmsGroup): Group inside a .tdms file.
+        chunk_rows (Optional[int], optional): Number of rows per chunk. Defaults to None.
+        chunk_bytes (Optional[int], optional): Approximate number of bytes per chunk. Defaults to None.
+
+    Raises:
+        ValueError: If both chunk sizes are given or if the chunk size is not positive.
+
+    Returns:
+        int: Number of rows per chunk.
+    """
+    if chunk_rows is not None and chunk_bytes is not None:
+        raise ValueError("Specify the chunk size either in rows or in bytes, not both.")
+    if chunk_rows is not None:
+        if chunk_rows < 1:
+            raise ValueError("Chunk size must be at least one row.")
+        return chunk_rows
+    if chunk_bytes is not None:
+        if chunk_bytes < 1:
+            raise ValueError("Chunk size must be at least one byte.")
+        row_bytes = sum(channel_itemsize(channel) for channel in group.channels())
+        return max(1, chunk_bytes // max(row_bytes, 1))
+    return DEFAULT_CHUNK_ROWS
+
+
+def iter_group_chunks(
+    group: TdmsGroup,
+    rows_per_chunk: int,
+    first_row: int = 0,
+    stop_row: Optional[int] = None,
+) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+    """Stream the data of a group as consecutive windows of rows. Every channel is sliced for the same window so only one chunk of the group is held in memory at a time.
+    Channels shorter than the group yield shorter (or empty) arrays for the windows past their end.
+
+    Args:
+        group (TdmsGroup): Group inside a .tdms file opened with open_tdms.
+        rows_per_chunk (int): Number of rows per window.
+        first_row (int, optional): Index of the row to start from, e.g. when resuming a conversion. Defaults to 0.
+        stop_row (Optional[int], optional): Index of the row to stop before. Defaults to None, i.e. the end of the group.
+
+    Yields:
+        Iterator[Tuple[int, Dict[str, np.ndarray]]]: Index of the first row of the window and the channel data keyed by channel name.
+    """
+    length = group_length(group) if stop_row is None else stop_row
+    channels = group.channels()
+    for start in range(first_row, length, rows_per_chunk):
+        stop = min(start + rows_per_chunk, length)
+        yield start, {channel.name: channel[start:stop] for channel in channels}
@@ -0,0 +1,219 @@
+from fnmatch import fnmatchcase
+from nptdms import TdmsFile, TdmsGroup, TdmsChannel
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import numpy as np
+
+from .options import ConversionOptions
+
+
+class ChannelWindow:
+    """ChannelWindow object for a window of rows of a channel. It can be used wherever the channel is (len, slicing, name, dtype, properties), with row 0 being the first row of the window.
+    Slicing the window slices the channel, so with a file opened by TdmsFile.open only the segments holding the window are read and the rest of the file is skipped.
+    """
+
+    def __init__(
+        self, channel: TdmsChannel, start: int = 0, stop: Optional[int] = None
+    ):
+        """Constructor for the ChannelWindow.
+
+        Args:
+            channel (TdmsChannel): Channel inside a .tdms file.
+            start (int, optional): Index of the first row of the window. Defaults to 0.
+            stop (Optional[int], optional): Index of the row the window stops before. Defaults to None, i.e. the end of the channel.
+        """
+        self.channel = channel
+        self.name = channel.name
+        self.dtype = channel.dtype
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        length = (
+            len(self.channel)
+            if self.stop is None
+            else min(len(self.channel), self.stop)
+        )
+        return max(0, length - self.start)
+
+    def __getitem__(self, rows: slice) -> np.ndarray:
+        start, stop, _ = rows.indices(len(self))
+        return self.channel[self.start + start : self.start + stop]
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """Properties of the channel. The start time of a waveform is moved to the first row of the window."""
+        properties = dict(self.channel.properties)
+        increment = properties.get("wf_increment")
+        start_time = properties.get("wf_start_time")
+        if self.start and increment and isinstance(start_time, np.datetime64):
+            properties["wf_start_time"] = start_time + np.timedelta64(
+                round(self.start * increment * 1e9), "ns"
+            )
+        return properties
+
+
+class GroupSelection:
+    """GroupSelection object for the channels selected in a group. It can be used wherever the group is (name, properties, channels). Its output name is the name of the group in the names of the converted files."""
+
+    def __init__(
+        self,
+        group: TdmsGroup,
+        channels: List[ChannelWindow],
+        output_name: Optional[str] = None,
+    ):
+        """Constructor for the GroupSelection.
+
+        Args:
+            group (TdmsGroup): Group inside a .tdms file.
+            channels (List[ChannelWindow]): Selected channels.
+            output_name (Optional[str], optional): Name of the selection in the names of the converted files. Defaults to None, i.e. the name of the group.
+        """
+        self.group = group
+        self.name = group.name
+        self.output_name = output_name or group.name
+        self.properties = group.properties
+        self._channels = channels
+
+    def channels(self) -> List[ChannelWindow]:
+        """Selected channels, in the order of the group."""
+        return self._channels
+
+
+def matches(name: str, patterns: Optional[List[str]]) -> bool:
+    """Whether a name matches any of a list of names or glob patterns.
+
+    Args:
+        name (str): Name of a group or channel.
+        patterns (Optional[List[str]]): Names or glob patterns. None matches every name.
+
+    Returns:
+        bool: Whether the name matches.
+    """
+    return patterns is None or any(fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def select_groups(
+    tdms_file: TdmsFile, options: ConversionOptions
+) -> List[GroupSelection]:
+    """Select the groups, channels and rows of a file set in the options. Groups without any selected channel are left out. With the channels layout every selected channel is a selection of its own, converted to a file of its own.
+
+    Args:
+        tdms_file (TdmsFile): The .tdms file.
+        options (ConversionOptions): Conversion options.
+
+    Raises:
+        ValueError: If a time range is selected in a group without waveform channels.
+
+    Returns:
+        List[GroupSelection]: Selected groups.
+    """
+    selections = []
+    for group in tdms_file.groups():
+        if matches(group.name, options.groups):
+            selection = select_group(group, options)
+            if options.layout == "channels":
+                selections.extend(
+                    GroupSelection(
+                        group, [channel], output_name(group.name, channel.name)
+                    )
+                    for channel in selection.channels()
+                )
+            elif selection.channels():
+                selections.append(selection)
+    return selections
+
+
+def output_name(group_name: str, channel_name: Optional[str] = None) -> str:
+    """Name of a group, or of a channel of the group with the channels layout, in the names of the converted files.
+
+    Args:
+        group_name (str): Name of the group.
+        channel_name (Optional[str], optional): Name of the channel. Defaults to None.
+
+    Returns:
+        str: Name of the converted part of the file.
+    """
+    return group_name if channel_name is None else f"{group_name}_{channel_name}"
+
+
+def select_group(
+    group: TdmsGroup, options: ConversionOptions, channel_name: Optional[str] = None
+) -> GroupSelection:
+    """Select the channels and rows of a group set in the options.
+
+    Args:
+        group (TdmsGroup): Group inside a .tdms file.
+        options (ConversionOptions): Conversion options.
+        channel_name (Optional[str], optional): Only keep this channel of the selection, as a selection of its own (channels layout). Defaults to None.
+
+    Raises:
+        ValueError: If a time range is selected in a group without waveform channels.
+
+    Returns:
+        GroupSelection: Selected channels.
+    """
+    channels = [
+        channel
+        for channel in group.channels()
+        if matches(channel.name, options.channels)
+    ]
+    start, stop = options.row_start, options.row_stop
+    if channels and (options.time_start is not None or options.time_stop is not None):
+        time_start_row, time_stop_row = time_window(
+            channels, options.time_start, options.time_stop
+        )
+        start = max(start, time_start_row)
+        if time_stop_row is not None:
+            stop = time_stop_row if stop is None else min(stop, time_stop_row)
+    windows = [ChannelWindow(channel, start, stop) for channel in channels]
+    if channel_name is not None:
+        return GroupSelection(
+            group,
+            [window for window in windows if window.name == channel_name],
+            output_name(group.name, channel_name),
+        )
+    return GroupSelection(group, windows)
+
+
+def time_window(
+    channels: List[TdmsChannel], time_start: Optional[str], time_stop: Optional[str]
+) -> Tuple[int, Optional[int]]:
+    """Convert a time range to a range of rows, using the waveform properties (wf_start_time, wf_increment) of the first channel that has them.
+
+    Args:
+        channels (List[TdmsChannel]): Channels of a group.
+        time_start (Optional[str]): Start of the range, in seconds since the start of the waveform or as an ISO 8601 timestamp. None starts at the first row.
+        time_stop (Optional[str]): End of the range (excluded), in the same forms. None stops at the last row.
+
+    Raises:
+        ValueError: If none of the channels is a waveform, or a timestamp is given for a waveform without start time.
+
+    Returns:
+        Tuple[int, Optional[int]]: Index of the first row and of the row the range stops before (None for the end).
+    """
+    for channel in channels:
+        increment = channel.properties.get("wf_increment")
+        if increment:
+            start_time = channel.properties.get("wf_start_time")
+            break
+    else:
+        raise ValueError(
+            "Selecting a time range requires waveform channels (with a wf_increment property)"
+        )
+
+    def row(value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            if not isinstance(start_time, np.datetime64):
+                raise ValueError(
+                    f"Cannot select from {value}, the waveform {channel.name} has no start time"
+                )
+            seconds = (np.datetime64(value) - start_time) / np.timedelta64(1, "s")
+        # Rows whose time is at or after the value, allowing for rounding errors of the increment.
+        return max(0, math.ceil(seconds / increment - 1e-9))
+
+    return row(time_start) or 0, row(time_stop)
@@ -0,0 +1,526 @@
+from nptdms import TdmsGroup
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import math
+import numpy as np
+
+from .options import DECIMATION_METHODS, LAYOUTS, TIME_FORMATS, ConversionOptions
+
+# Name of the time column, placed before the channels, and the source of times computed from the waveform properties.
+TIME_COLUMN = "time"
+WAVEFORM_TIME = "waveform"
+UNIX_EPOCH = np.datetime64(0, "ns")
+
+
+def block_reduce(
+    values: np.ndarray, factor: int, reduce: Callable[[np.ndarray], np.ndarray]
+) -> np.ndarray:
+    """Reduce consecutive blocks of values to one value each. The values are reshaped into a (blocks, factor) array so the reduction runs once over the whole chunk, a last partial block is reduced on its own.
+
+    Args:
+        values (np.ndarray): Values of a channel.
+        factor (int): Number of values per block.
+        reduce (Callable[[np.ndarray], np.ndarray]): Reduction of a 2D array of blocks along axis 1.
+
+    Returns:
+        np.ndarray: One value per block.
+    """
+    full = len(values) // factor * factor
+    parts = [reduce(values[:full].reshape(-1, factor))]
+    if full < len(values):
+        parts.append(reduce(values[full:].reshape(1, -1)))
+    return np.concatenate(parts)
+
+
+def block_mean(blocks: np.ndarray) -> np.ndarray:
+    """Mean of each block."""
+    return blocks.mean(axis=1)
+
+
+def block_rms(blocks: np.ndarray) -> np.ndarray:
+    """Root mean square of each block."""
+    return np.sqrt(np.square(blocks, dtype=np.float64).mean(axis=1))
+
+
+def block_min(blocks: np.ndarray) -> np.ndarray:
+    """Minimum of each block."""
+    return blocks.min(axis=1)
+
+
+def block_max(blocks: np.ndarray) -> np.ndarray:
+    """Maximum of each block."""
+    return blocks.max(axis=1)
+
+
+class Decimator:
+    """Decimator object for downsampling the chunks of a group while they are streamed, by a factor of decimation_factor rows.
+    nth keeps the first value of each block, mean and rms replace the block by its mean or root mean square and minmax by two columns, <channel>_min and <channel>_max, forming an envelope.
+    Values that cannot be averaged (timestamps, strings) keep the first value of each block. Chunks must start at a multiple of the factor, so that a block never spans two chunks and chunks can be decimated independently,
+    including after resuming. A channel that ends within a block gets a last value for the partial block.
+    """
+
+    def __init__(self, method: str, factor: int):
+        """Constructor for the Decimator.
+
+        Args:
+            method (str): Decimation method, one of DECIMATION_METHODS.
+            factor (int): Number of rows per block.
+
+        Raises:
+            ValueError: If the method is not supported or the factor is not positive.
+        """
+        if method not in DECIMATION_METHODS:
+            raise ValueError(f"Unsupported decimation method: {method}")
+        if factor < 1:
+            raise ValueError("Decimation factor must be at least 1.")
+        self.method = method
+        self.factor = factor
+
+    def aligned_chunk_rows(self, rows_per_chunk: int) -> int:
+        """Round a chunk size to a multiple of the factor, so that every chunk starts at a block boundary.
+
+        Args:
+            rows_per_chunk (int): Number of rows per chunk.
+
+        Returns:
+            int: Number of rows per chunk, a multiple of the factor.
+        """
+        return max(self.factor, rows_per_chunk // self.factor * self.factor)
+
+    def columns(self, columns: Dict[str, np.dtype]) -> Dict[str, np.dtype]:
+        """Columns of the decimated data.
+
+        Args:
+            columns (Dict[str, np.dtype]): Column names and data types of the group.
+
+        Returns:
+            Dict[str, np.dtype]: Column names and data types after decimation.
+        """
+        decimated = {}
+        for name, dtype in columns.items():
+            dtype = np.dtype(dtype)
+            if self.method == "nth" or not is_numeric(dtype):
+                decimated[name] = dtype
+            elif self.method == "minmax":
+                decimated[f"{name}_min"] = dtype
+                decimated[f"{name}_max"] = dtype
+            else:
+                decimated[name] = np.dtype("float64")
+        return decimated
+
+    def metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Properties of the decimated data. The sampling interval (wf_increment) of the channels grows by the factor, min/max columns get the properties of their channel.
+
+        Args:
+            metadata (Dict[str, Any]): Properties of the file, group and channels.
+
+        Returns:
+            Dict[str, Any]: Properties after decimation.
+        """
+        channels = {}
+        for name, properties in metadata.get("channels", {}).items():
+            properties = dict(properties)
+            if isinstance(properties.get("wf_increment"), (int, float)):
+                properties["wf_increment"] *= self.factor
+            properties["decimation"] = f"{self.method} {self.factor}"
+            if self.method == "minmax":
+                channels[f"{name}_min"] = channels[f"{name}_max"] = properties
+            channels[name] = properties
+        return {**metadata, "channels": channels}
+
+    def decimate(
+        self, start: int, data: Dict[str, np.ndarray]
+    ) -> Tuple[int, Dict[str, np.ndarray]]:
+        """Decimate a chunk.
+
+        Args:
+            start (int): Index of the first row of the chunk, a multiple of the factor.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+
+        Returns:
+            Tuple[int, Dict[str, np.ndarray]]: Index of the first decimated row and the decimated data keyed by column name.
+        """
+        decimated = {}
+        for name, values in data.items():
+            if self.method == "nth" or not is_numeric(values.dtype):
+                decimated[name] = values[:: self.factor]
+            elif self.method == "minmax":
+                decimated[f"{name}_min"] = block_reduce(values, self.factor, block_min)
+                decimated[f"{name}_max"] = block_reduce(values, self.factor, block_max)
+            elif self.method == "mean":
+                decimated[name] = block_reduce(values, self.factor, block_mean)
+            else:
+                decimated[name] = block_reduce(values, self.factor, block_rms)
+        return start // self.factor, decimated
+
+
+def is_numeric(dtype: np.dtype) -> bool:
+    """Whether values of a data type can be averaged.
+
+    Args:
+        dtype (np.dtype): Data type of a channel.
+
+    Returns:
+        bool: Whether the data type is a number.
+    """
+    return np.dtype(dtype).kind in "iuf"
+
+
+def open_decimator(options: ConversionOptions) -> Optional[Decimator]:
+    """Create the decimator set in the options.
+
+    Args:
+        options (ConversionOptions): Conversion options.
+
+    Raises:
+        ValueError: If the decimation method is not supported or the factor is not positive.
+
+    Returns:
+        Optional[Decimator]: Decimator, or None if the data is not decimated.
+    """
+    if options.decimation is None or options.decimation_factor == 1:
+        return None
+    return Decimator(options.decimation, options.decimation_factor)
+
+
+class TimeColumn:
+    """TimeColumn object for adding a time column to the chunks of a group. The times of a chunk are computed from its row indices with numpy arithmetic when it is streamed, so no time axis is ever built for the whole group.
+    Times come either from the waveform properties (wf_start_time + row * wf_increment) or from a timestamp channel. iso times are datetime64[ns] values (written like DataFrame.to_csv does in csv files, timestamps in parquet and HDF5 files),
+    epoch times are seconds since 1970-01-01 and relative times are seconds since the start of the waveform or the first timestamp of the channel. The column is added after decimation, so the time of a block is the time of its first row.
+    """
+
+    def __init__(
+        self,
+        time_format: str,
+        increment: Optional[float] = None,
+        start_time: Optional[np.datetime64] = None,
+        start_seconds: float = 0.0,
+        channel_name: Optional[str] = None,
+        first_time: Optional[np.datetime64] = None,
+    ):
+        """Constructor for the TimeColumn. Either the increment (waveform times) or the channel name (timestamp channel) is given.
+
+        Args:
+            time_format (str): Format of the times, one of TIME_FORMATS.
+            increment (Optional[float], optional): Seconds between two rows of the chunks. Defaults to None.
+            start_time (Optional[np.datetime64], optional): Time of row 0 of the chunks, needed by the iso and epoch formats of waveform times. Defaults to None.
+            start_seconds (float, optional): Relative time of row 0 of the chunks, i.e. seconds since the start of the waveform. Defaults to 0.0.
+            channel_name (Optional[str], optional): Name of the timestamp channel. Defaults to None.
+            first_time (Optional[np.datetime64], optional): First timestamp of the channel, origin of relative times. Defaults to None.
+        """
+        self.time_format = time_format
+        self.increment = increment
+        self.start_time = start_time
+        self.start_seconds = start_seconds
+        self.channel_name = channel_name
+        self.first_time = first_time
+
+    def columns(self, columns: Dict[str, np.dtype]) -> Dict[str, np.dtype]:
+        """Columns of the data with the time column.
+
+        Args:
+            columns (Dict[str, np.dtype]): Column names and data types of the group.
+
+        Raises:
+            ValueError: If a channel is already named like the time column.
+
+        Returns:
+            Dict[str, np.dtype]: The time column followed by the columns of the group.
+        """
+        if TIME_COLUMN in columns:
+            raise ValueError(
+                f"Cannot add a time column, the group already has a channel named {TIME_COLUMN}"
+            )
+        dtype = np.dtype("datetime64[ns]" if self.time_format == "iso" else "float64")
+        return {TIME_COLUMN: dtype, **columns}
+
+    def add(
+        self, start: int, data: Dict[str, np.ndarray]
+    ) -> Tuple[int, Dict[str, np.ndarray]]:
+        """Add the time column to a chunk.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+
+        Returns:
+            Tuple[int, Dict[str, np.ndarray]]: Index of the first row and the data with the time column first.
+        """
+        if self.channel_name is not None:
+            times = self.channel_times(data[self.channel_name])
+        else:
+            rows = max((len(values) for values in data.values()), default=0)
+            times = self.waveform_times(start, rows)
+        return start, {TIME_COLUMN: times, **data}
+
+    def waveform_times(self, start: int, rows: int) -> np.ndarray:
+        """Times of consecutive rows of a waveform.
+
+        Args:
+            start (int): Index of the first row.
+            rows (int): Number of rows.
+
+        Returns:
+            np.ndarray: Times of the rows.
+        """
+        seconds = np.arange(start, start + rows, dtype=np.float64) * self.increment
+        if self.time_format == "relative":
+            return seconds + self.start_seconds
+        if self.time_format == "epoch":
+            return seconds + (self.start_time - UNIX_EPOCH) / np.timedelta64(1, "s")
+        return self.start_time + np.rint(seconds * 1e9).astype(np.int64).astype(
+            "timedelta64[ns]"
+        )
+
+    def channel_times(self, values: np.ndarray) -> np.ndarray:
+        """Times of the values of a timestamp channel.
+
+        Args:
+            values (np.ndarray): Timestamps.
+
+        Returns:
+            np.ndarray: Times of the values.
+        """
+        if self.time_format == "relative":
+            return (values - self.first_time) / np.timedelta64(1, "s")
+        if self.time_format == "epoch":
+            return (values - UNIX_EPOCH) / np.timedelta64(1, "s")
+        return values.astype("datetime64[ns]")
+
+
+def open_time_column(
+    group: TdmsGroup, options: ConversionOptions, decimator: Optional[Decimator] = None
+) -> Optional[TimeColumn]:
+    """Create the time column set in the options for a group.
+
+    Args:
+        group (TdmsGroup): Group inside a .tdms file, or a selection of it (whose row 0 is the first selected row).
+        options (ConversionOptions): Conversion options.
+        decimator (Optional[Decimator], optional): Decimator of the chunks, the time column is then added to the decimated chunks. Defaults to None.
+
+    Raises:
+        ValueError: If the time format is not supported, the group has no waveform channel (or no start time for iso and epoch times), or the timestamp channel is not among the selected channels of the group.
+
+    Returns:
+        Optional[TimeColumn]: Time column, or None if no time column is added.
+    """
+    if options.time_column is None:
+        return None
+    if options.time_format not in TIME_FORMATS:
+        raise ValueError(f"Unsupported time format: {options.time_format}")
+    factor = decimator.factor if decimator is not None else 1
+
+    if options.time_column != WAVEFORM_TIME:
+        channel = next(
+            (
+                channel
+                for channel in group.channels()
+                if channel.name == options.time_column
+            ),
+            None,
+        )
+        if channel is None or np.dtype(channel.dtype).kind != "M":
+            raise ValueError(
+                f"{options.time_column} is not a selected timestamp channel of group {group.name}"
+            )
+        first_time = channel[0:1]
+        return TimeColumn(
+            options.time_format,
+            channel_name=channel.name,
+            first_time=first_time[0] if len(first_time) else None,
+        )
+
+    for channel in group.channels():
+        increment = channel.properties.get("wf_increment")
+        if increment:
+            break
+    else:
+        raise ValueError(
+            f"A waveform time column requires waveform channels (with a wf_increment property) in group {group.name}"
+        )
+    start_time = channel.properties.get("wf_start_time")
+    if options.time_format != "relative" and not isinstance(start_time, np.datetime64):
+        raise ValueError(
+            f"The waveform {channel.name} has no start time, only relative times can be computed"
+        )
+    # Row 0 of a selection is not the first row of the waveform, its start time is already moved (see ChannelWindow).
+    return TimeColumn(
+        options.time_format,
+        increment=float(increment) * factor,
+        start_time=start_time,
+        start_seconds=getattr(channel, "start", 0) * float(increment),
+    )
+
+
+class LongLayout:
+    """LongLayout object for reshaping the chunks of a group to the long (tidy) layout: one row per value, holding the name of its channel, its index in the channel and the value.
+    Short channels then take as many rows as they have values instead of being padded to the length of the longest channel. The rows of a chunk are its channels one after the other,
+    so the rows of a channel are spread over the file in blocks of the chunk size. A time column, if any, is kept next to the index.
+    """
+
+    def __init__(self, columns: Dict[str, np.dtype], lengths: Dict[str, int]):
+        """Constructor for the LongLayout.
+
+        Args:
+            columns (Dict[str, np.dtype]): Column names and data types of the chunks, e.g. after decimation.
+            lengths (Dict[str, int]): Number of values of each column, in the rows of the chunks.
+
+        Raises:
+            ValueError: If the values of the channels cannot share a column, e.g. numbers and strings.
+        """
+        self.lengths = lengths
+        self.value_dtype = long_value_dtype(
+            [dtype for name, dtype in columns.items() if name != TIME_COLUMN]
+        )
+        self.time_dtype = columns.get(TIME_COLUMN)
+
+    def columns(self) -> Dict[str, np.dtype]:
+        """Columns of the reshaped data.
+
+        Returns:
+            Dict[str, np.dtype]: Column names and data types.
+        """
+        columns = {"channel": np.dtype("O"), "index": np.dtype("int64")}
+        if self.time_dtype is not None:
+            columns[TIME_COLUMN] = np.dtype(self.time_dtype)
+        columns["value"] = self.value_dtype
+        return columns
+
+    def offset(self, start: int) -> int:
+        """Number of long rows of the rows before a row of the group.
+
+        Args:
+            start (int): Index of a row of the group.
+
+        Returns:
+            int: Index of the first long row of that row.
+        """
+        return sum(min(length, start) for length in self.lengths.values())
+
+    def reshape(
+        self, start: int, data: Dict[str, np.ndarray]
+    ) -> Tuple[int, Dict[str, np.ndarray]]:
+        """Reshape a chunk to the long layout.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by column name.
+
+        Returns:
+            Tuple[int, Dict[str, np.ndarray]]: Index of the first long row of the chunk and its long rows keyed by column name.
+        """
+        names = [name for name in data if name != TIME_COLUMN]
+        counts = [len(data[name]) for name in names]
+        reshaped = {
+            "channel": np.repeat(np.array(names, dtype=object), counts),
+            "index": np.concatenate(
+                [np.arange(start, start + count, dtype=np.int64) for count in counts]
+            ),
+        }
+        if TIME_COLUMN in data:
+            reshaped[TIME_COLUMN] = np.concatenate(
+                [padded(data[TIME_COLUMN], count) for count in counts]
+            )
+        reshaped["value"] = np.concatenate(
+            [data[name].astype(self.value_dtype, copy=False) for name in names]
+        )
+        return self.offset(start), reshaped
+
+
+def long_value_dtype(dtypes: List[np.dtype]) -> np.dtype:
+    """Data type of the value column of the long layout: the common type of numeric channels, or the type shared by every channel.
+
+    Args:
+        dtypes (List[np.dtype]): Data types of the channels.
+
+    Raises:
+        ValueError: If the channels have types that cannot share a column.
+
+    Returns:
+        np.dtype: Data type of the values.
+    """
+    dtypes = [np.dtype(dtype) for dtype in dtypes]
+    if all(dtype.kind in "biuf" for dtype in dtypes):
+        return np.result_type(*dtypes)
+    if len(set(dtypes)) == 1:
+        return dtypes[0]
+    raise ValueError(
+        f"Channels of types {', '.join(sorted({str(dtype) for dtype in dtypes}))} cannot share the value column of the long layout, use the channels layout instead"
+    )
+
+
+def padded(values: np.ndarray, length: int) -> np.ndarray:
+    """Cut or pad values to a length. Missing values are NaT for timestamps and NaN otherwise.
+
+    Args:
+        values (np.ndarray): Values, e.g. of a time column.
+        length (int): Length of the result.
+
+    Returns:
+        np.ndarray: The first length values, padded if there are fewer.
+    """
+    if len(values) >= length:
+        return values[:length]
+    missing = np.datetime64("NaT") if values.dtype.kind == "M" else np.nan
+    return np.concatenate(
+        [values, np.full(length - len(values), missing, dtype=values.dtype)]
+    )
+
+
+def open_long_layout(
+    group: TdmsGroup,
+    columns: Dict[str, np.dtype],
+    options: ConversionOptions,
+    decimator: Optional[Decimator] = None,
+) -> Optional[LongLayout]:
+    """Create the long layout of a group, if it is the layout set in the options.
+
+    Args:
+        group (TdmsGroup): Group inside a .tdms file, or a selection of it.
+        columns (Dict[str, np.dtype]): Column names and data types of the chunks, after decimation and with the time column if any.
+        options (ConversionOptions): Conversion options.
+        decimator (Optional[Decimator], optional): Decimator of the chunks, which are then reshaped once decimated. Defaults to None.
+
+    Raises:
+        ValueError: If the layout is not supported, or the values of the channels cannot share a column.
+
+    Returns:
+        Optional[LongLayout]: Long layout of the group, or None for the other layouts.
+    """
+    if options.layout not in LAYOUTS:
+        raise ValueError(f"Unsupported layout: {options.layout}")
+    if options.layout != "long":
+        return None
+    lengths = {}
+    for channel in group.channels():
+        names = [channel.name]
+        length = len(channel)
+        if decimator is not None:
+            names = list(decimator.columns({channel.name: channel.dtype}))
+            length = math.ceil(length / decimator.factor)
+        lengths.update((name, length) for name in names)
+    return LongLayout(columns, lengths)
+
+
+def check_long_layout(groups: List[TdmsGroup], options: ConversionOptions) -> None:
+    """Check that every group can be reshaped to the long layout set in the options, before any of them is converted, so that a group whose channels cannot share the value column fails the file up front instead of midway with the files of the groups before it left behind.
+
+    Args:
+        groups (List[TdmsGroup]): Groups to convert, or selections of them.
+        options (ConversionOptions): Conversion options.
+
+    Raises:
+        ValueError: If the layout is not supported, or the values of the channels of a group cannot share a column.
+    """
+    if options.layout not in LAYOUTS:
+        raise ValueError(f"Unsupported layout: {options.layout}")
+    if options.layout != "long":
+        return
+    decimator = open_decimator(options)
+    for group in groups:
+        columns = {channel.name: channel.dtype for channel in group.channels()}
+        if decimator is not None:
+            columns = decimator.columns(columns)
+        try:
+            long_value_dtype(list(columns.values()))
+        except ValueError as error:
+            raise ValueError(f"Group {group.name}: {error}") from None
@@ -1,7 +1,6 @@
-from PyQt5.QtCore import QObject, pyqtSignal
 from pathlib import Path
-from nptdms import TdmsFile
-import numpy as np
+from typing import Iterable, List
+import glob
 
 
 def file_valid(file_path: str) -> bool:
@@ -21,19 +20,32 @@ def file_valid(file_path: str) -> bool:
         return False
 
 
+def split_sources(source_text: str) -> List[str]:
+    """Split the text of the source browser into the individual sources. Several files or directories are separated by semicolons.
+
+    Args:
+        source_text (str): Text from the text box of the source browser.
+
+    Returns:
+        List[str]: Individual source paths.
+    """
+    return [source.strip() for source in source_text.split(";") if source.strip()]
+
+
 def assess_paths(source_file: str, destination_path: str) -> str:
     """Assess whether the source and destination paths in the browser text boxes are valid.
 
     Args:
-        source_file (str): Path to the source file.
+        source_file (str): Path to the source file. Several files or directories can be separated by semicolons.
         destination_path (str): The destination directory.
 
     Returns:
         str: Appropriate string according to the path assessment.
     """
-    if not file_valid(source_file) and not Path(destination_path).is_dir():
+    source_valid = bool(collect_source_files(split_sources(source_file)))
+    if not source_valid and not Path(destination_path).is_dir():
         return "Both source and destination are invalid."
-    elif not file_valid(source_file):
+    elif not source_valid:
         return "Source file is not valid."
     elif not Path(destination_path).is_dir():
         return "Destination path is not valid."
@@ -52,7 +64,7 @@ def construct_destination_file_path(
     Args:
         destination_dir (str): Destination directory.
         source_file_path (str): Source file path.
-        destination_file_format (str): Destination file format. i.e. csv
+        destination_file_format (str): Destination file format, which is also the extension. i.e. csv or csv.gz
         group_name (str): Group name of the groups inside the .tdms files.
 
     Returns:
@@ -64,54 +76,24 @@ def construct_destination_file_path(
     return f"{Path(destination_dir)/destination_file_name}"
 
 
-class Worker(QObject):
-    """Worker object for running the .tdms conversion using threads to prevent the app from hanging."""
-
-    conversion_finished = pyqtSignal()
-    conversion_failed = pyqtSignal()
-    conversion_progress = pyqtSignal(int)
-    conversion_group = pyqtSignal(str)
-    cancel_finished = pyqtSignal()
-
-    def tdms_convertor(
-        self,
-        source_file_path: str,
-        destination_dir: str,
-    ) -> None:
-        """Function for converting the .tdms file.
-
-        Args:
-            source_file_path (str): Path to the source file.
-            destination_dir (str): Destination directory.
-        """
-        try:
-            with TdmsFile.open(source_file_path) as tdms_file:
-                for group in tdms_file.groups():
-                    self.conversion_group.emit(group.name)
-                    group_df = group.as_dataframe()
-                    segments = np.array_split(group_df.index, 101)
-
-                    for count, chunk in enumerate(segments):
-                        if count == 0:
-                            group_df.loc[chunk].to_csv(
-                                construct_destination_file_path(
-                                    destination_dir, source_file_path, "csv", group.name
-                                ),
-                                sep=",",
-                                mode="w",
-                                index=True,
-                            )
-                        else:
-                            group_df.loc[chunk].to_csv(
-                                construct_destination_file_path(
-                                    destination_dir, source_file_path, "csv", group.name
-                                ),
-                                header=None,
-                                sep=",",
-                                mode="a",
-                                index=True,
-                            )
-                        self.conversion_progress.emit(count)
-            self.conversion_finished.emit()
-        except:
-            self.conversion_failed.emit()
+def collect_source_files(sources: Iterable[str], recursive: bool = False) -> List[str]:
+    """Expand a mix of file paths, directories and glob patterns into a sorted list of .tdms files without duplicates.
+
+    Args:
+        sources (Iterable[str]): File paths, directories or glob patterns.
+        recursive (bool, optional): Whether to also search the sub-directories of directories and allow ** in glob patterns. Defaults to False.
+
+    Returns:
+        List[str]: Paths to the .tdms files found.
+    """
+    found = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            pattern = "**/*.tdms" if recursive else "*.tdms"
+            found.extend(str(file_path) for file_path in path.glob(pattern))
+        elif path.is_file():
+            found.append(str(path))
+        else:
+            found.extend(glob.glob(source, recursive=recursive))
+    return sorted({file_path for file_path in found if file_valid(file_path)})
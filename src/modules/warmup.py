@@ -0,0 +1,34 @@
+from typing import Iterable
+import importlib
+import threading
+
+# Modules of the conversion, which load the data stack (nptdms, numpy). The optional dependencies of the writers (pyarrow, h5py, zstandard) are left to the writers that need them.
+WARM_UP_MODULES = (".converter", ".batch", ".inspector")
+
+
+def warm_up(modules: Iterable[str] = WARM_UP_MODULES) -> threading.Thread:
+    """Import the conversion modules on a background thread, so that the window of the app shows up with only PyQt loaded and the data stack is ready by the time the first conversion starts.
+    A conversion started before the warm up is done simply waits for the imports to finish.
+
+    Args:
+        modules (Iterable[str], optional): Names of the modules, relative to this package. Defaults to WARM_UP_MODULES.
+
+    Returns:
+        threading.Thread: The warm up thread, already started.
+    """
+    thread = threading.Thread(target=import_modules, args=(modules,), daemon=True)
+    thread.start()
+    return thread
+
+
+def import_modules(modules: Iterable[str]) -> None:
+    """Import modules, skipping those that cannot be imported: the conversion reports the missing dependency itself when it runs.
+
+    Args:
+        modules (Iterable[str]): Names of the modules, relative to this package.
+    """
+    for module in modules:
+        try:
+            importlib.import_module(module, __package__)
+        except ImportError:
+            pass
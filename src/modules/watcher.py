@@ -0,0 +1,394 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import ctypes
+import ctypes.util
+import multiprocessing
+import os
+import queue
+import select
+import struct
+import time
+import uuid
+
+from .batch import FileResult, convert_file_safely
+from .control import ConversionCancelled, ConversionControl
+from .converter import init_worker_process
+from .options import ConversionOptions
+
+# inotify events of a file being written to or moved into a watched directory.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_EVENT = struct.Struct("iIII")
+
+PROCESSING_DIR = ".processing"
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+
+
+class InotifyWatcher:
+    """InotifyWatcher object for reporting the .tdms files written to or moved into a set of directories, through the Linux inotify API so that the directories are never rescanned."""
+
+    def __init__(self, directories: Iterable[str]):
+        """Constructor for the InotifyWatcher.
+
+        Args:
+            directories (Iterable[str]): Directories to watch (not recursively).
+
+        Raises:
+            OSError: If inotify is not available, e.g. on other platforms than Linux.
+        """
+        library = ctypes.util.find_library("c")
+        if library is None:
+            raise OSError("inotify is not available")
+        libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        for directory in directories:
+            descriptor = libc.inotify_add_watch(
+                self.fd,
+                os.fsencode(directory),
+                IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE,
+            )
+            if descriptor < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+            self.directories[descriptor] = directory
+
+    def poll(self, timeout: float) -> List[str]:
+        """Wait for events.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            List[str]: Paths to the .tdms files that changed, possibly repeated.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        buffer = os.read(self.fd, 64 * 1024)
+        changed = []
+        offset = 0
+        while offset < len(buffer):
+            descriptor, _, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(buffer[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if name.endswith(".tdms") and descriptor in self.directories:
+                changed.append(str(Path(self.directories[descriptor]) / name))
+        return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """PollingWatcher object for reporting the .tdms files of a set of directories by listing them periodically. Used where inotify is not available or does not see the writes, e.g. on network shares."""
+
+    def __init__(self, directories: Iterable[str]):
+        """Constructor for the PollingWatcher.
+
+        Args:
+            directories (Iterable[str]): Directories to watch (not recursively).
+        """
+        self.directories = list(directories)
+
+    def poll(self, timeout: float) -> List[str]:
+        """Wait, then list the directories.
+
+        Args:
+            timeout (float): Number of seconds to wait.
+
+        Returns:
+            List[str]: Paths to all the .tdms files, changed or not.
+        """
+        time.sleep(timeout)
+        return list_tdms_files(self.directories)
+
+    def close(self) -> None:
+        """Stop watching."""
+
+
+def list_tdms_files(directories: Iterable[str]) -> List[str]:
+    """List the .tdms files directly inside a set of directories.
+
+    Args:
+        directories (Iterable[str]): Directories to list.
+
+    Returns:
+        List[str]: Paths to the .tdms files.
+    """
+    return [
+        entry.path
+        for directory in directories
+        for entry in os.scandir(directory)
+        if entry.name.endswith(".tdms") and entry.is_file()
+    ]
+
+
+def open_watcher(directories: List[str], polling: bool = False):
+    """Watch directories with inotify, falling back to polling where it is not available.
+
+    Args:
+        directories (List[str]): Directories to watch.
+        polling (bool, optional): Whether to poll even if inotify is available. Defaults to False.
+
+    Returns:
+        InotifyWatcher or PollingWatcher: Watcher with poll and close methods.
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(directories)
+        except OSError:
+            pass
+    return PollingWatcher(directories)
+
+
+def move_aside(file_path: str, directory: str) -> str:
+    """Move a file into a directory, next to its .tdms_index file if it has one. An existing file of the same name is not overwritten, the file gets a timestamp suffix instead.
+
+    Args:
+        file_path (str): Path to the file.
+        directory (str): Directory to move it into, created if needed.
+
+    Returns:
+        str: New path to the file.
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    path = Path(file_path)
+    destination = Path(directory) / path.name
+    if destination.exists():
+        destination = destination.with_name(
+            f"{path.stem}.{time.strftime('%Y%m%dT%H%M%S')}{path.suffix}"
+        )
+    os.replace(path, destination)
+    index_path = Path(str(path) + "_index")
+    if index_path.exists():
+        os.replace(index_path, str(destination) + "_index")
+    return str(destination)
+
+
+def claim(file_path: str, directory: str) -> str:
+    """Claim a file by moving it into a directory of its own inside the .processing directory of its watched directory, so that it keeps its name, which the converted files are named after,
+    even while another file of the same name is being converted.
+
+    Args:
+        file_path (str): Path to the file.
+        directory (str): Watched directory of the file.
+
+    Raises:
+        FileNotFoundError: If the file has been removed or claimed in the meantime.
+
+    Returns:
+        str: Path to the claimed file.
+    """
+    claim_dir = Path(directory) / PROCESSING_DIR / uuid.uuid4().hex
+    try:
+        return move_aside(file_path, str(claim_dir))
+    except FileNotFoundError:
+        claim_dir.rmdir()
+        raise
+
+
+def release(processing_path: str, directory: str) -> str:
+    """Move a claimed file out of the .processing directory and remove the directory it was claimed into.
+
+    Args:
+        processing_path (str): Path to the claimed file.
+        directory (str): Directory to move it into.
+
+    Returns:
+        str: New path to the file.
+    """
+    file_path = move_aside(processing_path, directory)
+    claim_dir = Path(processing_path).parent
+    if claim_dir.name != PROCESSING_DIR:
+        try:
+            claim_dir.rmdir()
+        except OSError:
+            pass
+    return file_path
+
+
+class WatchFolder:
+    """WatchFolder object for the long running service that converts every .tdms file dropped into a set of directories.
+    Files are converted once their size and modification time have not changed for stable_seconds. They then wait in a bounded priority queue (oldest first) for a pool of worker processes.
+    When the queue is full new files are left in place until there is room again, so a burst of files never piles up in memory. A file is claimed by moving it into a directory of its own inside a .processing directory,
+    which keeps it from being picked up twice while it keeps its name, and is moved to the done or failed directory once converted.
+    """
+
+    def __init__(
+        self,
+        directories: List[str],
+        destination_dir: str,
+        options: Optional[ConversionOptions] = None,
+        max_workers: Optional[int] = None,
+        queue_size: int = 100,
+        stable_seconds: float = 5.0,
+        poll_interval: float = 1.0,
+        polling: bool = False,
+        done_dir: Optional[str] = None,
+        failed_dir: Optional[str] = None,
+        on_result: Optional[Callable[[FileResult], None]] = None,
+        control: Optional[ConversionControl] = None,
+    ):
+        """Constructor for the WatchFolder.
+
+        Args:
+            directories (List[str]): Directories to watch (not recursively).
+            destination_dir (str): Destination directory.
+            options (Optional[ConversionOptions], optional): Conversion options. Defaults to None.
+            max_workers (Optional[int], optional): Number of worker processes. Defaults to None, i.e. the number of CPUs.
+            queue_size (int, optional): Maximum number of stable files waiting for a worker. Defaults to 100.
+            stable_seconds (float, optional): Number of seconds a file must stay unchanged before it is converted. Defaults to 5.0.
+            poll_interval (float, optional): Seconds between two checks of the files and workers, and between two listings when polling. Defaults to 1.0.
+            polling (bool, optional): Whether to list the directories instead of using inotify. Defaults to False.
+            done_dir (Optional[str], optional): Directory for the converted source files. Defaults to None, i.e. a done directory inside each watched directory.
+            failed_dir (Optional[str], optional): Directory for the source files that failed. Defaults to None, i.e. a failed directory inside each watched directory.
+            on_result (Optional[Callable[[FileResult], None]], optional): Called with the result of each file, with the path to where the source file was moved. Defaults to None.
+            control (Optional[ConversionControl], optional): Control for stopping or pausing the service, shared with the worker processes. Defaults to None.
+        """
+        self.directories = [str(Path(directory)) for directory in directories]
+        self.destination_dir = destination_dir
+        # The files are spread over the processes, so each file's groups are converted one after another.
+        self.options = replace(options or ConversionOptions(), group_workers=1)
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.queue = queue.PriorityQueue(maxsize=queue_size)
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.polling = polling
+        self.done_dir = done_dir
+        self.failed_dir = failed_dir
+        self.on_result = on_result
+        self.control = control or ConversionControl()
+        # Files seen but not queued yet: their size and modification time, and since when they have been unchanged.
+        self.pending: Dict[str, Tuple[int, int, float]] = {}
+        self.queued: Set[str] = set()
+        # Files being converted: their future and the directory they were dropped into.
+        self.running: Dict[str, Tuple[Future, str]] = {}
+
+    def run(self) -> None:
+        """Watch and convert until the control is cancelled. Files left in .processing directories by a previous run are put back first, conversions still running when the service stops are cancelled and their files put back too."""
+        for directory in self.directories:
+            processing_dir = Path(directory) / PROCESSING_DIR
+            if processing_dir.is_dir():
+                # Files claimed by older versions were moved into the .processing directory itself.
+                claim_dirs = [processing_dir] + [
+                    path for path in processing_dir.iterdir() if path.is_dir()
+                ]
+                for file_path in list_tdms_files(map(str, claim_dirs)):
+                    release(file_path, directory)
+
+        watcher = open_watcher(self.directories, self.polling)
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=init_worker_process,
+            initargs=(None, self.control),
+        )
+        try:
+            self.track(list_tdms_files(self.directories))
+            while not self.control.cancelled:
+                self.track(watcher.poll(self.poll_interval))
+                self.enqueue_stable_files()
+                if not self.control.paused:
+                    self.submit(executor)
+                self.collect()
+        finally:
+            self.control.cancel()
+            watcher.close()
+            executor.shutdown(wait=True)
+            self.collect()
+
+    def track(self, file_paths: List[str]) -> None:
+        """Start tracking the stability of files that are neither tracked nor queued yet. Running files are not reported, as they have been moved.
+
+        Args:
+            file_paths (List[str]): Paths to the files reported by the watcher.
+        """
+        for file_path in file_paths:
+            if file_path not in self.pending and file_path not in self.queued:
+                self.pending[file_path] = (-1, -1, time.monotonic())
+
+    def enqueue_stable_files(self) -> None:
+        """Move the files that have been unchanged for stable_seconds from pending to the queue, as long as it has room."""
+        now = time.monotonic()
+        for file_path, (size, mtime, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                # Claimed or removed in the meantime.
+                del self.pending[file_path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                self.pending[file_path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif now - since >= self.stable_seconds:
+                try:
+                    self.queue.put_nowait((stat.st_mtime_ns, file_path))
+                except queue.Full:
+                    return
+                del self.pending[file_path]
+                self.queued.add(file_path)
+
+    def submit(self, executor: ProcessPoolExecutor) -> None:
+        """Claim queued files and hand them to the worker processes, as long as one is idle.
+
+        Args:
+            executor (ProcessPoolExecutor): Pool of worker processes.
+        """
+        while len(self.running) < self.max_workers and not self.queue.empty():
+            _, file_path = self.queue.get_nowait()
+            self.queued.discard(file_path)
+            directory = str(Path(file_path).parent)
+            try:
+                processing_path = claim(file_path, directory)
+            except FileNotFoundError:
+                continue
+            future = executor.submit(
+                convert_file_safely,
+                processing_path,
+                self.destination_dir,
+                self.options,
+            )
+            self.running[processing_path] = (future, directory)
+
+    def collect(self) -> None:
+        """Move the files whose conversion is over to the done or failed directory, or back to the watched directory if it was cancelled, and report their result."""
+        for processing_path, (future, directory) in list(self.running.items()):
+            if not future.done():
+                continue
+            del self.running[processing_path]
+            try:
+                result = future.result()
+            except (ConversionCancelled, KeyboardInterrupt):
+                release(processing_path, directory)
+                continue
+            except Exception as error:
+                if self.control.cancelled:
+                    release(processing_path, directory)
+                    continue
+                # The worker process itself died, e.g. it ran out of memory.
+                result = FileResult(
+                    processing_path, error=f"{type(error).__name__}: {error}"
+                )
+
+            if result.succeeded:
+                target_dir = self.done_dir or str(Path(directory) / DONE_DIR)
+            else:
+                target_dir = self.failed_dir or str(Path(directory) / FAILED_DIR)
+            result.source_file_path = release(processing_path, target_dir)
+            if self.on_result is not None:
+                self.on_result(result)
+
+    def stop(self) -> None:
+        """Stop the service. Running conversions are cancelled at their next chunk."""
+        self.control.cancel()
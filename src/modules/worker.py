@@ -0,0 +1,131 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from pathlib import Path
+from typing import List, Optional
+
+from .control import ConversionCancelled, ConversionControl
+from .options import ConversionOptions
+
+# The conversion modules (batch, converter, inspector) load nptdms and numpy. They are imported when a job runs, on the thread of the worker, so that the window shows up without them (see warmup.py).
+
+
+class Worker(QObject):
+    """Worker object for running the .tdms conversion using threads to prevent the app from hanging."""
+
+    conversion_finished = pyqtSignal()
+    conversion_failed = pyqtSignal()
+    conversion_progress = pyqtSignal(object)
+    cancel_finished = pyqtSignal()
+
+    def __init__(self, *args, **kwargs):
+        """Constructor for the Worker. The control can be used from the GUI thread to cancel, pause or resume the conversion."""
+        QObject.__init__(self, *args, **kwargs)
+        self.control = ConversionControl()
+
+    def tdms_convertor(
+        self,
+        source_file_path: str,
+        destination_dir: str,
+        options: Optional[ConversionOptions] = None,
+    ) -> None:
+        """Function for converting the .tdms file. The conversion itself is done by convert_file and its progress, aggregated over all the groups, is relayed through the signals.
+
+        Args:
+            source_file_path (str): Path to the source file.
+            destination_dir (str): Destination directory.
+            options (Optional[ConversionOptions], optional): Conversion options. Defaults to None.
+        """
+        try:
+            from .converter import convert_file
+
+            convert_file(
+                source_file_path,
+                destination_dir,
+                options,
+                on_progress=self.conversion_progress.emit,
+                control=self.control,
+            )
+            self.conversion_finished.emit()
+        except ConversionCancelled:
+            self.cancel_finished.emit()
+        except:
+            self.conversion_failed.emit()
+
+
+class BatchWorker(QObject):
+    """Worker object for converting many .tdms files in parallel using a pool of processes, run on a thread to prevent the app from hanging."""
+
+    file_converted = pyqtSignal(int, int, int)
+    batch_finished = pyqtSignal(int, list)
+    cancel_finished = pyqtSignal()
+
+    def __init__(self, *args, **kwargs):
+        """Constructor for the BatchWorker. The control can be used from the GUI thread to cancel, pause or resume the batch."""
+        QObject.__init__(self, *args, **kwargs)
+        self.control = ConversionControl()
+
+    def convert_batch(
+        self,
+        source_files: List[str],
+        destination_dir: str,
+        options: Optional[ConversionOptions] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """Function for converting the .tdms files. Progress is emitted each time a file is done.
+
+        Args:
+            source_files (List[str]): Paths to the source files.
+            destination_dir (str): Destination directory.
+            options (Optional[ConversionOptions], optional): Conversion options. Defaults to None.
+            max_workers (Optional[int], optional): Number of worker processes. Defaults to None, i.e. the number of CPUs.
+        """
+        from .batch import FileResult, convert_files
+
+        failed_files = []
+
+        def track_result(result: FileResult, done: int, total: int) -> None:
+            if not result.succeeded:
+                failed_files.append(result.source_file_path)
+            self.file_converted.emit(done, total, len(failed_files))
+
+        try:
+            results = convert_files(
+                source_files,
+                destination_dir,
+                options,
+                max_workers,
+                track_result,
+                self.control,
+            )
+        except ConversionCancelled:
+            self.cancel_finished.emit()
+            return
+        self.batch_finished.emit(len(results) - len(failed_files), failed_files)
+
+
+class InspectWorker(QObject):
+    """Worker object for inspecting .tdms files on a thread, as building their index reads the metadata of every segment, which can take a while for large files or files on a network share."""
+
+    inspection_finished = pyqtSignal(list)
+    inspection_failed = pyqtSignal(str)
+
+    def inspect_files(
+        self, source_files: List[str], options: Optional[ConversionOptions] = None
+    ) -> None:
+        """Function for inspecting the .tdms files. The reports are emitted once every file has been inspected, or the error of the first file that could not be.
+
+        Args:
+            source_files (List[str]): Paths to the source files.
+            options (Optional[ConversionOptions], optional): Conversion options the estimates are made for. Defaults to None.
+        """
+        from .inspector import inspect_file
+
+        reports = []
+        for source_file_path in source_files:
+            try:
+                reports.append(inspect_file(source_file_path, options))
+            except Exception as error:
+                self.inspection_failed.emit(
+                    f"{Path(source_file_path).name}: {type(error).__name__}: {error}"
+                )
+                return
+        self.inspection_finished.emit(reports)
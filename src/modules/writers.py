@@ -0,0 +1,926 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, TextIO, Tuple
+import io
+import json
+import os
+import queue
+import shutil
+import threading
+import uuid
+import numpy as np
+
+from .options import CSV_COMPRESSION_EXTENSIONS, ConversionOptions
+
+CSV_BUFFER_SIZE = 1 << 20
+CSV_LINE_TERMINATOR = os.linesep
+CSV_SPECIAL_CHARACTERS = (",", '"', "\r", "\n")
+# Blocks of formatted csv waiting to be compressed. Formatting blocks once this many are queued, so memory stays bounded when compression is the slower side.
+COMPRESSION_QUEUE_SIZE = 8
+# Default gzip level: several times faster than the level 6 of zlib (and 9 of the gzip module) for files less than 10% larger, so compression keeps up with formatting.
+GZIP_LEVEL = 1
+# zlib window bits that write a gzip header and trailer.
+GZIP_WINDOW_BITS = 31
+ZSTD_LEVEL = 3
+# Default xz preset, for the same reason: the default preset 6 of lzma is over ten times slower than formatting.
+XZ_PRESET = 1
+
+
+class CsvWriter:
+    """CsvWriter object for writing the chunks of a group to a single csv file. The file is kept open (and buffered) for the whole group and each chunk is formatted column by column straight from the channel arrays, without building DataFrames.
+    Double precision floats are written with their shortest exact representation (Python's repr), which takes most of the formatting time: on float channels the writer is only about twice as fast as DataFrame.to_csv, while float_precision makes it several times faster (see benchmarks/csv_writer.py).
+    """
+
+    resumable = True
+    # Formatting csv runs Python code that holds the GIL, so formatter threads beyond one only contend for it: measured slower with 4 threads than with 1.
+    max_format_workers: Optional[int] = 1
+
+    def __init__(
+        self,
+        file_path: str,
+        columns: Dict[str, np.dtype],
+        metadata: Dict[str, Any],
+        options: ConversionOptions,
+        resume: Optional[Dict[str, Any]] = None,
+    ):
+        """Constructor for the CsvWriter. Opens (and truncates) the destination file and writes the header, or reopens it for appending when resuming.
+
+        Args:
+            file_path (str): Path to the destination csv file.
+            columns (Dict[str, np.dtype]): Column names, i.e. the channel names of the group, and their data types.
+            metadata (Dict[str, Any]): Properties of the file, group and channels. Not stored in csv files.
+            options (ConversionOptions): Conversion options. float_precision switches floats to a fixed number of significant digits.
+            resume (Optional[Dict[str, Any]], optional): Checkpoint to resume from. Whatever was written past its offset is discarded. Defaults to None.
+        """
+        self.file_path = file_path
+        self.columns = list(columns)
+        self.float_format = (
+            "%r" if options.float_precision is None else f"%.{options.float_precision}g"
+        )
+        if resume is not None:
+            os.truncate(file_path, resume["offset"])
+            self.file = open(file_path, "a", newline="", buffering=CSV_BUFFER_SIZE)
+            return
+        self.file = self.open_file(file_path, options)
+        self.file.write(
+            ",".join(csv_quote(name) for name in [""] + self.columns)
+            + CSV_LINE_TERMINATOR
+        )
+
+    def open_file(self, file_path: str, options: ConversionOptions) -> TextIO:
+        """Open (and truncate) the destination file for writing text.
+
+        Args:
+            file_path (str): Path to the destination csv file.
+            options (ConversionOptions): Conversion options.
+
+        Returns:
+            TextIO: Buffered text file.
+        """
+        return open(file_path, "w", newline="", buffering=CSV_BUFFER_SIZE)
+
+    def write(self, start: int, data: Dict[str, np.ndarray]) -> None:
+        """Append a chunk of rows to the csv file.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+        """
+        self.write_formatted(self.format_chunk(start, data))
+
+    def format_chunk(self, start: int, data: Dict[str, np.ndarray]) -> str:
+        """Format a chunk of rows as csv text. Channels that are shorter than the chunk are padded with empty cells. Does not change the writer, so chunks can be formatted by several threads at once.
+        The chunk is split wherever a channel ends, so within each part every column is either complete or empty and the rows can be formatted with a single format string.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+
+        Returns:
+            str: Rows of the chunk.
+        """
+        rows = max((len(values) for values in data.values()), default=0)
+        bounds = sorted(
+            {0, rows} | {len(values) for values in data.values() if len(values) < rows}
+        )
+
+        parts = []
+        for part_start, part_stop in zip(bounds[:-1], bounds[1:]):
+            formats = ["%d"]
+            values = [range(start + part_start, start + part_stop)]
+            for name in self.columns:
+                if len(data[name]) >= part_stop:
+                    column_format, column_values = self.format_column(
+                        data[name][part_start:part_stop]
+                    )
+                    formats.append(column_format)
+                    values.append(column_values)
+                else:
+                    formats.append("")
+            row_format = ",".join(formats) + CSV_LINE_TERMINATOR
+            parts.append("".join(map(row_format.__mod__, zip(*values))))
+        return "".join(parts)
+
+    def write_formatted(self, text: str) -> None:
+        """Append rows formatted by format_chunk to the csv file, in the order of the chunks.
+
+        Args:
+            text (str): Rows of a chunk.
+        """
+        self.file.write(text)
+
+    def format_column(self, column: np.ndarray) -> Tuple[str, list]:
+        """Choose how a column is formatted. Integers and double precision floats are passed to the row format string as they are, other types are converted to strings in bulk first.
+
+        Args:
+            column (np.ndarray): Values of a channel.
+
+        Returns:
+            Tuple[str, list]: Format of the column in the row format string and its values.
+        """
+        kind = column.dtype.kind
+        if kind in "iu":
+            return "%d", column.tolist()
+        if kind == "f":
+            nan = np.isnan(column)
+            if column.dtype.itemsize == 8 or self.float_format != "%r":
+                if not nan.any():
+                    return self.float_format, column.tolist()
+                return "%s", [
+                    "" if is_nan else self.float_format % value
+                    for value, is_nan in zip(column.tolist(), nan.tolist())
+                ]
+            # Shortest representation of single precision floats.
+            return "%s", np.where(nan, "", column.astype(str)).tolist()
+        if kind == "b":
+            return "%s", column.tolist()
+        if kind == "M":
+            return "%s", format_timestamps(column)
+        return "%s", [csv_quote(value) for value in column.tolist()]
+
+    def commit(self) -> int:
+        """Flush the rows written so far to disk.
+
+        Returns:
+            int: Size in bytes of the destination file holding those rows.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.buffer.tell()
+
+    def close(self) -> None:
+        """Close the destination file."""
+        self.file.close()
+
+    def __enter__(self) -> CsvWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class CompressedCsvWriter(CsvWriter):
+    """CompressedCsvWriter object for writing the chunks of a group to a compressed csv file (.csv.gz, .csv.zst or .csv.xz, the codec follows the extension). The formatted text is compressed by a background thread,
+    so compressing a chunk overlaps formatting the next one (the codecs release the GIL while they compress, zstd also compresses on every core). A compressed stream cannot be cut back to a checkpoint, so a conversion to compressed csv is not resumable.
+    """
+
+    resumable = False
+
+    def __init__(
+        self,
+        file_path: str,
+        columns: Dict[str, np.dtype],
+        metadata: Dict[str, Any],
+        options: ConversionOptions,
+    ):
+        """Constructor for the CompressedCsvWriter. Opens (and truncates) the destination file and writes the header.
+
+        Args:
+            file_path (str): Path to the destination file, ending with the extension of the codec.
+            columns (Dict[str, np.dtype]): Column names, i.e. the channel names of the group, and their data types.
+            metadata (Dict[str, Any]): Properties of the file, group and channels. Not stored in csv files.
+            options (ConversionOptions): Conversion options. compression_level sets the level of the codec.
+
+        Raises:
+            ImportError: If the codec is zstd and zstandard is not installed.
+        """
+        super().__init__(file_path, columns, metadata, options)
+
+    def open_file(self, file_path: str, options: ConversionOptions) -> TextIO:
+        """Open (and truncate) the destination file for writing text through the codec of its extension.
+
+        Args:
+            file_path (str): Path to the destination file.
+            options (ConversionOptions): Conversion options.
+
+        Returns:
+            TextIO: Buffered text file, compressed in the background.
+        """
+        extension = Path(file_path).suffix[1:]
+        codec = {
+            extension: codec for codec, extension in CSV_COMPRESSION_EXTENSIONS.items()
+        }[extension]
+        stream = BackgroundCompressor(
+            open(file_path, "wb"), open_compressor(codec, options.compression_level)
+        )
+        return io.TextIOWrapper(
+            io.BufferedWriter(stream, buffer_size=CSV_BUFFER_SIZE), newline=""
+        )
+
+
+class BackgroundCompressor(io.RawIOBase):
+    """BackgroundCompressor object for compressing the bytes written to it from a background thread. Writes are queued in a bounded queue and return at once, the thread compresses them block by block, in order, and writes
+    the compressed data to the file. An error of the thread is raised by the next write or by close.
+    """
+
+    def __init__(self, file: BinaryIO, compressor: Any):
+        """Constructor for the BackgroundCompressor. Starts the thread.
+
+        Args:
+            file (BinaryIO): Destination file, opened for writing bytes. Closed when the BackgroundCompressor is closed.
+            compressor (Any): Compressor object with the compress and flush methods of zlib.compressobj, as returned by open_compressor.
+        """
+        super().__init__()
+        self.file = file
+        self.compressor = compressor
+        self.blocks = queue.Queue(maxsize=COMPRESSION_QUEUE_SIZE)
+        self.error = None
+        self.thread = threading.Thread(target=self.compress, daemon=True)
+        self.thread.start()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        """Queue a block of bytes for compression.
+
+        Args:
+            data (bytes): Block of bytes.
+
+        Returns:
+            int: Number of bytes queued, always the whole block.
+        """
+        self.raise_error()
+        # The caller may reuse its buffer once write returns.
+        self.blocks.put(bytes(data))
+        return len(data)
+
+    def compress(self) -> None:
+        """Body of the thread. Compresses the queued blocks until close queues None, then finishes the compressed data and closes the file. After an error the blocks are still taken, and dropped, so that writers never block."""
+        while True:
+            data = self.blocks.get()
+            if data is None:
+                break
+            if self.error is None:
+                try:
+                    self.file.write(self.compressor.compress(data))
+                except Exception as error:
+                    self.error = error
+        try:
+            if self.error is None:
+                self.file.write(self.compressor.flush())
+        except Exception as error:
+            self.error = error
+        finally:
+            self.file.close()
+
+    def raise_error(self) -> None:
+        """Raise the error of the thread, if any."""
+        if self.error is not None:
+            raise self.error
+
+    def close(self) -> None:
+        """Compress the blocks still queued, finish the compressed data and close the file."""
+        if not self.closed:
+            self.blocks.put(None)
+            self.thread.join()
+            super().close()
+            self.raise_error()
+
+
+def open_compressor(codec: str, level: Optional[int] = None) -> Any:
+    """Create a compressor for a codec. Each compressor takes whole blocks (compress) and finishes the compressed data (flush), so the background thread makes one call, which releases the GIL, per block.
+
+    Args:
+        codec (str): Codec, one of CSV_COMPRESSION_EXTENSIONS.
+        level (Optional[int], optional): Compression level. Defaults to None, i.e. GZIP_LEVEL for gzip, ZSTD_LEVEL for zstd and XZ_PRESET for xz.
+
+    Raises:
+        ImportError: If the codec is zstd and zstandard is not installed.
+        ValueError: If the codec is not supported.
+
+    Returns:
+        Any: Compressor object.
+    """
+    if codec == "gzip":
+        import zlib
+
+        return zlib.compressobj(
+            GZIP_LEVEL if level is None else level, zlib.DEFLATED, GZIP_WINDOW_BITS
+        )
+    if codec == "xz":
+        import lzma
+
+        return lzma.LZMACompressor(preset=XZ_PRESET if level is None else level)
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError(
+                "Writing zstd compressed files requires zstandard. Install it with: pip install zstandard"
+            ) from error
+        return zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL if level is None else level, threads=-1
+        ).compressobj()
+    raise ValueError(f"Unsupported csv compression: {codec}")
+
+
+def format_timestamps(column: np.ndarray) -> list:
+    """Format timestamps as csv cells the way DataFrame.to_csv does, so that files read by existing parsers do not change: a space between the date and the time, only the date when every timestamp is at midnight,
+    and as many digits of fraction (none, milliseconds, microseconds or nanoseconds) as the finest timestamp needs. Like to_csv, which the conversion used to call per chunk, the precision is chosen per chunk. NaT becomes an empty cell.
+
+    Args:
+        column (np.ndarray): Timestamps of a channel.
+
+    Returns:
+        list: Cells of the column.
+    """
+    nat = np.isnat(column)
+    values = column[~nat]
+    if not len(values):
+        return [""] * len(column)
+    seconds = values.astype("datetime64[s]")
+    fraction = (values - seconds).astype("timedelta64[ns]").astype(np.int64)
+    if fraction.any():
+        unit = (
+            "ns"
+            if (fraction % 1000).any()
+            else "us" if (fraction % 10**6).any() else "ms"
+        )
+    else:
+        unit = "s" if (seconds - seconds.astype("datetime64[D]")).any() else "D"
+    cells = np.full(len(column), "", dtype=object)
+    cells[~nat] = np.char.replace(np.datetime_as_string(values, unit=unit), "T", " ")
+    return cells.tolist()
+
+
+def csv_quote(value: Any) -> str:
+    """Convert a value to a csv cell, quoting it if it contains a separator, a quote or a line break.
+
+    Args:
+        value (Any): Value of the cell.
+
+    Returns:
+        str: Text of the cell.
+    """
+    text = "" if value is None else str(value)
+    if any(character in text for character in CSV_SPECIAL_CHARACTERS):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+class ParquetWriter:
+    """ParquetWriter object for streaming the chunks of a group into an Apache Parquet file. Chunks are buffered until a full row group can be written, so memory is bounded by the row group size.
+    Parquet files cannot be appended to once closed, so a conversion to parquet is not resumable.
+    """
+
+    resumable = False
+    max_format_workers: Optional[int] = None
+
+    def __init__(
+        self,
+        file_path: str,
+        columns: Dict[str, np.dtype],
+        metadata: Dict[str, Any],
+        options: ConversionOptions,
+    ):
+        """Constructor for the ParquetWriter. The TDMS properties are stored as JSON in the metadata of the schema (file and group properties) and of each field (channel properties).
+
+        Args:
+            file_path (str): Path to the destination parquet file.
+            columns (Dict[str, np.dtype]): Column names, i.e. the channel names of the group, and their data types.
+            metadata (Dict[str, Any]): Properties of the file, group and channels.
+            options (ConversionOptions): Conversion options. compression defaults to snappy.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError(
+                "Writing parquet files requires pyarrow. Install it with: pip install pyarrow"
+            ) from error
+
+        self.pa = pa
+        self.file_path = file_path
+        self.row_group_size = options.row_group_size
+        self.schema = arrow_schema(columns, metadata)
+        self.writer = pq.ParquetWriter(
+            file_path,
+            self.schema,
+            compression=options.compression or "snappy",
+            compression_level=options.compression_level,
+            write_statistics=options.write_statistics,
+        )
+        self.batches = []
+        self.buffered_rows = 0
+
+    def write(self, start: int, data: Dict[str, np.ndarray]) -> None:
+        """Append a chunk of rows.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+        """
+        self.write_formatted(self.format_chunk(start, data))
+
+    def format_chunk(self, start: int, data: Dict[str, np.ndarray]):
+        """Convert a chunk of rows to an Arrow record batch. Channels that are shorter than the chunk are padded with nulls. Does not change the writer, so chunks can be converted by several threads at once.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+
+        Returns:
+            pyarrow.RecordBatch: Rows of the chunk.
+        """
+        return record_batch(self.schema, data)
+
+    def write_formatted(self, batch) -> None:
+        """Append a record batch made by format_chunk, in the order of the chunks. Full row groups are written once enough rows are buffered.
+
+        Args:
+            batch (pyarrow.RecordBatch): Rows of a chunk.
+        """
+        self.batches.append(batch)
+        self.buffered_rows += batch.num_rows
+
+        if self.buffered_rows >= self.row_group_size:
+            self.flush(final=False)
+
+    def flush(self, final: bool = True) -> None:
+        """Write the buffered rows as row groups of row_group_size rows.
+
+        Args:
+            final (bool, optional): Whether to also write the remaining rows that do not fill a whole row group. Defaults to True.
+        """
+        table = self.pa.Table.from_batches(self.batches, self.schema)
+        written = 0
+        while self.buffered_rows - written >= self.row_group_size or (
+            final and written < self.buffered_rows
+        ):
+            row_group = table.slice(written, self.row_group_size)
+            self.writer.write_table(row_group, row_group_size=self.row_group_size)
+            written += len(row_group)
+        self.batches = table.slice(written).to_batches()
+        self.buffered_rows -= written
+
+    def close(self) -> None:
+        """Write the remaining rows and close the destination file."""
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self) -> ParquetWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class ArrowWriter:
+    """ArrowWriter object for writing the chunks of a group to an Arrow IPC file, i.e. a Feather (version 2) file. Each chunk becomes a record batch whose numeric and timestamp columns wrap the channel arrays without copying them,
+    so converting mostly comes down to writing the buffers to disk. Uncompressed files can be memory-mapped by readers (pyarrow.ipc.open_file over pyarrow.memory_map, arrow::read_feather in R) for random access without reading them.
+    Like parquet files, Arrow files cannot be appended to once closed, so a conversion to Arrow is not resumable.
+    """
+
+    resumable = False
+    max_format_workers: Optional[int] = None
+    # Whether to write the IPC stream format, which has no footer and so no random access, instead of the file format.
+    stream = False
+
+    def __init__(
+        self,
+        file_path: str,
+        columns: Dict[str, np.dtype],
+        metadata: Dict[str, Any],
+        options: ConversionOptions,
+    ):
+        """Constructor for the ArrowWriter. The TDMS properties are stored as JSON in the metadata of the schema and its fields, as in parquet files.
+
+        Args:
+            file_path (str): Path to the destination file.
+            columns (Dict[str, np.dtype]): Column names, i.e. the channel names of the group, and their data types.
+            metadata (Dict[str, Any]): Properties of the file, group and channels.
+            options (ConversionOptions): Conversion options. compression can be lz4 or zstd, defaults to none so that the file can be memory-mapped.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as error:
+            raise ImportError(
+                "Writing Arrow files requires pyarrow. Install it with: pip install pyarrow"
+            ) from error
+
+        self.file_path = file_path
+        self.schema = arrow_schema(columns, metadata)
+        compression = None
+        if options.compression not in (None, "none"):
+            compression = pa.Codec(options.compression, options.compression_level)
+        self.file = pa.OSFile(file_path, "wb")
+        open_ipc = pa.ipc.new_stream if self.stream else pa.ipc.new_file
+        self.writer = open_ipc(
+            self.file,
+            self.schema,
+            options=pa.ipc.IpcWriteOptions(compression=compression),
+        )
+
+    def write(self, start: int, data: Dict[str, np.ndarray]) -> None:
+        """Append a chunk of rows.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+        """
+        self.write_formatted(self.format_chunk(start, data))
+
+    def format_chunk(self, start: int, data: Dict[str, np.ndarray]):
+        """Wrap a chunk of rows in an Arrow record batch. Does not change the writer, so chunks can be wrapped by several threads at once.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+
+        Returns:
+            pyarrow.RecordBatch: Rows of the chunk.
+        """
+        return record_batch(self.schema, data)
+
+    def write_formatted(self, batch) -> None:
+        """Write a record batch made by format_chunk, in the order of the chunks.
+
+        Args:
+            batch (pyarrow.RecordBatch): Rows of a chunk.
+        """
+        self.writer.write_batch(batch)
+
+    def close(self) -> None:
+        """Write the footer (file format) or end of stream marker and close the destination file."""
+        try:
+            self.writer.close()
+        finally:
+            self.file.close()
+
+    def __enter__(self) -> ArrowWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class ArrowStreamWriter(ArrowWriter):
+    """ArrowStreamWriter object for writing the chunks of a group to an Arrow IPC stream (.arrows), for consumers that read record batches one after the other (pyarrow.ipc.open_stream, arrow::read_ipc_stream in R)."""
+
+    stream = True
+
+
+class Hdf5Writer:
+    """Hdf5Writer object for appending the chunks of a group to an HDF5 file. The TDMS group becomes an HDF5 group holding one chunked, resizable dataset per channel, which can then be sliced or memory-mapped directly."""
+
+    resumable = True
+    max_format_workers: Optional[int] = None
+
+    def __init__(
+        self,
+        file_path: str,
+        columns: Dict[str, np.dtype],
+        metadata: Dict[str, Any],
+        options: ConversionOptions,
+        resume: Optional[Dict[str, Any]] = None,
+    ):
+        """Constructor for the Hdf5Writer. The TDMS properties are stored as attributes of the file, group and datasets. Timestamps are stored as 64-bit integers with their unit in the attributes.
+
+        Args:
+            file_path (str): Path to the destination HDF5 file.
+            columns (Dict[str, np.dtype]): Column names, i.e. the channel names of the group, and their data types.
+            metadata (Dict[str, Any]): Properties of the file, group and channels, plus the name of the group.
+            options (ConversionOptions): Conversion options. compression can be gzip or lzf, defaults to none.
+            resume (Optional[Dict[str, Any]], optional): Checkpoint to resume from. The datasets are cut back to the rows it committed. Defaults to None.
+
+        Raises:
+            ImportError: If h5py is not installed.
+        """
+        try:
+            import h5py
+        except ImportError as error:
+            raise ImportError(
+                "Writing HDF5 files requires h5py. Install it with: pip install h5py"
+            ) from error
+
+        self.file_path = file_path
+        if resume is not None:
+            self.file = h5py.File(file_path, "a")
+            self.group = self.file[metadata.get("group_name", "data")]
+            self.datasets = {name: self.group[name] for name in columns}
+            for dataset in self.datasets.values():
+                if dataset.shape[0] > resume["rows"]:
+                    dataset.resize((resume["rows"],))
+            return
+
+        self.file = h5py.File(file_path, "w")
+        self.file.attrs.update(hdf5_attributes(metadata.get("file", {})))
+        self.group = self.file.create_group(metadata.get("group_name", "data"))
+        self.group.attrs.update(hdf5_attributes(metadata.get("group", {})))
+
+        compression = None if options.compression == "none" else options.compression
+        self.datasets = {}
+        for name, dtype in columns.items():
+            dtype = np.dtype(dtype)
+            if dtype.kind == "O":
+                storage_dtype = h5py.string_dtype()
+            elif dtype.kind == "M":
+                storage_dtype = np.dtype("int64")
+            else:
+                storage_dtype = dtype
+            dataset = self.group.create_dataset(
+                name,
+                shape=(0,),
+                maxshape=(None,),
+                dtype=storage_dtype,
+                chunks=(options.dataset_chunk_rows,),
+                compression=compression,
+                compression_opts=options.compression_level,
+            )
+            dataset.attrs.update(
+                hdf5_attributes(metadata.get("channels", {}).get(name, {}))
+            )
+            if dtype.kind == "M":
+                dataset.attrs["timestamp_unit"] = np.datetime_data(dtype)[0]
+            self.datasets[name] = dataset
+
+    def write(self, start: int, data: Dict[str, np.ndarray]) -> None:
+        """Append a chunk to the datasets.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+        """
+        self.write_formatted(self.format_chunk(start, data))
+
+    def format_chunk(
+        self, start: int, data: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """Convert a chunk to the storage types of the datasets: timestamps become 64-bit integers and empty channels are left out. Does not change the writer, so chunks can be converted by several threads at once.
+
+        Args:
+            start (int): Index of the first row of the chunk.
+            data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+
+        Returns:
+            Dict[str, np.ndarray]: Values to append keyed by dataset name.
+        """
+        return {
+            name: values.view("int64") if values.dtype.kind == "M" else values
+            for name, values in data.items()
+            if len(values)
+        }
+
+    def write_formatted(self, data: Dict[str, np.ndarray]) -> None:
+        """Append a chunk converted by format_chunk to the datasets, in the order of the chunks. Each dataset only grows by the length of its own channel, so shorter channels are not padded.
+
+        Args:
+            data (Dict[str, np.ndarray]): Values to append keyed by dataset name.
+        """
+        for name, values in data.items():
+            dataset = self.datasets[name]
+            length = dataset.shape[0]
+            dataset.resize((length + len(values),))
+            dataset[length:] = values
+
+    def commit(self) -> int:
+        """Flush the chunks written so far to disk.
+
+        Returns:
+            int: Size in bytes of the destination file holding them.
+        """
+        self.file.flush()
+        return os.path.getsize(self.file_path)
+
+    def close(self) -> None:
+        """Close the destination file."""
+        self.file.close()
+
+    def __enter__(self) -> Hdf5Writer:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def hdf5_attributes(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """TDMS properties as HDF5 attributes. Properties without a value are skipped as HDF5 attributes cannot be empty.
+
+    Args:
+        properties (Dict[str, Any]): JSON safe properties of a TDMS object.
+
+    Returns:
+        Dict[str, Any]: Attributes.
+    """
+    return {name: value for name, value in properties.items() if value is not None}
+
+
+def arrow_schema(columns: Dict[str, np.dtype], metadata: Dict[str, Any]):
+    """Arrow schema of the columns of a group. The TDMS properties are stored as JSON in the metadata of the schema (file and group properties) and of each field (channel properties).
+
+    Args:
+        columns (Dict[str, np.dtype]): Column names and data types.
+        metadata (Dict[str, Any]): Properties of the file, group and channels.
+
+    Returns:
+        pyarrow.Schema: Schema of the group.
+    """
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            pa.field(
+                name,
+                arrow_type(dtype),
+                metadata={
+                    "tdms_properties": json.dumps(
+                        metadata.get("channels", {}).get(name, {})
+                    )
+                },
+            )
+            for name, dtype in columns.items()
+        ],
+        metadata={
+            "tdms_properties": json.dumps(
+                {
+                    "file": metadata.get("file", {}),
+                    "group": metadata.get("group", {}),
+                }
+            )
+        },
+    )
+
+
+def record_batch(schema, data: Dict[str, np.ndarray]):
+    """Arrow record batch of a chunk. Contiguous numeric and timestamp arrays are wrapped without copying, strided arrays (e.g. interleaved channels read through a memory map), strings and booleans are converted.
+    Channels that are shorter than the chunk are padded with nulls.
+
+    Args:
+        schema (pyarrow.Schema): Schema of the group, as returned by arrow_schema.
+        data (Dict[str, np.ndarray]): Channel data keyed by channel name.
+
+    Returns:
+        pyarrow.RecordBatch: Rows of the chunk.
+    """
+    import pyarrow as pa
+
+    rows = max((len(values) for values in data.values()), default=0)
+    arrays = []
+    for field in schema:
+        values = pa.array(data[field.name], type=field.type)
+        if len(values) < rows:
+            values = pa.concat_arrays(
+                [values, pa.nulls(rows - len(values), field.type)]
+            )
+        arrays.append(values)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def arrow_type(dtype: np.dtype):
+    """Arrow data type for the numpy data type of a channel. Strings (object arrays) become Arrow strings.
+
+    Args:
+        dtype (np.dtype): Numpy data type.
+
+    Returns:
+        pyarrow.DataType: Arrow data type.
+    """
+    import pyarrow as pa
+
+    dtype = np.dtype(dtype)
+    if dtype.kind == "O":
+        return pa.string()
+    return pa.from_numpy_dtype(dtype)
+
+
+WRITERS = {
+    "csv": CsvWriter,
+    "parquet": ParquetWriter,
+    "h5": Hdf5Writer,
+    "arrow": ArrowWriter,
+    "arrows": ArrowStreamWriter,
+    **{
+        f"csv.{extension}": CompressedCsvWriter
+        for extension in CSV_COMPRESSION_EXTENSIONS.values()
+    },
+}
+
+
+def destination_format(options: ConversionOptions) -> str:
+    """The format of the converted files, which is also their extension. A csv format with a compression codec in the options becomes the compressed csv format of the codec, e.g. csv.gz.
+
+    Args:
+        options (ConversionOptions): Conversion options.
+
+    Raises:
+        ValueError: If the compression of csv files is not supported.
+
+    Returns:
+        str: Destination file format.
+    """
+    if options.destination_file_format == "csv" and options.compression not in (
+        None,
+        "none",
+    ):
+        if options.compression not in CSV_COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Unsupported csv compression: {options.compression}")
+        return f"csv.{CSV_COMPRESSION_EXTENSIONS[options.compression]}"
+    return options.destination_file_format
+
+
+def writer_class(options: ConversionOptions) -> type:
+    """The writer for the destination file format set in the options.
+
+    Args:
+        options (ConversionOptions): Conversion options.
+
+    Raises:
+        ValueError: If the destination file format is not supported.
+
+    Returns:
+        type: Writer class.
+    """
+    file_format = destination_format(options)
+    if file_format not in WRITERS:
+        raise ValueError(f"Unsupported destination file format: {file_format}")
+    return WRITERS[file_format]
+
+
+def format_worker_count(options: ConversionOptions) -> int:
+    """Number of formatter threads of the chunk pipeline: options.format_workers, capped for the writers whose formatting holds the GIL (see max_format_workers).
+
+    Args:
+        options (ConversionOptions): Conversion options.
+
+    Returns:
+        int: Number of formatter threads, 0 to run every stage on a single thread.
+    """
+    maximum = writer_class(options).max_format_workers
+    if maximum is None:
+        return options.format_workers
+    return min(options.format_workers, maximum)
+
+
+def open_writer(
+    file_path: str,
+    columns: Dict[str, np.dtype],
+    metadata: Dict[str, Any],
+    options: ConversionOptions,
+    resume: Optional[Dict[str, Any]] = None,
+):
+    """Open a writer for the destination file format set in the options.
+
+    Args:
+        file_path (str): Path to the destination file.
+        columns (Dict[str, np.dtype]): Column names and their data types.
+        metadata (Dict[str, Any]): Properties of the file, group and channels.
+        options (ConversionOptions): Conversion options.
+        resume (Optional[Dict[str, Any]], optional): Checkpoint to resume from, only for writers that are resumable. Defaults to None.
+
+    Raises:
+        ValueError: If the destination file format is not supported, or not resumable while a checkpoint is given.
+
+    Returns:
+        A writer object with write and close methods, usable as a context manager. Resumable writers also have a commit method.
+    """
+    writer = writer_class(options)
+    if resume is None:
+        # Replaced rather than truncated, so that a hardlink from the cache is not overwritten in place.
+        Path(file_path).unlink(missing_ok=True)
+        return writer(file_path, columns, metadata, options)
+    if not writer.resumable:
+        raise ValueError(
+            f"Conversions to {destination_format(options)} cannot be resumed"
+        )
+    unshare_file(file_path)
+    return writer(file_path, columns, metadata, options, resume)
+
+
+def unshare_file(file_path: str) -> None:
+    """Replace a file that has other hardlinks (e.g. a file fetched from the cache) with a copy of its own, so that resuming it, which truncates and appends in place, leaves the other links untouched.
+
+    Args:
+        file_path (str): Path to the file.
+    """
+    if os.stat(file_path).st_nlink <= 1:
+        return
+    temporary_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    shutil.copy2(file_path, temporary_path)
+    os.replace(temporary_path, file_path)
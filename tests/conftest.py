@@ -0,0 +1,106 @@
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+import struct
+import numpy as np
+import pytest
+from nptdms import ChannelObject, TdmsWriter
+
+# Table of contents flags of the raw segments written by raw_tdms.
+TOC_METADATA = 1 << 1
+TOC_NEW_OBJECT_LIST = 1 << 2
+TOC_RAW_DATA = 1 << 3
+TOC_INTERLEAVED = 1 << 5
+TOC_BIG_ENDIAN = 1 << 6
+# TDMS data types of the numpy dtypes raw_tdms writes.
+TYPE_CODES = {"i2": 0x02, "i4": 0x03, "u1": 0x05, "f4": 0x09, "f8": 0x0A}
+
+
+@pytest.fixture
+def write_tdms(tmp_path: Path) -> Callable[..., str]:
+    """Factory writing a .tdms file with nptdms, one segment per list of objects."""
+
+    def write(
+        segments: Sequence[Sequence[ChannelObject]], name: str = "source.tdms"
+    ) -> str:
+        path = str(tmp_path / name)
+        with TdmsWriter(path) as writer:
+            for segment in segments:
+                writer.write_segment(segment)
+        return path
+
+    return write
+
+
+def raw_string(value: str, byte_order: str) -> bytes:
+    data = value.encode()
+    return struct.pack(byte_order + "I", len(data)) + data
+
+
+def raw_segment(
+    group: str,
+    channels: Dict[str, np.ndarray],
+    byte_order: str,
+    interleaved: bool,
+    metadata: bool,
+) -> bytes:
+    """Segment of a group of numeric channels holding the same number of values, in a byte order and layout nptdms cannot write."""
+    toc = TOC_RAW_DATA
+    if byte_order == ">":
+        toc |= TOC_BIG_ENDIAN
+    if interleaved:
+        toc |= TOC_INTERLEAVED
+    meta = b""
+    if metadata:
+        toc |= TOC_METADATA | TOC_NEW_OBJECT_LIST
+        meta = struct.pack(byte_order + "I", len(channels) + 2)
+        for path in ("/", f"/'{group}'"):
+            meta += raw_string(path, byte_order) + struct.pack(
+                byte_order + "II", 0xFFFFFFFF, 0
+            )
+        for name, values in channels.items():
+            meta += raw_string(f"/'{group}'/'{name}'", byte_order)
+            meta += struct.pack(
+                byte_order + "IIIQI",
+                20,
+                TYPE_CODES[values.dtype.str[1:]],
+                1,
+                len(values),
+                0,
+            )
+    arrays = [
+        values.astype(byte_order + values.dtype.str[1:]) for values in channels.values()
+    ]
+    if interleaved:
+        data = b"".join(
+            array[row : row + 1].tobytes()
+            for row in range(len(arrays[0]))
+            for array in arrays
+        )
+    else:
+        data = b"".join(array.tobytes() for array in arrays)
+    lead_in = b"TDSm" + struct.pack("<I", toc)
+    lead_in += struct.pack(byte_order + "IQQ", 4713, len(meta) + len(data), len(meta))
+    return lead_in + meta + data
+
+
+@pytest.fixture
+def raw_tdms(tmp_path: Path) -> Callable[..., str]:
+    """Factory writing a .tdms file of one group byte by byte, one segment per dict of channel values. Only the first segment has metadata, the next ones reuse its object list."""
+
+    def write(
+        segments: List[Dict[str, np.ndarray]],
+        byte_order: str = "<",
+        interleaved: bool = False,
+        group: str = "group",
+        name: str = "raw.tdms",
+        truncate: Optional[int] = None,
+    ) -> str:
+        path = tmp_path / name
+        data = b"".join(
+            raw_segment(group, channels, byte_order, interleaved, index == 0)
+            for index, channels in enumerate(segments)
+        )
+        path.write_bytes(data[:truncate] if truncate else data)
+        return str(path)
+
+    return write
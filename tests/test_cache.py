@@ -0,0 +1,152 @@
+from pathlib import Path
+import os
+import time
+import numpy as np
+import pytest
+from nptdms import ChannelObject
+
+from src.modules.cache import (
+    ENTRY_FILE,
+    STALE_STAGING_SECONDS,
+    ConversionCache,
+    fingerprint,
+)
+from src.modules.converter import convert_file
+from src.modules.options import ConversionOptions
+from src.modules.writers import open_writer
+
+
+@pytest.fixture
+def source(write_tdms) -> str:
+    return write_tdms(
+        [
+            [
+                ChannelObject("first", "x", np.linspace(0, 1, 50)),
+                ChannelObject("second", "y", np.arange(50, dtype=np.int32)),
+            ]
+        ]
+    )
+
+
+def make_dir(tmp_path: Path, name: str) -> str:
+    directory = tmp_path / name
+    directory.mkdir()
+    return str(directory)
+
+
+def test_fingerprint_follows_content_and_output_options(source):
+    options = ConversionOptions()
+    key = fingerprint(source, options)
+    assert fingerprint(source, options) == key
+    # Options that only change how the conversion runs give the same files.
+    assert fingerprint(source, ConversionOptions(chunk_rows=7, checkpoint=True)) == key
+    assert fingerprint(source, ConversionOptions(float_precision=3)) != key
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    touched = fingerprint(source, options)
+    assert touched != key
+
+    with open(source, "ab") as source_file:
+        source_file.write(b"\0")
+    assert fingerprint(source, options) not in (key, touched)
+
+
+def test_second_conversion_is_served_from_the_cache(source, tmp_path: Path):
+    options = ConversionOptions(cache_dir=make_dir(tmp_path, "cache"))
+    converted = convert_file(source, make_dir(tmp_path, "first"), options)
+    fetched = convert_file(source, make_dir(tmp_path, "second"), options)
+
+    entry_dir = Path(options.cache_dir) / fingerprint(source, options)
+    assert (entry_dir / ENTRY_FILE).exists()
+    assert [Path(file).name for file in fetched] == [
+        Path(file).name for file in converted
+    ]
+    for converted_file, fetched_file in zip(converted, fetched):
+        assert os.path.samefile(fetched_file, entry_dir / Path(fetched_file).name)
+        assert Path(fetched_file).read_bytes() == Path(converted_file).read_bytes()
+
+
+def test_other_options_are_not_served_from_the_cache(source, tmp_path: Path):
+    cache_dir = make_dir(tmp_path, "cache")
+    convert_file(
+        source, make_dir(tmp_path, "first"), ConversionOptions(cache_dir=cache_dir)
+    )
+    options = ConversionOptions(cache_dir=cache_dir, float_precision=2)
+    converted, _ = convert_file(source, make_dir(tmp_path, "second"), options)
+    assert Path(converted).read_text().splitlines()[2] == "1,0.02"
+
+
+def test_cache_entry_modified_in_place_is_dropped(source, tmp_path: Path):
+    options = ConversionOptions(cache_dir=make_dir(tmp_path, "cache"))
+    convert_file(source, make_dir(tmp_path, "first"), options)
+    fetched, _ = convert_file(source, make_dir(tmp_path, "second"), options)
+    with open(fetched, "a") as fetched_file:
+        fetched_file.write("tampered\n")
+
+    cache = ConversionCache(options.cache_dir, options.cache_max_bytes)
+    key = fingerprint(source, options)
+    assert cache.fetch(key, source, make_dir(tmp_path, "third"), options) is None
+    assert cache.load_entry(key) is None
+
+
+@pytest.mark.parametrize("fmt", ["csv", "h5"])
+def test_resuming_a_fetched_file_leaves_the_cache_alone(source, tmp_path: Path, fmt):
+    if fmt == "h5":
+        pytest.importorskip("h5py")
+    options = ConversionOptions(
+        cache_dir=make_dir(tmp_path, "cache"), destination_file_format=fmt
+    )
+    convert_file(source, make_dir(tmp_path, "first"), options)
+    fetched, _ = convert_file(source, make_dir(tmp_path, "second"), options)
+    cached = Path(options.cache_dir) / fingerprint(source, options) / Path(fetched).name
+    cached_bytes = cached.read_bytes()
+
+    # Resuming cuts the file back to the checkpoint and appends to it.
+    with open_writer(
+        fetched,
+        {"x": np.dtype("f8")},
+        {"group_name": "first"},
+        options,
+        {"offset": 3, "rows": 0},
+    ) as writer:
+        writer.write(0, {"x": np.arange(3.0)})
+        writer.commit()
+    assert not os.path.samefile(fetched, cached)
+    assert cached.read_bytes() == cached_bytes
+    assert Path(fetched).read_bytes() != cached_bytes
+
+
+def test_stale_staging_directories_are_swept(tmp_path: Path):
+    cache = ConversionCache(make_dir(tmp_path, "cache"), 1 << 20)
+    stale = cache.cache_dir / ".stale.0.tmp"
+    fresh = cache.cache_dir / ".fresh.0.tmp"
+    for staging_dir in (stale, fresh):
+        staging_dir.mkdir()
+        (staging_dir / "group.csv").write_text("0,1\n")
+    old = time.time() - STALE_STAGING_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    cache.evict()
+    assert not stale.exists()
+    # Possibly still being stored by another process.
+    assert fresh.exists()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path):
+    files_dir = Path(make_dir(tmp_path, "files"))
+    cache = ConversionCache(make_dir(tmp_path, "cache"), 250)
+    options = ConversionOptions()
+    for key in ("a", "b"):
+        destination_file = files_dir / f"{key}_group.csv"
+        destination_file.write_bytes(b"0" * 100)
+        cache.store(key, ["group"], [str(destination_file)])
+    # Using a makes b the least recently used entry.
+    assert cache.fetch("a", "a.tdms", make_dir(tmp_path, "out"), options)
+
+    destination_file = files_dir / "c_group.csv"
+    destination_file.write_bytes(b"0" * 100)
+    cache.store("c", ["group"], [str(destination_file)])
+    assert cache.load_entry("b") is None
+    assert cache.load_entry("a") is not None
+    assert cache.load_entry("c") is not None
@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import Callable
+import numpy as np
+import pytest
+from nptdms import ChannelObject
+
+from src.modules.checkpoint import CHECKPOINT_SUFFIX
+from src.modules.control import ConversionCancelled, ConversionControl
+from src.modules.converter import convert_file, convert_group
+from src.modules.options import ConversionOptions
+
+ROWS = 100
+CHUNK_ROWS = 16
+START_TIME = np.datetime64("2024-01-01T00:00:00")
+
+
+@pytest.fixture
+def source(write_tdms) -> str:
+    return write_tdms(
+        [
+            [
+                ChannelObject(
+                    "group",
+                    "float",
+                    np.linspace(0, 1, ROWS // 2) + segment,
+                    {"wf_increment": 0.001, "wf_start_time": START_TIME},
+                ),
+                ChannelObject(
+                    "group", "int", np.arange(ROWS // 2, dtype=np.int32) + segment
+                ),
+                ChannelObject(
+                    "group",
+                    "text",
+                    np.array([f"row {row}" for row in range(ROWS // 2)]),
+                ),
+            ]
+            for segment in range(2)
+        ]
+    )
+
+
+def reference(source: str, tmp_path: Path, options: ConversionOptions) -> bytes:
+    destination = tmp_path / "reference"
+    destination.mkdir()
+    (destination_file,) = convert_file(source, str(destination), options)
+    return Path(destination_file).read_bytes()
+
+
+def stop_after(chunks: int, stop: Callable[[], None]) -> Callable[[int, int], None]:
+    written = []
+
+    def on_chunk(rows: int, nbytes: int) -> None:
+        written.append(rows)
+        if len(written) == chunks:
+            stop()
+
+    return on_chunk
+
+
+OPTIONS = [
+    {},
+    {"time_column": "waveform", "time_format": "relative"},
+    {"decimation": "mean", "decimation_factor": 4},
+    {"layout": "long", "channels": ["float", "int"]},
+]
+
+
+@pytest.mark.parametrize("extra", OPTIONS)
+@pytest.mark.parametrize("chunks", [1, 3, 6])
+def test_resume_after_cancel_is_byte_identical(source, tmp_path, extra, chunks):
+    options = ConversionOptions(
+        chunk_rows=CHUNK_ROWS, checkpoint=True, checkpoint_interval=3600, **extra
+    )
+    destination = tmp_path / "out"
+    destination.mkdir()
+    control = ConversionControl()
+    with pytest.raises(ConversionCancelled):
+        convert_group(
+            source,
+            "group",
+            str(destination),
+            options,
+            stop_after(chunks, control.cancel),
+            control,
+        )
+    (destination_file,) = destination.glob("*.csv")
+    assert Path(str(destination_file) + CHECKPOINT_SUFFIX).exists()
+
+    resumed = []
+    convert_file(
+        source,
+        str(destination),
+        options,
+        on_progress=lambda update: resumed.append(update.rows_done),
+    )
+    assert destination_file.read_bytes() == reference(source, tmp_path, options)
+    # The resumed conversion starts from the committed rows, at a chunk boundary.
+    assert resumed[0] == chunks * CHUNK_ROWS
+    assert not Path(str(destination_file) + CHECKPOINT_SUFFIX).exists()
+
+
+def test_resume_after_crash_drops_uncommitted_bytes(source, tmp_path):
+    # Checkpointing before every chunk, a crash leaves bytes written after the last checkpoint.
+    options = ConversionOptions(
+        chunk_rows=CHUNK_ROWS, checkpoint=True, checkpoint_interval=0
+    )
+    destination = tmp_path / "out"
+    destination.mkdir()
+
+    def crash() -> None:
+        raise RuntimeError("crash")
+
+    with pytest.raises(RuntimeError):
+        convert_group(source, "group", str(destination), options, stop_after(2, crash))
+    convert_file(source, str(destination), options)
+    (destination_file,) = destination.glob("*.csv")
+    assert destination_file.read_bytes() == reference(source, tmp_path, options)
+
+
+def test_checkpoint_of_other_options_is_not_resumed(source, tmp_path):
+    destination = tmp_path / "out"
+    destination.mkdir()
+    control = ConversionControl()
+    with pytest.raises(ConversionCancelled):
+        convert_group(
+            source,
+            "group",
+            str(destination),
+            ConversionOptions(chunk_rows=CHUNK_ROWS, checkpoint=True),
+            stop_after(2, control.cancel),
+            control,
+        )
+    options = ConversionOptions(
+        chunk_rows=CHUNK_ROWS, checkpoint=True, float_precision=3
+    )
+    (destination_file,) = convert_file(source, str(destination), options)
+    assert Path(destination_file).read_bytes() == reference(source, tmp_path, options)
+
+
+def test_cancel_without_checkpoint_deletes_the_file(source, tmp_path):
+    control = ConversionControl()
+    with pytest.raises(ConversionCancelled):
+        convert_group(
+            source,
+            "group",
+            str(tmp_path),
+            ConversionOptions(chunk_rows=CHUNK_ROWS),
+            stop_after(1, control.cancel),
+            control,
+        )
+    assert not list(tmp_path.glob("*.csv"))
@@ -0,0 +1,31 @@
+from pathlib import Path
+import subprocess
+import sys
+
+from src.modules.options import DESTINATION_FORMATS
+from src.modules.writers import WRITERS
+
+ROOT = Path(__file__).resolve().parent.parent
+# Packages the parser must not load, as only the modes converting files need them.
+HEAVY_PACKAGES = ("numpy", "nptdms", "pandas", "pyarrow", "h5py")
+
+
+def test_parsing_arguments_loads_no_heavy_package():
+    script = (
+        "import sys\n"
+        "from src.cli import build_parser\n"
+        "build_parser().parse_args(['source.tdms', '-f', 'csv.gz', '--layout', 'long'])\n"
+        f"print(sorted({{name.split('.')[0] for name in sys.modules}} & set({HEAVY_PACKAGES!r})))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_every_destination_format_has_a_writer():
+    assert sorted(WRITERS) == sorted(DESTINATION_FORMATS)
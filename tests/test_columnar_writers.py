@@ -0,0 +1,150 @@
+from pathlib import Path
+import json
+import numpy as np
+import pytest
+from nptdms import ChannelObject, GroupObject, RootObject
+
+from src.modules.converter import convert_file
+from src.modules.options import ConversionOptions
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+ROWS = 1000
+# Rows of the channels that end before the others, which are padded with nulls.
+SHORT_ROWS = {"int": 700, "time": 10, "text": 3}
+FORMATS = ["parquet", "arrow", "arrows"]
+
+
+def channel_values() -> dict:
+    return {
+        "float32": np.linspace(-1, 1, ROWS, dtype=np.float32),
+        "float64": np.linspace(0, 1e6, ROWS),
+        "int": np.arange(ROWS, dtype=np.int64) - 500,
+        "time": np.datetime64("2024-01-01T00:00:00", "us")
+        + np.arange(ROWS).astype("timedelta64[ms]"),
+        "text": np.array([f"value {row}" for row in range(ROWS)], dtype=object),
+    }
+
+
+@pytest.fixture
+def source(write_tdms) -> str:
+    values = channel_values()
+    return write_tdms(
+        [
+            [
+                RootObject({"author": "rig 1"}),
+                GroupObject("full", {"sample_rate": 1000.0}),
+                *(
+                    ChannelObject("full", name, channel, {"unit_string": name})
+                    for name, channel in values.items()
+                ),
+                GroupObject("ragged", {}),
+                *(
+                    ChannelObject("ragged", name, channel[: SHORT_ROWS.get(name)])
+                    for name, channel in values.items()
+                ),
+            ]
+        ]
+    )
+
+
+def read_table(file_path: str, fmt: str):
+    if fmt == "parquet":
+        return pq.read_table(file_path)
+    if fmt == "arrow":
+        with pa.ipc.open_file(pa.memory_map(file_path)) as reader:
+            return reader.read_all()
+    with pa.ipc.open_stream(pa.OSFile(file_path)) as reader:
+        return reader.read_all()
+
+
+def convert(source: str, tmp_path: Path, fmt: str, **options) -> dict:
+    files = convert_file(
+        source,
+        str(tmp_path),
+        ConversionOptions(destination_file_format=fmt, chunk_rows=128, **options),
+    )
+    return {Path(file).stem.split("_", 1)[1]: file for file in files}
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_columns_keep_their_types_and_values(source, tmp_path: Path, fmt):
+    table = read_table(convert(source, tmp_path, fmt)["full"], fmt)
+    assert table.schema.types == [
+        pa.float32(),
+        pa.float64(),
+        pa.int64(),
+        pa.timestamp("us"),
+        pa.string(),
+    ]
+    for name, values in channel_values().items():
+        column = table.column(name)
+        assert column.null_count == 0
+        assert column.to_numpy(zero_copy_only=False).tolist() == values.tolist()
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_short_channels_are_padded_with_nulls(source, tmp_path: Path, fmt):
+    table = read_table(convert(source, tmp_path, fmt)["ragged"], fmt)
+    assert table.num_rows == ROWS
+    for name, values in channel_values().items():
+        rows = SHORT_ROWS.get(name, ROWS)
+        column = table.column(name)
+        assert column.null_count == ROWS - rows
+        assert column.slice(0, rows).to_pylist() == pa.array(values[:rows]).to_pylist()
+    # Integers are not cast to floats to hold the nulls.
+    assert table.schema.field("int").type == pa.int64()
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_properties_are_stored_as_metadata(source, tmp_path: Path, fmt):
+    schema = read_table(convert(source, tmp_path, fmt)["full"], fmt).schema
+    assert json.loads(schema.metadata[b"tdms_properties"]) == {
+        "file": {"author": "rig 1"},
+        "group": {"sample_rate": 1000.0},
+    }
+    for name in channel_values():
+        properties = json.loads(schema.field(name).metadata[b"tdms_properties"])
+        assert properties["unit_string"] == name
+
+
+def test_parquet_row_groups_statistics_and_compression(source, tmp_path: Path):
+    file_path = convert(
+        source, tmp_path, "parquet", row_group_size=300, compression="zstd"
+    )["full"]
+    metadata = pq.ParquetFile(file_path).metadata
+    assert [
+        metadata.row_group(index).num_rows for index in range(metadata.num_row_groups)
+    ] == [
+        300,
+        300,
+        300,
+        100,
+    ]
+    column = metadata.row_group(0).column(2)
+    assert column.compression == "ZSTD"
+    assert (column.statistics.min, column.statistics.max) == (-500, -201)
+
+    plain_dir = tmp_path / "plain"
+    plain_dir.mkdir()
+    file_path = convert(source, plain_dir, "parquet", write_statistics=False)["full"]
+    assert not pq.ParquetFile(file_path).metadata.row_group(0).column(2).is_stats_set
+
+
+@pytest.mark.parametrize("compression", [None, "lz4", "zstd"])
+def test_arrow_files_are_read_back_by_batch(source, tmp_path: Path, compression):
+    file_path = convert(source, tmp_path, "arrow", compression=compression)["full"]
+    with pa.ipc.open_file(pa.memory_map(file_path)) as reader:
+        # One record batch per chunk.
+        assert reader.num_record_batches == -(-ROWS // 128)
+        batch = reader.get_batch(1)
+    assert batch.column("int").to_pylist() == list(range(128 - 500, 256 - 500))
+
+
+def test_arrow_stream_has_no_footer(source, tmp_path: Path):
+    file_path = convert(source, tmp_path, "arrows")["full"]
+    with pytest.raises(pa.ArrowInvalid):
+        pa.ipc.open_file(file_path)
+    with pa.ipc.open_stream(pa.OSFile(file_path)) as reader:
+        assert sum(batch.num_rows for batch in reader) == ROWS
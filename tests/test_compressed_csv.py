@@ -0,0 +1,227 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+import gzip
+import lzma
+import threading
+import time
+import numpy as np
+import pytest
+from nptdms import ChannelObject
+
+from src.modules import writers
+from src.modules.control import ConversionCancelled, ConversionControl
+from src.modules.converter import convert_group
+from src.modules.options import ConversionOptions
+from src.modules.writers import (
+    COMPRESSION_QUEUE_SIZE,
+    BackgroundCompressor,
+    CompressedCsvWriter,
+    open_compressor,
+    open_writer,
+)
+
+ROWS = 100_000
+# Seconds a test waits for the compressor thread before failing instead of hanging.
+TIMEOUT = 10
+
+
+def channels() -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return {
+        "int": rng.integers(-(2**40), 2**40, ROWS),
+        "float64": rng.normal(size=ROWS),
+        "float32": rng.normal(size=ROWS).astype(np.float32)[: ROWS // 3],
+        "text": np.array(["a", "b, c", 'd "e"'] * (ROWS // 3), dtype=object),
+    }
+
+
+def write_csv(path: str, options: ConversionOptions, chunk_rows: int = 10_000) -> None:
+    data = channels()
+    columns = {name: values.dtype for name, values in data.items()}
+    with open_writer(path, columns, {}, options) as writer:
+        for start in range(0, ROWS, chunk_rows):
+            writer.write(
+                start,
+                {
+                    name: values[start : start + chunk_rows]
+                    for name, values in data.items()
+                },
+            )
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "xz":
+        return lzma.decompress(data)
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+class GatedCompressor:
+    """Compressor that waits for a gate before compressing each block, and can fail instead."""
+
+    def __init__(self, error: Optional[Exception] = None):
+        self.compressor = open_compressor("gzip")
+        self.gate = threading.Event()
+        self.error = error
+        self.blocks = 0
+
+    def compress(self, data: bytes) -> bytes:
+        self.blocks += 1
+        self.gate.wait(TIMEOUT)
+        if self.error is not None:
+            raise self.error
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush()
+
+
+@pytest.fixture
+def streams(monkeypatch) -> List[BackgroundCompressor]:
+    """Background compressors opened by the writers, which write small blocks so that the queue fills quickly."""
+    opened = []
+
+    def open_stream(file, compressor):
+        opened.append(BackgroundCompressor(file, compressor))
+        return opened[-1]
+
+    monkeypatch.setattr(writers, "BackgroundCompressor", open_stream)
+    monkeypatch.setattr(writers, "CSV_BUFFER_SIZE", 1024)
+    return opened
+
+
+def wait_for(condition) -> None:
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd", "xz"])
+def test_decompressed_output_matches_csv(tmp_path: Path, codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    plain = tmp_path / "plain.csv"
+    write_csv(str(plain), ConversionOptions())
+    options = ConversionOptions(compression=codec)
+    compressed = tmp_path / f"compressed.{writers.destination_format(options)}"
+    write_csv(str(compressed), options)
+    # Larger than the buffer, so the text reaches the thread in several blocks.
+    assert plain.stat().st_size > 2 * writers.CSV_BUFFER_SIZE
+    assert decompress(codec, compressed.read_bytes()) == plain.read_bytes()
+
+
+def test_full_queue_blocks_writes_until_compressed(tmp_path: Path):
+    compressor = GatedCompressor()
+    stream = BackgroundCompressor(open(tmp_path / "blocks.gz", "wb"), compressor)
+    # One block being compressed, a full queue and one more waiting for room.
+    blocks = [bytes([block]) * 100 for block in range(COMPRESSION_QUEUE_SIZE + 2)]
+
+    def write_blocks() -> None:
+        for block in blocks:
+            stream.write(block)
+
+    writer = threading.Thread(target=write_blocks)
+    writer.start()
+    wait_for(stream.blocks.full)
+    writer.join(0.1)
+    assert writer.is_alive()
+
+    compressor.gate.set()
+    writer.join(TIMEOUT)
+    stream.close()
+    assert gzip.decompress((tmp_path / "blocks.gz").read_bytes()) == b"".join(blocks)
+
+
+def test_close_with_a_full_queue_compresses_every_block(tmp_path: Path):
+    compressor = GatedCompressor()
+    stream = BackgroundCompressor(open(tmp_path / "blocks.gz", "wb"), compressor)
+    blocks = [bytes([block]) * 100 for block in range(COMPRESSION_QUEUE_SIZE + 1)]
+    for block in blocks:
+        stream.write(block)
+    assert stream.blocks.full()
+
+    threading.Timer(0.1, compressor.gate.set).start()
+    stream.close()
+    assert not stream.thread.is_alive()
+    assert compressor.blocks == len(blocks)
+    assert gzip.decompress((tmp_path / "blocks.gz").read_bytes()) == b"".join(blocks)
+
+
+@pytest.mark.parametrize("full", [False, True])
+def test_compressor_error_reaches_the_writer(
+    tmp_path: Path, monkeypatch, streams, full
+):
+    compressor = GatedCompressor(OSError("No space left on device"))
+    if not full:
+        compressor.gate.set()
+    monkeypatch.setattr(
+        writers, "open_compressor", lambda codec, level=None: compressor
+    )
+    if full:
+
+        def fail_once_full() -> None:
+            # Fails only once the writer is blocked on the full queue.
+            wait_for(lambda: streams and streams[0].blocks.full())
+            compressor.gate.set()
+
+        threading.Thread(target=fail_once_full).start()
+
+    with pytest.raises(OSError, match="No space left on device"):
+        write_csv(
+            str(tmp_path / "failing.csv.gz"), ConversionOptions(compression="gzip"), 100
+        )
+    [stream] = streams
+    assert not stream.thread.is_alive()
+    assert stream.file.closed
+    # Blocks are no longer compressed after the error.
+    assert compressor.blocks == 1
+
+
+def test_cancel_with_a_full_queue_removes_the_file(
+    write_tdms, tmp_path: Path, monkeypatch, streams
+):
+    source = write_tdms(
+        [[ChannelObject("group", "x", np.arange(ROWS, dtype=np.float64))]]
+    )
+    compressor = GatedCompressor()
+    monkeypatch.setattr(
+        writers, "open_compressor", lambda codec, level=None: compressor
+    )
+    control = ConversionControl()
+
+    def cancel_once_full() -> None:
+        wait_for(lambda: streams and streams[0].blocks.full())
+        control.cancel()
+        compressor.gate.set()
+
+    canceller = threading.Thread(target=cancel_once_full)
+    canceller.start()
+    with pytest.raises(ConversionCancelled):
+        convert_group(
+            source,
+            "group",
+            str(tmp_path),
+            ConversionOptions(compression="gzip", chunk_rows=100),
+            control=control,
+        )
+    canceller.join()
+    [stream] = streams
+    assert not stream.thread.is_alive()
+    assert stream.file.closed
+    assert not list(tmp_path.glob("*.csv.gz"))
+
+
+def test_compressed_csv_is_not_resumable(tmp_path: Path):
+    assert not CompressedCsvWriter.resumable
+    with pytest.raises(ValueError, match="cannot be resumed"):
+        open_writer(
+            str(tmp_path / "group.csv.gz"),
+            {"x": np.dtype("f8")},
+            {},
+            ConversionOptions(compression="gzip"),
+            {"offset": 0, "rows": 0},
+        )
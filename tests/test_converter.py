@@ -0,0 +1,58 @@
+from pathlib import Path
+import numpy as np
+import pytest
+from nptdms import ChannelObject
+
+from src.modules import converter
+from src.modules.converter import convert_file
+from src.modules.options import ConversionOptions
+
+
+@pytest.fixture
+def source(write_tdms) -> str:
+    return write_tdms(
+        [
+            [
+                ChannelObject(group, "x", np.arange(100, dtype=np.float64))
+                for group in ("a", "b", "c")
+            ]
+        ]
+    )
+
+
+@pytest.fixture
+def pools(monkeypatch) -> list:
+    """Sizes of the pools of processes the conversion would start, which convert nothing."""
+    started = []
+
+    def convert_groups_in_parallel(source_file_path, parts, *args):
+        started.append(len(parts))
+        return []
+
+    monkeypatch.setattr(
+        converter, "_convert_groups_in_parallel", convert_groups_in_parallel
+    )
+    return started
+
+
+def test_small_file_is_converted_without_a_pool(source, tmp_path: Path, pools):
+    files = convert_file(source, str(tmp_path), ConversionOptions(group_workers=None))
+    assert len(files) == 3
+    assert pools == []
+
+
+@pytest.mark.parametrize(
+    "extra, started",
+    [
+        ({"group_workers": None}, [3]),
+        ({"group_workers": 1}, []),
+        # A single selected group has nothing to run in parallel.
+        ({"group_workers": None, "groups": ["b"]}, []),
+    ],
+)
+def test_pool_for_large_files(
+    source, tmp_path: Path, pools, monkeypatch, extra, started
+):
+    monkeypatch.setattr(converter, "PARALLEL_GROUPS_MIN_BYTES", 0)
+    convert_file(source, str(tmp_path), ConversionOptions(**extra))
+    assert pools == started
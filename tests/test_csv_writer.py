@@ -0,0 +1,105 @@
+from pathlib import Path
+from typing import Dict
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.modules.options import ConversionOptions
+from src.modules.writers import CsvWriter
+
+ROWS = 200
+
+
+def channels(rows: int = ROWS) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    times = np.datetime64("2024-01-01T00:00:00") + rng.integers(
+        0, 10**9, rows
+    ).astype("timedelta64[us]")
+    times[::7] = np.datetime64("NaT")
+    floats = rng.normal(size=rows) * 10.0 ** rng.integers(-8, 8, rows)
+    floats[::11] = np.nan
+    return {
+        "int": rng.integers(-(2**40), 2**40, rows),
+        "small int": rng.integers(0, 255, rows).astype(np.uint8),
+        "float64": floats,
+        "float32": rng.normal(size=rows).astype(np.float32),
+        "time": times,
+        "text": np.array(
+            [
+                ["plain", "with, comma", 'with "quotes"', "line\nbreak", ""][row % 5]
+                for row in range(rows)
+            ],
+            dtype=object,
+        ),
+        "bool": rng.integers(0, 2, rows).astype(bool),
+    }
+
+
+def write_csv(path: Path, data: Dict[str, np.ndarray], chunk_rows: int) -> bytes:
+    rows = max(len(values) for values in data.values())
+    writer = CsvWriter(
+        str(path),
+        {name: values.dtype for name, values in data.items()},
+        {},
+        ConversionOptions(),
+    )
+    with writer:
+        for start in range(0, rows, chunk_rows):
+            writer.write(
+                start,
+                {
+                    name: values[start : start + chunk_rows]
+                    for name, values in data.items()
+                },
+            )
+    return path.read_bytes()
+
+
+def to_csv(tmp_path: Path, frame: pd.DataFrame) -> bytes:
+    path = tmp_path / "reference.csv"
+    frame.to_csv(path)
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("chunk_rows", [ROWS, 64])
+def test_output_matches_to_csv(tmp_path: Path, chunk_rows):
+    data = channels()
+    written = write_csv(tmp_path / "written.csv", data, chunk_rows)
+    assert written == to_csv(tmp_path, pd.DataFrame(data))
+
+
+@pytest.mark.parametrize(
+    "times",
+    [
+        ["2024-01-01", "2024-01-02", "NaT"],
+        ["2024-01-01T10:00:00", "NaT", "2024-01-02"],
+        ["2024-01-01T10:00:00.5", "2024-01-02", "NaT"],
+        ["2024-01-01T10:00:00.000250", "2024-01-02", "NaT"],
+        ["NaT", "NaT", "NaT"],
+    ],
+)
+def test_timestamps_match_to_csv(tmp_path: Path, times):
+    # pandas writes only the dates, or as many digits of fraction as the finest timestamp needs.
+    data = {"time": np.array(times, dtype="datetime64[us]")}
+    written = write_csv(tmp_path / "written.csv", data, ROWS)
+    assert written == to_csv(tmp_path, pd.DataFrame(data))
+
+
+@pytest.mark.parametrize("chunk_rows", [ROWS, 64, 7])
+def test_ragged_group_matches_to_csv_of_nullable_columns(tmp_path: Path, chunk_rows):
+    # Short channels are padded with empty cells, integers are not cast to floats to hold them.
+    data = channels()
+    lengths = {"int": 150, "float32": 64, "time": 30, "text": 1, "bool": 0}
+    data = {name: values[: lengths.get(name, ROWS)] for name, values in data.items()}
+    written = write_csv(tmp_path / "written.csv", data, chunk_rows)
+    reference = pd.DataFrame(
+        {
+            name: pd.Series(
+                values,
+                dtype={"int": "Int64", "bool": "boolean"}.get(name, values.dtype),
+            )
+            for name, values in data.items()
+        },
+        index=pd.RangeIndex(ROWS),
+    )
+    assert written == to_csv(tmp_path, reference)
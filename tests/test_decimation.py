@@ -0,0 +1,120 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from nptdms import ChannelObject
+
+from src.modules.converter import convert_file
+from src.modules.options import ConversionOptions
+from src.modules.transforms import Decimator
+
+FACTOR = 10
+START_TIME = np.datetime64("2024-01-01T00:00:00")
+
+
+def blocks(values: np.ndarray, factor: int):
+    return [values[start : start + factor] for start in range(0, len(values), factor)]
+
+
+def expected(method: str, values: np.ndarray, factor: int = FACTOR):
+    """Decimated values computed block by block, the last block being partial."""
+    if method == "nth":
+        return {"": values[::factor]}
+    parts = blocks(values.astype(np.float64), factor)
+    if method == "mean":
+        return {"": np.array([part.mean() for part in parts])}
+    if method == "rms":
+        return {"": np.array([np.sqrt(np.mean(part**2)) for part in parts])}
+    return {
+        "_min": np.array([part.min() for part in blocks(values, factor)]),
+        "_max": np.array([part.max() for part in blocks(values, factor)]),
+    }
+
+
+@pytest.mark.parametrize("method", ["nth", "mean", "rms", "minmax"])
+@pytest.mark.parametrize("rows", [30, 37, 3])
+def test_partial_last_block(method, rows):
+    values = np.random.default_rng(rows).normal(size=rows)
+    start, decimated = Decimator(method, FACTOR).decimate(20, {"x": values})
+    assert start == 2
+    for suffix, reference in expected(method, values).items():
+        np.testing.assert_allclose(decimated["x" + suffix], reference)
+
+
+@pytest.mark.parametrize("method", ["nth", "mean", "rms", "minmax"])
+def test_aligned_chunks_decimate_like_the_whole_channel(method):
+    values = np.arange(95, dtype=np.int32) ** 2 % 17
+    decimator = Decimator(method, FACTOR)
+    chunk_rows = decimator.aligned_chunk_rows(32)
+    assert chunk_rows == 30
+    chunks = [
+        decimator.decimate(start, {"x": values[start : start + chunk_rows]})
+        for start in range(0, len(values), chunk_rows)
+    ]
+    assert [start for start, _ in chunks] == [0, 3, 6, 9]
+    for suffix, reference in expected(method, values).items():
+        np.testing.assert_allclose(
+            np.concatenate([data["x" + suffix] for _, data in chunks]), reference
+        )
+
+
+def test_values_that_cannot_be_averaged_keep_the_first_of_each_block():
+    decimator = Decimator("mean", 3)
+    times = START_TIME + np.arange(7).astype("timedelta64[s]")
+    text = np.array([f"v{row}" for row in range(7)], dtype=object)
+    _, decimated = decimator.decimate(0, {"time": times, "text": text})
+    np.testing.assert_array_equal(decimated["time"], times[::3])
+    np.testing.assert_array_equal(decimated["text"], ["v0", "v3", "v6"])
+    columns = decimator.columns(
+        {"time": times.dtype, "text": text.dtype, "x": np.dtype(np.int16)}
+    )
+    assert columns == {
+        "time": times.dtype,
+        "text": text.dtype,
+        "x": np.dtype(np.float64),
+    }
+
+
+def test_metadata_scales_the_increment():
+    metadata = Decimator("minmax", 4).metadata(
+        {"channels": {"x": {"wf_increment": 0.5}}}
+    )
+    assert metadata["channels"]["x_min"]["wf_increment"] == 2.0
+    assert metadata["channels"]["x_max"]["decimation"] == "minmax 4"
+
+
+@pytest.mark.parametrize("method, factor", [("median", 2), ("mean", 0)])
+def test_invalid_decimation(method, factor):
+    with pytest.raises(ValueError):
+        Decimator(method, factor)
+
+
+@pytest.mark.parametrize("method", ["nth", "mean", "rms", "minmax"])
+@pytest.mark.parametrize("chunk_rows", [16, 1000])
+def test_ragged_channels(write_tdms, tmp_path: Path, method, chunk_rows):
+    # The long channel ends within a block, the short one stops after 5 blocks and is padded.
+    long = np.random.default_rng(0).normal(size=103)
+    short = np.arange(50, dtype=np.int32)
+    source = write_tdms(
+        [
+            [
+                ChannelObject("group", "long", long[:60]),
+                ChannelObject("group", "short", short),
+            ],
+            [ChannelObject("group", "long", long[60:])],
+        ]
+    )
+    (destination_file,) = convert_file(
+        source,
+        str(tmp_path),
+        ConversionOptions(
+            decimation=method, decimation_factor=FACTOR, chunk_rows=chunk_rows
+        ),
+    )
+    table = pd.read_csv(destination_file, index_col=0)
+    assert len(table) == 11
+    for name, values in (("long", long), ("short", short)):
+        for suffix, reference in expected(method, values).items():
+            column = table[name + suffix]
+            np.testing.assert_allclose(column[: len(reference)], reference)
+            assert column[len(reference) :].isna().all()
@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import List, Tuple
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from nptdms import ChannelObject, TdmsFile, TdmsWriter
+
+from src.modules.control import ConversionCancelled, ConversionControl
+from src.modules.converter import convert_file
+from src.modules.follow import FOLLOW_SUFFIX, follow_file
+from src.modules.incremental_reader import IncrementalTdmsFile
+from src.modules.options import ConversionOptions
+
+# Rows of the segments the acquisition appends, sized so that decimation blocks span segments.
+SEGMENT_ROWS = [40, 7, 25, 1, 30]
+START_TIME = np.datetime64("2024-01-01T00:00:00")
+POLL_INTERVAL = 0.01
+# Seconds between two segments of the acquisition, and without new segments before following stops.
+SEGMENT_INTERVAL = 0.05
+IDLE_TIMEOUT = 1.0
+
+
+def acquisition_segment(first_row: int, rows: int) -> List[ChannelObject]:
+    waveform = {"wf_increment": 0.001, "wf_start_time": START_TIME}
+    indices = np.arange(first_row, first_row + rows)
+    return [
+        ChannelObject("group", "float", np.sin(indices / 7), waveform),
+        ChannelObject("group", "int", indices.astype(np.int32), waveform),
+        ChannelObject("group", "text", np.array([f"row {row}" for row in indices])),
+    ]
+
+
+def segments() -> List[List[ChannelObject]]:
+    first_rows = np.cumsum([0] + SEGMENT_ROWS[:-1])
+    return [
+        acquisition_segment(int(first_row), rows)
+        for first_row, rows in zip(first_rows, SEGMENT_ROWS)
+    ]
+
+
+def append_segment(path: str, segment: List[ChannelObject]) -> None:
+    with TdmsWriter(path, mode="a") as writer:
+        writer.write_segment(segment)
+
+
+def start_acquisition(directory: Path) -> Tuple[str, threading.Thread]:
+    """Write the first segment of the acquisition and start a thread appending the next ones a few polls apart, like a running acquisition."""
+    path = str(directory / "source.tdms")
+    first, *rest = segments()
+    append_segment(path, first)
+
+    def acquire() -> None:
+        for segment in rest:
+            time.sleep(SEGMENT_INTERVAL)
+            append_segment(path, segment)
+
+    acquisition = threading.Thread(target=acquire)
+    acquisition.start()
+    return path, acquisition
+
+
+def reference(tmp_path: Path, options: ConversionOptions) -> List[str]:
+    source = tmp_path / "whole"
+    source.mkdir()
+    path = str(source / "source.tdms")
+    for segment in segments():
+        append_segment(path, segment)
+    return convert_file(path, str(source), options)
+
+
+def assert_same_files(followed: List[str], converted: List[str]) -> None:
+    assert [Path(file).name for file in followed] == [
+        Path(file).name for file in converted
+    ]
+    for followed_file, converted_file in zip(followed, converted):
+        if followed_file.endswith(".csv"):
+            assert Path(followed_file).read_bytes() == Path(converted_file).read_bytes()
+            continue
+        h5py = pytest.importorskip("h5py")
+        with h5py.File(followed_file) as followed_h5, h5py.File(
+            converted_file
+        ) as converted_h5:
+            for name, dataset in converted_h5["group"].items():
+                np.testing.assert_array_equal(
+                    followed_h5["group"][name][()], dataset[()]
+                )
+
+
+def test_incremental_reader_matches_nptdms(tmp_path: Path):
+    path = str(tmp_path / "source.tdms")
+    state = None
+    for segment in segments():
+        append_segment(path, segment)
+        # A new reader restored from the state of the previous one only reads the new segment.
+        with IncrementalTdmsFile(path, state) as reader:
+            reader.advance(os.path.getsize(path))
+            state = reader.state()
+    with IncrementalTdmsFile(path, state) as reader, TdmsFile.open(path) as tdms_file:
+        for channel in tdms_file["group"].channels():
+            incremental = reader["group"][channel.name]
+            assert len(incremental) == sum(SEGMENT_ROWS)
+            assert incremental.properties == channel.properties
+            np.testing.assert_array_equal(incremental[:], channel[:])
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [
+        {},
+        {"time_column": "waveform", "time_format": "relative", "chunk_rows": 16},
+        {"decimation": "mean", "decimation_factor": 4, "channels": ["float", "int"]},
+        {"destination_file_format": "h5", "channels": ["float", "int"]},
+    ],
+)
+def test_follow_matches_conversion(tmp_path: Path, extra):
+    options = ConversionOptions(**extra)
+    path, acquisition = start_acquisition(tmp_path)
+    followed = follow_file(path, str(tmp_path), options, POLL_INTERVAL, IDLE_TIMEOUT)
+    acquisition.join()
+    assert_same_files(followed, reference(tmp_path, options))
+    assert not (tmp_path / ("source.tdms" + FOLLOW_SUFFIX)).exists()
+
+
+def test_follow_carries_on_after_cancel(tmp_path: Path):
+    options = ConversionOptions()
+    path, acquisition = start_acquisition(tmp_path)
+    control = ConversionControl()
+    with pytest.raises(ConversionCancelled):
+        follow_file(
+            path,
+            str(tmp_path),
+            options,
+            POLL_INTERVAL,
+            on_append=lambda rows: control.cancel(),
+            control=control,
+        )
+    assert (tmp_path / ("source.tdms" + FOLLOW_SUFFIX)).exists()
+    followed = follow_file(path, str(tmp_path), options, POLL_INTERVAL, IDLE_TIMEOUT)
+    acquisition.join()
+    assert_same_files(followed, reference(tmp_path, options))
+
+
+def test_formats_that_cannot_be_appended_to_are_rejected(tmp_path: Path):
+    path = str(tmp_path / "source.tdms")
+    append_segment(path, segments()[0])
+    with pytest.raises(ValueError, match="parquet"):
+        follow_file(
+            path, str(tmp_path), ConversionOptions(destination_file_format="parquet")
+        )
@@ -0,0 +1,144 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from nptdms import ChannelObject
+
+from src.modules.control import ConversionCancelled, ConversionControl
+from src.modules.converter import convert_file, convert_group
+from src.modules.options import ConversionOptions
+from src.modules.transforms import LongLayout, long_value_dtype
+
+LENGTHS = {"long": 70, "medium": 33, "short": 5}
+
+
+@pytest.fixture
+def ragged(write_tdms) -> str:
+    # Segments holding different channels, so the channels end at different rows.
+    return write_tdms(
+        [
+            [
+                ChannelObject(
+                    "group", name, np.arange(length, dtype=np.float64) + index
+                )
+                for index, (name, length) in enumerate(LENGTHS.items())
+            ],
+            [ChannelObject("group", "long", np.arange(30, dtype=np.float64) + 70)],
+        ]
+    )
+
+
+def expected_rows():
+    lengths = {**LENGTHS, "long": 100}
+    return sorted(
+        (name, row, float(row + index if row < LENGTHS[name] else row))
+        for index, (name, length) in enumerate(lengths.items())
+        for row in range(length)
+    )
+
+
+def test_chunk_offsets_follow_the_rows_before_them():
+    lengths = {"a": 10, "b": 4, "c": 0}
+    layout = LongLayout({name: np.dtype("f8") for name in lengths}, lengths)
+    written = 0
+    for start in range(0, 10, 3):
+        data = {
+            name: np.arange(start, min(start + 3, length), dtype=np.float64)
+            for name, length in lengths.items()
+        }
+        offset, reshaped = layout.reshape(start, data)
+        assert offset == written
+        written += len(reshaped["value"])
+        assert list(reshaped["channel"]) == [
+            name for name in lengths for _ in data[name]
+        ]
+        np.testing.assert_array_equal(
+            reshaped["index"], np.concatenate(list(data.values()))
+        )
+    assert written == layout.offset(10) == 14
+
+
+@pytest.mark.parametrize("chunk_rows", [7, 16, 1000])
+def test_ragged_group_to_csv(ragged, tmp_path: Path, chunk_rows):
+    (destination_file,) = convert_file(
+        ragged,
+        str(tmp_path),
+        ConversionOptions(layout="long", chunk_rows=chunk_rows),
+    )
+    table = pd.read_csv(destination_file, index_col=0)
+    # Long rows are numbered across chunks without gaps or overlaps.
+    assert list(table.index) == list(range(sum(LENGTHS.values()) + 30))
+    assert sorted(table.itertuples(index=False, name=None)) == expected_rows()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "h5"])
+@pytest.mark.parametrize("chunks", [1, 2, 5])
+def test_resume_ragged_long_layout(ragged, tmp_path: Path, fmt, chunks):
+    options = ConversionOptions(
+        layout="long",
+        chunk_rows=7,
+        checkpoint=True,
+        checkpoint_interval=3600,
+        destination_file_format=fmt,
+    )
+    destination = tmp_path / "out"
+    destination.mkdir()
+    control = ConversionControl()
+    written = []
+
+    def on_chunk(rows: int, nbytes: int) -> None:
+        written.append(rows)
+        if len(written) == chunks:
+            control.cancel()
+
+    with pytest.raises(ConversionCancelled):
+        convert_group(ragged, "group", str(destination), options, on_chunk, control)
+    (resumed,) = convert_file(ragged, str(destination), options)
+
+    reference_dir = tmp_path / "reference"
+    reference_dir.mkdir()
+    (reference,) = convert_file(ragged, str(reference_dir), options)
+    if fmt == "csv":
+        assert Path(resumed).read_bytes() == Path(reference).read_bytes()
+    else:
+        h5py = pytest.importorskip("h5py")
+        with h5py.File(resumed) as resumed_file, h5py.File(reference) as reference_file:
+            for name in ("index", "value"):
+                np.testing.assert_array_equal(
+                    resumed_file["group"][name][()], reference_file["group"][name][()]
+                )
+
+
+def test_mixed_types_fail_before_any_file_is_written(write_tdms, tmp_path: Path):
+    source = write_tdms(
+        [
+            [
+                ChannelObject("numbers", "x", np.arange(3, dtype=np.int16)),
+                ChannelObject("mixed", "x", np.arange(3, dtype=np.float64)),
+                ChannelObject("mixed", "text", np.array(["a", "b", "c"])),
+            ]
+        ]
+    )
+    destination = tmp_path / "out"
+    destination.mkdir()
+    with pytest.raises(ValueError, match="Group mixed"):
+        convert_file(source, str(destination), ConversionOptions(layout="long"))
+    assert not list(destination.iterdir())
+
+
+def test_value_dtype():
+    assert long_value_dtype([np.dtype("i2"), np.dtype("f4")]) == np.dtype("f4")
+    assert long_value_dtype([np.dtype("i8"), np.dtype("?")]) == np.dtype("i8")
+    assert long_value_dtype([np.dtype("O"), np.dtype("O")]) == np.dtype("O")
+    with pytest.raises(ValueError):
+        long_value_dtype([np.dtype("M8[us]"), np.dtype("f8")])
+
+
+def test_channels_layout_is_not_padded(ragged, tmp_path: Path):
+    files = convert_file(ragged, str(tmp_path), ConversionOptions(layout="channels"))
+    lengths = {**LENGTHS, "long": 100}
+    assert [Path(file).name for file in files] == [
+        f"source_group_{name}.csv" for name in lengths
+    ]
+    for file, length in zip(files, lengths.values()):
+        assert len(pd.read_csv(file, index_col=0)) == length
@@ -0,0 +1,214 @@
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import pytest
+from nptdms import ChannelObject
+
+from src.modules.converter import convert_file
+from src.modules.merge import merge_files
+from src.modules.options import ConversionOptions
+
+INCREMENT = 0.01
+START_TIME = np.datetime64("2024-01-01T00:00:00")
+# Rows of each file of the split acquisition.
+FILE_ROWS = [40, 35, 25]
+
+
+def acquisition_segment(
+    first_row: int,
+    rows: int,
+    start_time: Optional[np.datetime64] = None,
+    increment: float = INCREMENT,
+    dtype: str = "f8",
+) -> List[ChannelObject]:
+    if start_time is None:
+        start_time = START_TIME + np.timedelta64(
+            round(first_row * increment * 1e6), "us"
+        )
+    waveform = {"wf_increment": increment, "wf_start_time": start_time}
+    return [
+        ChannelObject(
+            "group",
+            "x",
+            np.sin(np.arange(first_row, first_row + rows) / 7).astype(dtype),
+            waveform,
+        ),
+        ChannelObject(
+            "group",
+            "count",
+            np.arange(first_row, first_row + rows, dtype=np.int32),
+            waveform,
+        ),
+    ]
+
+
+@pytest.fixture
+def split(write_tdms) -> List[str]:
+    """The acquisition split into one file per part, in the order of their names."""
+    first_rows = np.cumsum([0] + FILE_ROWS[:-1])
+    return [
+        write_tdms([acquisition_segment(first_row, rows)], f"part{index}.tdms")
+        for index, (first_row, rows) in enumerate(zip(first_rows, FILE_ROWS))
+    ]
+
+
+@pytest.fixture
+def whole(write_tdms) -> str:
+    """The same acquisition in a single file."""
+    return write_tdms([acquisition_segment(0, sum(FILE_ROWS))], "whole.tdms")
+
+
+def convert_both(split, whole, tmp_path: Path, options: ConversionOptions):
+    merged_dir = tmp_path / "merged"
+    merged_dir.mkdir()
+    whole_dir = tmp_path / "whole"
+    whole_dir.mkdir()
+    (merged,) = merge_files(split, str(merged_dir), options)
+    (converted,) = convert_file(whole, str(whole_dir), options)
+    return merged, converted
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [
+        {},
+        {"time_column": "waveform", "time_format": "iso"},
+        {"chunk_rows": 16},
+    ],
+)
+def test_merge_matches_single_file(split, whole, tmp_path: Path, extra):
+    merged, converted = convert_both(split, whole, tmp_path, ConversionOptions(**extra))
+    assert Path(merged).name == "part0_merged_group.csv"
+    # The index carries on across files.
+    assert Path(merged).read_bytes() == Path(converted).read_bytes()
+
+
+@pytest.mark.parametrize(
+    "time_format, tolerance", [("relative", 1e-12), ("epoch", 1e-6)]
+)
+def test_times_carry_on_across_files(
+    split, whole, tmp_path: Path, time_format, tolerance
+):
+    # Each file computes its times from its own start time, which rounds differently in the last bits of the float seconds.
+    merged, converted = convert_both(
+        split,
+        whole,
+        tmp_path,
+        ConversionOptions(time_column="waveform", time_format=time_format),
+    )
+    merged_table = pd.read_csv(merged, index_col=0)
+    converted_table = pd.read_csv(converted, index_col=0)
+    np.testing.assert_allclose(
+        merged_table["time"], converted_table["time"], rtol=0, atol=tolerance
+    )
+    pd.testing.assert_frame_equal(
+        merged_table.drop(columns="time"), converted_table.drop(columns="time")
+    )
+
+
+@pytest.mark.parametrize("chunk_rows", [16, 1000])
+def test_long_layout_offsets_carry_on_across_files(
+    split, whole, tmp_path: Path, chunk_rows
+):
+    merged, converted = convert_both(
+        split,
+        whole,
+        tmp_path,
+        ConversionOptions(layout="long", chunk_rows=chunk_rows),
+    )
+    merged_table = pd.read_csv(merged, index_col=0)
+    converted_table = pd.read_csv(converted, index_col=0)
+    assert list(merged_table.index) == list(range(2 * sum(FILE_ROWS)))
+    assert sorted(merged_table.itertuples(index=False, name=None)) == sorted(
+        converted_table.itertuples(index=False, name=None)
+    )
+
+
+def test_decimation_blocks_stay_within_files(split, tmp_path: Path):
+    (merged,) = merge_files(
+        split,
+        str(tmp_path),
+        ConversionOptions(decimation="nth", decimation_factor=10),
+    )
+    table = pd.read_csv(merged, index_col=0)
+    # Each file starts a block, the last one of each file being partial.
+    assert list(table["count"]) == [0, 10, 20, 30, 40, 50, 60, 70, 75, 85, 95]
+    assert list(table.index) == list(range(11))
+
+
+def test_gaps_and_overlaps_are_reported(write_tdms, tmp_path: Path):
+    sources = [
+        write_tdms([acquisition_segment(0, 40)], "a.tdms"),
+        # Starts 1 s after the end of a.tdms.
+        write_tdms(
+            [acquisition_segment(40, 40, START_TIME + np.timedelta64(1400, "ms"))],
+            "b.tdms",
+        ),
+        # Starts 0.2 s before the end of b.tdms.
+        write_tdms(
+            [acquisition_segment(80, 40, START_TIME + np.timedelta64(1600, "ms"))],
+            "c.tdms",
+        ),
+        # Starts within half an increment of the end of c.tdms.
+        write_tdms(
+            [acquisition_segment(120, 40, START_TIME + np.timedelta64(2002, "ms"))],
+            "d.tdms",
+        ),
+    ]
+    gaps = []
+    (merged,) = merge_files(
+        sources,
+        str(tmp_path),
+        ConversionOptions(time_column="waveform", time_format="relative"),
+        on_gap=lambda group, path, gap: gaps.append((group, Path(path).name, gap)),
+    )
+    assert [(group, name) for group, name, _ in gaps] == [
+        ("group", "b.tdms"),
+        ("group", "c.tdms"),
+    ]
+    np.testing.assert_allclose([gap for _, _, gap in gaps], [1.0, -0.2])
+    # Relative times keep the gap.
+    times = pd.read_csv(merged, index_col=0)["time"]
+    np.testing.assert_allclose(times[[39, 40, 80, 120]], [0.39, 1.4, 1.6, 2.002])
+
+
+def test_numeric_types_are_widened(write_tdms, tmp_path: Path):
+    sources = [
+        write_tdms([acquisition_segment(0, 10, dtype="f4")], "a.tdms"),
+        write_tdms([acquisition_segment(10, 10)], "b.tdms"),
+    ]
+    (merged,) = merge_files(sources, str(tmp_path), ConversionOptions())
+    table = pd.read_csv(merged, index_col=0)
+    np.testing.assert_allclose(table["x"], np.sin(np.arange(20) / 7), rtol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "second, message",
+    [
+        (
+            [ChannelObject("group", "other", np.arange(5.0))],
+            "channels",
+        ),
+        (acquisition_segment(40, 10, increment=0.02), "increment"),
+        (
+            [
+                ChannelObject("group", "x", np.array(["a", "b"])),
+                ChannelObject("group", "count", np.arange(2, dtype=np.int32)),
+            ],
+            "channel x of group group is object",
+        ),
+    ],
+)
+def test_incompatible_files_are_rejected_before_writing(
+    write_tdms, tmp_path: Path, second, message
+):
+    sources = [
+        write_tdms([acquisition_segment(0, 40)], "a.tdms"),
+        write_tdms([second], "b.tdms"),
+    ]
+    destination = tmp_path / "out"
+    destination.mkdir()
+    with pytest.raises(ValueError, match=message):
+        merge_files(sources, str(destination), ConversionOptions())
+    assert not list(destination.iterdir())
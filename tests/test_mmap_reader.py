@@ -0,0 +1,153 @@
+from pathlib import Path
+import numpy as np
+import pytest
+from nptdms import ChannelObject, GroupObject, RootObject, TdmsFile
+
+from src.modules import mmap_reader
+from src.modules.converter import convert_file
+from src.modules.mmap_reader import MappedTdmsFile, UnsupportedLayout
+from src.modules.options import ConversionOptions
+
+START_TIME = np.datetime64("2024-01-01T00:00:00.000001")
+
+
+def assert_same_channels(path: str) -> None:
+    """Every channel read through the memory map equals the channel read by nptdms, whole and sliced across segments."""
+    expected = TdmsFile.read(path)
+    with MappedTdmsFile(path) as mapped_file:
+        assert mapped_file.properties == expected.properties
+        for group in expected.groups():
+            mapped_group = mapped_file[group.name]
+            assert [channel.name for channel in mapped_group.channels()] == [
+                channel.name for channel in group.channels()
+            ]
+            for channel in group.channels():
+                mapped = mapped_group[channel.name]
+                assert mapped.dtype == channel.dtype
+                assert len(mapped) == len(channel)
+                np.testing.assert_array_equal(mapped[:], channel[:])
+                np.testing.assert_array_equal(
+                    mapped[3 : len(channel) - 2], channel[3:-2]
+                )
+                assert len(mapped[len(channel) :]) == 0
+
+
+def segments(count: int):
+    return [
+        [
+            RootObject({"title": "mmap"}),
+            GroupObject("group", {"index": segment}),
+            ChannelObject(
+                "group",
+                "float",
+                np.linspace(0, 1, 7) + segment,
+                {"wf_increment": 0.1, "wf_start_time": START_TIME},
+            ),
+            ChannelObject("group", "int", np.arange(7, dtype=np.int16) * (segment + 1)),
+            ChannelObject("group", "flag", np.arange(7) % 2 == 0),
+            ChannelObject(
+                "group",
+                "time",
+                START_TIME + np.arange(7).astype("timedelta64[s]") * (segment + 1),
+            ),
+            ChannelObject(
+                "other", "text", np.array([f"{segment}-{row}" for row in range(3)])
+            ),
+        ]
+        for segment in range(count)
+    ]
+
+
+def test_contiguous_segments_match_nptdms(write_tdms):
+    path = write_tdms(segments(4))
+    assert_same_channels(path)
+    with MappedTdmsFile(path) as mapped_file:
+        assert mapped_file["group"]["float"].mapped
+        assert mapped_file["group"]["time"].mapped
+        # Strings have no fixed size, they are read through nptdms.
+        assert not mapped_file["other"]["text"].mapped
+
+
+@pytest.mark.parametrize("byte_order", ["<", ">"])
+@pytest.mark.parametrize("interleaved", [False, True])
+def test_raw_layouts_match_nptdms(raw_tdms, byte_order, interleaved):
+    path = raw_tdms(
+        [
+            {
+                "a": np.arange(5, dtype="f8") + 10 * segment,
+                "b": np.arange(5, dtype="i4") - segment,
+                "c": np.arange(5, dtype="u1"),
+            }
+            for segment in range(3)
+        ],
+        byte_order,
+        interleaved,
+    )
+    assert_same_channels(path)
+    with MappedTdmsFile(path) as mapped_file:
+        channel = mapped_file["group"]["a"]
+        assert channel.mapped
+        assert channel[:].dtype.byteorder in "=|"
+
+
+def test_truncated_segment_matches_nptdms(raw_tdms):
+    # A segment cut short while it is being written holds the values that made it to the disk.
+    path = raw_tdms(
+        [{"a": np.arange(6, dtype="f8"), "b": np.arange(6, dtype="i2")}] * 2,
+        truncate=-5,
+    )
+    assert_same_channels(path)
+
+
+def test_scaled_channel_falls_back_to_nptdms(write_tdms):
+    scaling = {
+        "NI_Number_Of_Scales": 1,
+        "NI_Scale[0]_Scale_Type": "Linear",
+        "NI_Scale[0]_Linear_Slope": 2.0,
+        "NI_Scale[0]_Linear_Y_Intercept": 1.0,
+        "NI_Scaling_Status": "unscaled",
+    }
+    path = write_tdms(
+        [
+            [
+                ChannelObject("group", "scaled", np.arange(4, dtype=np.int32), scaling),
+                ChannelObject("group", "raw", np.arange(4, dtype=np.int32)),
+            ]
+        ]
+        * 2
+    )
+    assert_same_channels(path)
+    with MappedTdmsFile(path) as mapped_file:
+        assert not mapped_file["group"]["scaled"].mapped
+        assert mapped_file["group"]["raw"].mapped
+        np.testing.assert_array_equal(mapped_file["group"]["scaled"][:2], [1.0, 3.0])
+
+
+def test_unsupported_layout_falls_back_to_nptdms(write_tdms, monkeypatch):
+    def unsupported(_):
+        raise UnsupportedLayout("DAQmx raw data")
+
+    monkeypatch.setattr(mmap_reader, "scan_segments", unsupported)
+    path = write_tdms(segments(2))
+    assert_same_channels(path)
+    with MappedTdmsFile(path) as mapped_file:
+        assert not any(
+            channel.mapped
+            for group in mapped_file.groups()
+            for channel in group.channels()
+        )
+
+
+def test_conversion_is_identical_with_memory_map(write_tdms, tmp_path: Path):
+    path = write_tdms(segments(3))
+    outputs = {}
+    for memory_map in (False, True):
+        destination = tmp_path / str(memory_map)
+        destination.mkdir()
+        files = convert_file(
+            path,
+            str(destination),
+            ConversionOptions(memory_map=memory_map, chunk_rows=5),
+        )
+        outputs[memory_map] = [Path(file).read_bytes() for file in files]
+    assert outputs[True] == outputs[False]
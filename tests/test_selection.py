@@ -0,0 +1,162 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from nptdms import ChannelObject, TdmsFile
+
+from src.modules.converter import convert_file
+from src.modules.options import ConversionOptions
+from src.modules.selection import select_groups, time_window
+
+ROWS = 100
+START_TIME = np.datetime64("2024-01-01T10:00:00", "us")
+INCREMENT = 0.01
+
+
+def waveform(name: str, rows: int = ROWS) -> ChannelObject:
+    return ChannelObject(
+        "wave",
+        name,
+        np.arange(rows, dtype=np.float64),
+        {"wf_start_time": START_TIME, "wf_increment": INCREMENT},
+    )
+
+
+@pytest.fixture
+def source(write_tdms) -> str:
+    return write_tdms(
+        [
+            [
+                waveform("a1"),
+                waveform("a2", 60),
+                waveform("b"),
+                ChannelObject("other", "x", np.arange(10, dtype=np.int32)),
+            ]
+        ]
+    )
+
+
+def selected_rows(source: str, **options) -> dict:
+    with TdmsFile.open(source) as tdms_file:
+        return {
+            f"{selection.output_name}/{channel.name}": channel[:].tolist()
+            for selection in select_groups(tdms_file, ConversionOptions(**options))
+            for channel in selection.channels()
+        }
+
+
+@pytest.mark.parametrize(
+    "time_start, time_stop",
+    [
+        ("0.015", "0.045"),
+        ("2024-01-01T10:00:00.015", "2024-01-01T10:00:00.045"),
+        # On a sample: it is the first row, and the row the range stops before.
+        ("0.02", "0.05"),
+    ],
+)
+def test_time_window_between_samples(source, time_start, time_stop):
+    rows = selected_rows(
+        source, groups=["wave"], time_start=time_start, time_stop=time_stop
+    )
+    assert rows == {
+        "wave/a1": [2.0, 3.0, 4.0],
+        "wave/a2": [2.0, 3.0, 4.0],
+        "wave/b": [2.0, 3.0, 4.0],
+    }
+
+
+def test_time_window_moves_the_start_time(source):
+    with TdmsFile.open(source) as tdms_file:
+        [selection] = select_groups(
+            tdms_file,
+            ConversionOptions(groups=["wave"], channels=["b"], time_start="0.5"),
+        )
+        [channel] = selection.channels()
+        assert channel.properties["wf_start_time"] == np.datetime64(
+            "2024-01-01T10:00:00.5"
+        )
+        assert channel.properties["wf_increment"] == INCREMENT
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"time_start": "5"},
+        {"time_start": "2024-01-01T11:00:00"},
+        {"time_stop": "2024-01-01T09:00:00"},
+        # Combined with a row range that ends before the window.
+        {"time_start": "0.5", "row_stop": 20},
+    ],
+)
+def test_window_outside_the_data_is_empty(source, tmp_path: Path, options):
+    rows = selected_rows(source, groups=["wave"], **options)
+    assert rows == {"wave/a1": [], "wave/a2": [], "wave/b": []}
+
+    [converted] = convert_file(
+        source, str(tmp_path), ConversionOptions(groups=["wave"], **options)
+    )
+    assert pd.read_csv(converted, index_col=0).shape == (0, 3)
+
+
+def test_window_past_a_short_channel(source):
+    rows = selected_rows(source, groups=["wave"], time_start="0.58", time_stop="0.62")
+    assert rows == {
+        "wave/a1": [58.0, 59.0, 60.0, 61.0],
+        "wave/a2": [58.0, 59.0],
+        "wave/b": [58.0, 59.0, 60.0, 61.0],
+    }
+
+
+def test_time_window_requires_a_waveform(write_tdms):
+    source = write_tdms(
+        [[ChannelObject("group", "x", np.arange(10.0), {"wf_start_time": START_TIME})]]
+    )
+    with TdmsFile.open(source) as tdms_file:
+        channels = tdms_file["group"].channels()
+        with pytest.raises(ValueError, match="wf_increment"):
+            time_window(channels, "0.5", None)
+        with pytest.raises(ValueError, match="wf_increment"):
+            select_groups(tdms_file, ConversionOptions(time_stop="1"))
+
+
+def test_timestamps_require_a_start_time(write_tdms):
+    source = write_tdms(
+        [
+            [
+                ChannelObject("group", "plain", np.arange(10.0)),
+                ChannelObject(
+                    "group", "x", np.arange(10.0), {"wf_increment": INCREMENT}
+                ),
+            ]
+        ]
+    )
+    with TdmsFile.open(source) as tdms_file:
+        channels = tdms_file["group"].channels()
+        # The first channel with an increment is the reference.
+        assert time_window(channels, "0.02", "0.05") == (2, 5)
+        with pytest.raises(ValueError, match="no start time"):
+            time_window(channels, "2024-01-01T10:00:00", None)
+
+
+def test_channels_layout_converts_each_channel_to_a_file(source, tmp_path: Path):
+    assert sorted(selected_rows(source, layout="channels", channels=["a*"])) == [
+        "wave_a1/a1",
+        "wave_a2/a2",
+    ]
+    converted = convert_file(
+        source,
+        str(tmp_path),
+        ConversionOptions(layout="channels", channels=["a*"], row_start=50),
+    )
+    assert sorted(Path(file).name for file in converted) == [
+        "source_wave_a1.csv",
+        "source_wave_a2.csv",
+    ]
+    for file in converted:
+        frame = pd.read_csv(file, index_col=0)
+        channel = Path(file).stem.rsplit("_", 1)[1]
+        assert list(frame.columns) == [channel]
+        # Each file has the length of its own channel, without padding.
+        assert frame[channel].tolist() == list(
+            np.arange(50, {"a1": ROWS, "a2": 60}[channel], dtype=np.float64)
+        )
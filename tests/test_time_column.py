@@ -0,0 +1,206 @@
+from pathlib import Path
+import numpy as np
+import pytest
+from nptdms import ChannelObject, TdmsFile
+
+from src.modules.converter import convert_file
+from src.modules.options import ConversionOptions
+from src.modules.selection import select_group
+from src.modules.transforms import TIME_COLUMN, TimeColumn, open_time_column
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+ROWS = 100
+START_TIME = np.datetime64("2024-01-01T10:00:00", "us")
+INCREMENT = 0.001
+# Seconds from 1970-01-01 to START_TIME.
+START_EPOCH = 1704103200.0
+
+
+@pytest.fixture
+def source(write_tdms) -> str:
+    values = np.arange(ROWS, dtype=np.float64)
+    times = START_TIME + np.arange(ROWS).astype("timedelta64[ms]")
+    return write_tdms(
+        [
+            [
+                ChannelObject(
+                    "group",
+                    "x",
+                    values,
+                    {"wf_start_time": START_TIME, "wf_increment": INCREMENT},
+                ),
+                # The same times as the waveform, stored in a channel.
+                ChannelObject("group", "t", times),
+            ]
+        ]
+    )
+
+
+def expected_times(time_format: str, start: int = 0) -> np.ndarray:
+    rows = np.arange(start, ROWS)
+    if time_format == "iso":
+        return START_TIME.astype("datetime64[ns]") + rows.astype("timedelta64[ms]")
+    if time_format == "epoch":
+        return START_EPOCH + rows * INCREMENT
+    return rows * INCREMENT
+
+
+def time_column(source: str, **options) -> TimeColumn:
+    options = ConversionOptions(**options)
+    with TdmsFile.open(source) as tdms_file:
+        return open_time_column(select_group(tdms_file["group"], options), options)
+
+
+def chunked_times(column: TimeColumn, data: dict, chunk_rows: int) -> np.ndarray:
+    rows = len(next(iter(data.values())))
+    chunks = []
+    for start in range(0, rows, chunk_rows):
+        chunk = {
+            name: values[start : start + chunk_rows] for name, values in data.items()
+        }
+        chunk_start, chunk = column.add(start, chunk)
+        assert chunk_start == start
+        assert list(chunk) == [TIME_COLUMN, *data]
+        chunks.append(chunk[TIME_COLUMN])
+    return np.concatenate(chunks)
+
+
+def assert_times_equal(times: np.ndarray, expected: np.ndarray) -> None:
+    assert times.dtype == expected.dtype
+    if times.dtype.kind == "M":
+        np.testing.assert_array_equal(times, expected)
+    else:
+        # Epoch seconds are only exact to a few tenths of a microsecond in float64.
+        np.testing.assert_allclose(times, expected, rtol=1e-15, atol=1e-12)
+
+
+@pytest.mark.parametrize("time_format", ["iso", "epoch", "relative"])
+@pytest.mark.parametrize("chunk_rows", [ROWS, 7, 1])
+def test_waveform_times(source, time_format, chunk_rows):
+    column = time_column(source, time_column="waveform", time_format=time_format)
+    assert column.columns({"x": np.dtype("f8")}) == {
+        TIME_COLUMN: expected_times(time_format).dtype,
+        "x": np.dtype("f8"),
+    }
+    data = {"x": np.arange(ROWS, dtype=np.float64)}
+    assert_times_equal(
+        chunked_times(column, data, chunk_rows), expected_times(time_format)
+    )
+
+
+@pytest.mark.parametrize("time_format", ["iso", "epoch", "relative"])
+@pytest.mark.parametrize("chunk_rows", [ROWS, 7, 1])
+def test_channel_times_match_waveform_times(source, time_format, chunk_rows):
+    column = time_column(source, time_column="t", time_format=time_format)
+    with TdmsFile.open(source) as tdms_file:
+        data = {"t": tdms_file["group"]["t"][:]}
+    assert_times_equal(
+        chunked_times(column, data, chunk_rows), expected_times(time_format)
+    )
+
+
+@pytest.mark.parametrize("time_source", ["waveform", "t"])
+@pytest.mark.parametrize("time_format", ["iso", "epoch"])
+def test_times_of_a_selection_start_at_its_first_row(source, time_source, time_format):
+    column = time_column(
+        source, time_column=time_source, time_format=time_format, row_start=40
+    )
+    with TdmsFile.open(source) as tdms_file:
+        data = {"t": tdms_file["group"]["t"][40:]}
+    assert_times_equal(
+        chunked_times(column, data, 16), expected_times(time_format, start=40)
+    )
+
+
+@pytest.mark.parametrize("time_source", ["waveform", "t"])
+def test_relative_times_of_a_selection(source, time_source):
+    # Seconds since the start of the waveform, or since the first selected timestamp.
+    column = time_column(
+        source, time_column=time_source, time_format="relative", row_start=40
+    )
+    with TdmsFile.open(source) as tdms_file:
+        data = {"t": tdms_file["group"]["t"][40:]}
+    expected = expected_times("relative", start=40)
+    if time_source == "t":
+        expected = expected - expected[0]
+    assert_times_equal(chunked_times(column, data, 16), expected)
+
+
+@pytest.mark.parametrize("time_format", ["iso", "epoch", "relative"])
+def test_converted_times_do_not_depend_on_chunks(source, tmp_path: Path, time_format):
+    tables = []
+    for chunk_rows in (ROWS, 7):
+        destination_dir = tmp_path / str(chunk_rows)
+        destination_dir.mkdir()
+        [converted] = convert_file(
+            source,
+            str(destination_dir),
+            ConversionOptions(
+                destination_file_format="parquet",
+                time_column="waveform",
+                time_format=time_format,
+                chunk_rows=chunk_rows,
+            ),
+        )
+        tables.append(pq.read_table(converted))
+    assert tables[0].equals(tables[1])
+    assert tables[0].column_names == [TIME_COLUMN, "x", "t"]
+    assert_times_equal(
+        tables[0].column(TIME_COLUMN).to_numpy(), expected_times(time_format)
+    )
+
+
+def test_iso_times_in_csv_files(source, tmp_path: Path):
+    [converted] = convert_file(
+        source,
+        str(tmp_path),
+        ConversionOptions(time_column="waveform", channels=["x"], chunk_rows=7),
+    )
+    lines = Path(converted).read_text().splitlines()
+    assert lines[:3] == [
+        ",time,x",
+        "0,2024-01-01 10:00:00.000,0.0",
+        "1,2024-01-01 10:00:00.001,1.0",
+    ]
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        ({"time_column": "waveform", "time_format": "hours"}, "Unsupported"),
+        ({"time_column": "x"}, "not a selected timestamp channel"),
+        ({"time_column": "t", "channels": ["x"]}, "not a selected timestamp channel"),
+    ],
+)
+def test_invalid_time_columns(source, options, message):
+    with pytest.raises(ValueError, match=message):
+        time_column(source, **options)
+
+
+def test_waveform_times_require_waveform_properties(write_tdms):
+    source = write_tdms(
+        [
+            [
+                ChannelObject("group", "plain", np.arange(10.0)),
+                ChannelObject(
+                    "group", "x", np.arange(10.0), {"wf_increment": INCREMENT}
+                ),
+            ]
+        ]
+    )
+    # Relative times only need the increment.
+    column = time_column(source, time_column="waveform", time_format="relative")
+    assert column.increment == INCREMENT
+    with pytest.raises(ValueError, match="no start time"):
+        time_column(source, time_column="waveform", time_format="iso")
+    with pytest.raises(ValueError, match="wf_increment"):
+        time_column(
+            source, time_column="waveform", time_format="relative", channels=["plain"]
+        )
+
+
+def test_channel_named_like_the_time_column(source):
+    column = time_column(source, time_column="waveform")
+    with pytest.raises(ValueError, match="already has a channel named time"):
+        column.columns({TIME_COLUMN: np.dtype("f8")})
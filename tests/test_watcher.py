@@ -0,0 +1,201 @@
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from nptdms import ChannelObject, TdmsWriter
+
+from src.modules.batch import FileResult
+from src.modules.options import ConversionOptions
+from src.modules.watcher import (
+    DONE_DIR,
+    FAILED_DIR,
+    PROCESSING_DIR,
+    PollingWatcher,
+    WatchFolder,
+    open_watcher,
+)
+
+STABLE_SECONDS = 0.05
+# Seconds the whole service is given to convert the files of a test.
+SERVICE_TIMEOUT = 30
+
+
+class InlineExecutor:
+    """Executor running the conversions in the calling thread, so that the steps of the service can be checked one by one."""
+
+    def __init__(self):
+        self.submitted: List[str] = []
+
+    def submit(self, function, *args) -> Future:
+        self.submitted.append(args[0])
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+
+def drop_file(directory: Path, name: str = "source.tdms") -> str:
+    path = str(directory / name)
+    with TdmsWriter(path) as writer:
+        writer.write_segment([ChannelObject("group", "x", np.arange(10.0))])
+    return path
+
+
+@pytest.fixture
+def folders(tmp_path: Path):
+    watched = tmp_path / "watched"
+    destination = tmp_path / "destination"
+    watched.mkdir()
+    destination.mkdir()
+    return watched, destination
+
+
+def watch_folder(folders, **kwargs) -> WatchFolder:
+    watched, destination = folders
+    return WatchFolder(
+        [str(watched)],
+        str(destination),
+        ConversionOptions(),
+        stable_seconds=STABLE_SECONDS,
+        **kwargs,
+    )
+
+
+def wait_until_stable(service: WatchFolder, files: List[str]) -> None:
+    service.track(files)
+    service.enqueue_stable_files()
+    time.sleep(STABLE_SECONDS * 2)
+    service.enqueue_stable_files()
+
+
+def test_files_are_queued_once_unchanged_for_stable_seconds(folders):
+    watched, _ = folders
+    service = watch_folder(folders)
+    path = drop_file(watched)
+    service.track([path])
+    service.enqueue_stable_files()
+    assert service.queue.empty()
+
+    # Still being written: the wait starts over.
+    time.sleep(STABLE_SECONDS * 2)
+    with open(path, "ab") as source_file:
+        source_file.write(b"\0")
+    service.enqueue_stable_files()
+    assert service.queue.empty()
+
+    time.sleep(STABLE_SECONDS * 2)
+    service.enqueue_stable_files()
+    assert service.queue.get_nowait()[1] == path
+
+
+def test_full_queue_leaves_files_pending(folders):
+    watched, _ = folders
+    service = watch_folder(folders, queue_size=1, max_workers=1)
+    first = drop_file(watched, "first.tdms")
+    os.utime(first, (1, 1))
+    second = drop_file(watched, "second.tdms")
+    wait_until_stable(service, [first, second])
+    assert service.queue.qsize() == 1
+    assert list(service.pending) == [second]
+
+    executor = InlineExecutor()
+    service.submit(executor)
+    service.enqueue_stable_files()
+    # The oldest file goes first, the other one once there is room.
+    [claimed] = executor.submitted
+    assert Path(claimed).parent.parent == watched / PROCESSING_DIR
+    assert Path(claimed).name == "first.tdms"
+    assert service.queue.get_nowait()[1] == second
+
+
+def test_converted_and_failed_files_are_moved(folders):
+    watched, destination = folders
+    service = watch_folder(folders, max_workers=2)
+    results: List[FileResult] = []
+    service.on_result = results.append
+    good = drop_file(watched, "good.tdms")
+    bad = str(watched / "bad.tdms")
+    Path(bad).write_bytes(bytes(100))
+    wait_until_stable(service, [good, bad])
+    service.submit(InlineExecutor())
+    service.collect()
+
+    assert sorted(Path(result.source_file_path).parent.name for result in results) == [
+        DONE_DIR,
+        FAILED_DIR,
+    ]
+    assert (watched / DONE_DIR / "good.tdms").exists()
+    assert (watched / FAILED_DIR / "bad.tdms").exists()
+    assert [path.name for path in destination.iterdir()] == ["good_group.csv"]
+    assert not list((watched / PROCESSING_DIR).iterdir())
+
+
+def test_claimed_files_keep_their_name(folders):
+    watched, destination = folders
+    service = watch_folder(folders, max_workers=2)
+    executor = InlineExecutor()
+    claimed = []
+    for _ in range(2):
+        # A file of the same name is dropped while the first one is being converted.
+        path = drop_file(watched)
+        wait_until_stable(service, [path])
+        service.submit(executor)
+        claimed.append(executor.submitted[-1])
+    assert [Path(path).name for path in claimed] == ["source.tdms"] * 2
+    assert claimed[0] != claimed[1]
+    assert [path.name for path in destination.iterdir()] == ["source_group.csv"]
+
+
+def run_service(service: WatchFolder, expected_results: int) -> List[FileResult]:
+    results: List[FileResult] = []
+    service.on_result = results.append
+    thread = threading.Thread(target=service.run)
+    thread.start()
+    deadline = time.monotonic() + SERVICE_TIMEOUT
+    while len(results) < expected_results and time.monotonic() < deadline:
+        time.sleep(0.05)
+    service.stop()
+    thread.join()
+    return results
+
+
+def test_leftovers_of_a_previous_run_are_converted(folders):
+    watched, destination = folders
+    # Claimed by a service that died: one in a claim directory, one in the layout of older versions.
+    claim_dir = watched / PROCESSING_DIR / "claim"
+    claim_dir.mkdir(parents=True)
+    drop_file(claim_dir, "claimed.tdms")
+    drop_file(watched / PROCESSING_DIR, "older.tdms")
+    service = watch_folder(folders, max_workers=1, poll_interval=0.05, polling=True)
+
+    results = run_service(service, 2)
+    assert all(result.succeeded for result in results)
+    assert sorted(path.name for path in (watched / DONE_DIR).iterdir()) == [
+        "claimed.tdms",
+        "older.tdms",
+    ]
+    assert sorted(path.name for path in destination.iterdir()) == [
+        "claimed_group.csv",
+        "older_group.csv",
+    ]
+    assert not list((watched / PROCESSING_DIR).iterdir())
+
+
+def test_polling_picks_up_dropped_files(folders):
+    watched, destination = folders
+    assert isinstance(open_watcher([str(watched)], polling=True), PollingWatcher)
+    service = watch_folder(folders, max_workers=1, poll_interval=0.05, polling=True)
+
+    def drop_later() -> None:
+        time.sleep(0.2)
+        drop_file(watched, "late.tdms")
+
+    dropper = threading.Thread(target=drop_later)
+    dropper.start()
+    results = run_service(service, 1)
+    dropper.join()
+    assert [Path(result.source_file_path).name for result in results] == ["late.tdms"]
+    assert [path.name for path in destination.iterdir()] == ["late_group.csv"]